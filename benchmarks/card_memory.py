@@ -0,0 +1,116 @@
+"""
+比較舊版 Card (每張卡一個 __dict__ 與 list 提示文字) 與目前 __slots__ Card 的記憶體用量
+
+用法 : python benchmarks/card_memory.py [卡片數量]
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.global_set.card_db import (  # noqa: E402
+    Card,
+    create_database_file,
+    iter_card_batches,
+    sql_insert_datas,
+    sql_insert_texts,
+    DATA_ROW_LEN,
+)
+from scripts.global_set.app_set import TEXT_HINTS_COUNT  # noqa: E402
+
+HINT_WORDS = ["发动效果", "特殊召唤", "破坏", "抽卡", "回复生命", "移动"]
+
+
+# 舊版 Card 的資料佈局
+class LegacyCard:
+    alias: int = 0
+    setcode: int = 0
+    type: int = 0
+    value: int = 0
+    atk: int = 0
+    move: int = 0
+    race: int = 0
+    from_: int = 0
+    name: str = ""
+    desc: str = ""
+
+    def __init__(self, id: int):
+        self.id = id
+        self.hints = []
+
+    def load_sql_row(self, row: tuple):
+        (
+            _,
+            self.alias,
+            self.setcode,
+            self.type,
+            self.value,
+            self.atk,
+            self.move,
+            self.race,
+            self.from_,
+        ) = row[:DATA_ROW_LEN]
+        self.name = row[DATA_ROW_LEN]
+        self.desc = row[DATA_ROW_LEN + 1]
+        self.hints = list(row[DATA_ROW_LEN + 2 :])
+
+
+def build_cdb(path: str, count: int):
+    """建立 count 張卡的測試用 CDB, 約兩成的卡有提示文字"""
+    rnd = random.Random(0)
+    create_database_file(path)
+    datas, texts = [], []
+    for i in range(count):
+        id = 10000000 + i
+        datas.append((id, 0, 0x12A, 0x1, rnd.randint(0, 9), 5, 0x18, 0x4, 0x1))
+        hints = [""] * TEXT_HINTS_COUNT
+        if rnd.random() < 0.2:
+            for j in range(rnd.randint(1, 3)):
+                hints[j] = rnd.choice(HINT_WORDS)
+        texts.append((id, f"测试卡片 {i}", f"效果描述 {i}\n" * 3, *hints))
+    with sqlite3.connect(path) as conn:
+        conn.executemany(sql_insert_datas, datas)
+        conn.executemany(sql_insert_texts, texts)
+    conn.close()
+
+
+def measure(path: str, new_card) -> int:
+    """回傳把整個 CDB 載入為 dict 後佔用的位元組數"""
+    tracemalloc.start()
+    conn = sqlite3.connect(path)
+    card_dict = {}
+    if new_card is Card:
+        for batch in iter_card_batches(conn.cursor()):
+            for card in batch:
+                card_dict[card.id] = card
+    else:
+        cur = conn.execute("SELECT * FROM datas JOIN texts USING(id) ORDER BY id")
+        for row in cur:
+            card = new_card(row[0])
+            card.load_sql_row(row)
+            card_dict[card.id] = card
+    conn.close()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.cdb")
+        build_cdb(path, count)
+        old = measure(path, LegacyCard)
+        new = measure(path, Card)
+    print(f"cards      : {count}")
+    print(f"legacy Card: {old / 1024 / 1024:8.1f} MiB")
+    print(f"slots Card : {new / 1024 / 1024:8.1f} MiB ({new / old:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+測量匯入 app_set 的時間與記憶體 : 目前 (圖示與封面延後讀取) 與
+舊版 (匯入時就載入內嵌的 base64 並解碼, 以匯入 app_res 並解碼模擬)
+
+每次都在新的程序中匯入, cold 為沒有 .pyc 快取 (需要編譯原始碼), warm 為已有 .pyc
+
+用法 : python benchmarks/import_time.py [次數]
+"""
+
+import os
+import sys
+import json
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子程序中執行, 印出匯入時間 (秒) 與匯入前後的最大 RSS 差 (KiB)
+_CHILD_CODE = """
+import sys, time, json, resource
+sys.path.insert(0, {root!r})
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - t
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps([elapsed, after - before]))
+"""
+
+CASES: dict[str, str] = {
+    "current": "import scripts.global_set.app_set",
+    "legacy": (
+        "import base64\n"
+        "import scripts.global_set.app_set\n"
+        "from scripts.global_set import app_res\n"
+        "icon = base64.b64decode(app_res.icon_base64.encode('utf-8'))\n"
+        "cover = base64.b64decode(app_res.cover_base64.encode('utf-8'))"
+    ),
+}
+
+
+def run_case(code: str, cold: bool) -> tuple[float, int]:
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        if cold:
+            # 指向空的快取資料夾, 強制重新編譯
+            env["PYTHONPYCACHEPREFIX"] = tmp
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD_CODE.format(root=ROOT, code=code)],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    elapsed, rss = json.loads(out)
+    return elapsed, rss
+
+
+def main():
+    times = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name, code in CASES.items():
+        run_case(code, False)  # 先產生 .pyc
+        for cold in (True, False):
+            res = [run_case(code, cold) for _ in range(times)]
+            elapsed = statistics.median(r[0] for r in res)
+            rss = statistics.median(r[1] for r in res)
+            label = f"{name} ({'cold' if cold else 'warm'})"
+            print(f"{label:16}: {elapsed * 1000:8.2f} ms  rss +{rss / 1024:6.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+比較每次保存一張卡的延遲 : 舊版 (每次新開連線並執行 CREATE TABLE, 預設日誌模式)
+與目前 CDB 的長期連線 (WAL, synchronous=NORMAL, 重複使用已編譯的語句)
+
+用法 : python benchmarks/save_latency.py [卡片數量] [保存次數]
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.global_set.card_db import (  # noqa: E402
+    CDB,
+    sql_set_datas,
+    sql_set_texts,
+    sql_delete_datas,
+    sql_delete_texts,
+    sql_insert_datas,
+    sql_insert_texts,
+)
+from card_memory import build_cdb  # noqa: E402
+
+
+def legacy_save(path: str, card):
+    """舊版 CDB.save 的寫入方式"""
+    with sqlite3.connect(path) as conn:
+        cur = conn.cursor()
+        cur.execute(sql_set_datas)
+        cur.execute(sql_set_texts)
+        cur.executemany(sql_delete_datas, [])
+        cur.executemany(sql_delete_texts, [])
+        cur.executemany(sql_insert_datas, [card.get_data_row()])
+        cur.executemany(sql_insert_texts, [card.get_text_row()])
+        conn.commit()
+    conn.close()
+
+
+def measure(cdb: CDB, saves: int, save_func) -> list[float]:
+    """逐一修改並保存 saves 張卡, 回傳每次保存的秒數"""
+    res = []
+    for i in range(saves):
+        card = cdb.get_card(cdb.id_index[i * 97 % len(cdb.id_index)]).copy()
+        card.atk = i
+        t = time.perf_counter()
+        save_func(card)
+        res.append(time.perf_counter() - t)
+    return res
+
+
+def report(title: str, times: list[float]):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(
+        f"{title:8}: mean {statistics.mean(times) * 1000:7.3f} ms"
+        f"  p50 {statistics.median(times) * 1000:7.3f} ms  p95 {p95 * 1000:7.3f} ms"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "src.cdb")
+        build_cdb(src, count)
+        # 舊版 : 每次保存新開連線
+        path = os.path.join(tmp, "legacy.cdb")
+        shutil.copyfile(src, path)
+        cdb = CDB.create(path)
+        before = measure(cdb, saves, lambda c: legacy_save(path, c))
+        cdb.close()
+        # 目前 : CDB 的長期連線
+        path = os.path.join(tmp, "current.cdb")
+        shutil.copyfile(src, path)
+        cdb = CDB.create(path)
+
+        def current_save(c):
+            cdb._put_card(c)
+            cdb.save()
+
+        after = measure(cdb, saves, current_save)
+        cdb.close()
+    print(f"cards   : {count}, saves : {saves}")
+    report("before", before)
+    report("after", after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+測量啟動到第一次繪製視窗的時間, 冷啟動超過預算時以結束碼 1 結束 (可用於 CI)
+
+每次都在新的程序中以 --profile-startup --profile-exit 啟動 main_from.py,
+讀取 json 報告並加上直譯器本身的啟動時間, 取中位數
+cold 為沒有 .pyc 快取 (需要編譯原始碼, 如第一次執行或更新後), warm 為已有 .pyc,
+預算與 cold 比較
+
+用法 : python benchmarks/startup_budget.py [預算 (ms)] [次數] [cdb 路徑]
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main_from.py")
+BUDGET_MS: float = 1500
+TIMEOUT: float = 60
+
+
+def run_once(cdb_path: str | None, cold: bool) -> dict:
+    """啟動一次程式, 回傳報告 (加上 launch_ms : 從啟動程序到寫入報告的時間)"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    with tempfile.TemporaryDirectory() as tmp:
+        if cold:
+            # 指向空的快取資料夾, 強制重新編譯
+            env["PYTHONPYCACHEPREFIX"] = os.path.join(tmp, "pycache")
+        report_path = os.path.join(tmp, "startup.json")
+        args = [sys.executable, MAIN, f"--profile-startup={report_path}"]
+        args.append("--profile-exit")
+        if cdb_path:
+            args.append(cdb_path)
+        launched = time.time()
+        subprocess.run(args, cwd=ROOT, env=env, timeout=TIMEOUT, check=True)
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+    report["launch_ms"] = (report["written_at"] - launched) * 1000
+    return report
+
+
+def print_report(label: str, reports: list[dict]) -> float:
+    """印出各階段的中位數, 回傳 launch_ms 的中位數"""
+    print(f"[{label}]")
+    names = [p["name"] for p in reports[-1]["phases"]]
+    for name in names:
+        ms = [
+            p["ms"]
+            for r in reports
+            for p in r["phases"]
+            if p["name"] == name and p["ms"] is not None
+        ]
+        if ms:
+            print(f"{name:16}: {statistics.median(ms):8.2f} ms")
+    launch = statistics.median(r["launch_ms"] for r in reports)
+    print(f"{'launch':16}: {launch:8.2f} ms")
+    return launch
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    times = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    cdb_path = os.path.abspath(sys.argv[3]) if len(sys.argv) > 3 else None
+    run_once(cdb_path, False)  # 先產生 warm 使用的 .pyc
+    cold = [run_once(cdb_path, True) for _ in range(times)]
+    warm = [run_once(cdb_path, False) for _ in range(times)]
+    if any(
+        not any(p["name"] == "main_window" for p in r["phases"]) for r in cold + warm
+    ):
+        print("warning : 已有執行中的程式, 啟動時直接交給該程式處理, 結果不可靠")
+    launch = print_report("cold", cold)
+    print_report("warm", warm)
+    print(f"cold launch {launch:.2f} ms  (budget {budget:.0f} ms)")
+    if launch > budget:
+        print(f"over budget by {launch - budget:.2f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+比較重新開啟程式後 (記憶體快取為空) 載入卡圖的時間 : 從原圖解碼 與 讀取 .thumbs 中的縮圖
+
+用法 : python benchmarks/thumb_cache.py [卡圖數量] [原圖寬度]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QImage, QColor, QPainter  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+from scripts.data_edit.pic_loader import (  # noqa: E402
+    pic_key,
+    load_thumbnail,
+    read_scaled_image,
+)
+
+
+def make_pics(pic_dir: str, count: int, width: int) -> list[str]:
+    """建立 count 張 width 寬的 jpg 卡圖"""
+    height = width * 285 // 200
+    paths = []
+    for i in range(count):
+        image = QImage(width, height, QImage.Format.Format_RGB32)
+        image.fill(QColor(i * 37 % 256, i * 91 % 256, 160))
+        painter = QPainter(image)
+        painter.drawEllipse(width // 8, height // 8, width // 2, height // 2)
+        painter.end()
+        path = os.path.join(pic_dir, f"c{100000 + i}.jpg")
+        image.save(path, "JPG", 92)
+        paths.append(path)
+    return paths
+
+
+def measure(paths: list[str], load_func) -> list[float]:
+    res = []
+    for path in paths:
+        t = time.perf_counter()
+        load_func(path)
+        res.append(time.perf_counter() - t)
+    return res
+
+
+def report(title: str, times: list[float]):
+    print(
+        f"{title:10}: mean {statistics.mean(times) * 1000:7.2f} ms"
+        f"  max {max(times) * 1000:7.2f} ms"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 1600
+    app = QApplication([])  # noqa: F841
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_pics(tmp, count, width)
+        # 沒有縮圖時每次都要解碼原圖 (即使以 setScaledSize 縮小解碼)
+        original = measure(paths, read_scaled_image)
+        # 第一次載入時寫入縮圖
+        first = measure(paths, lambda p: load_thumbnail(pic_key(p)))
+        # 重新開啟後直接讀取縮圖
+        cached = measure(paths, lambda p: load_thumbnail(pic_key(p)))
+    print(f"pics      : {count}, {width} px wide")
+    report("original", original)
+    report("first", first)
+    report("thumbnail", cached)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,19 @@ def quest(msg: str, frame: QWidget | None = None) -> bool:
     return yes == QMessageBox.question(frame, "询问", msg, yes | no)
 
 
+# 多選項詢問組件, 回傳選中的選項位置, 取消回傳 -1
+def choose(msg: str, options: list[str], frame: QWidget | None = None) -> int:
+    box = QMessageBox(frame)
+    box.setIcon(QMessageBox.Icon.Question)
+    box.setWindowTitle("询问")
+    box.setText(msg)
+    btns = [box.addButton(opt, QMessageBox.ButtonRole.AcceptRole) for opt in options]
+    box.addButton("取消", QMessageBox.ButtonRole.RejectRole)
+    box.exec()
+    clicked = box.clickedButton()
+    return btns.index(clicked) if clicked in btns else -1
+
+
 # 錯誤組件
 def error(msg: str, frame: QWidget | None = None):
     logging.warning(msg)
@@ -4,38 +4,131 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QLineEdit,
     QVBoxLayout,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
+    QHeaderView,
     QApplication,
 )
-from PyQt6.QtGui import QColor, QBrush
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QColor
+from PyQt6.QtCore import (
+    Qt,
+    QTimer,
+    pyqtSignal,
+    QAbstractTableModel,
+    QModelIndex,
+)
 from scripts.global_set.card_db import CDB
+from scripts.global_set.app_set import SEARCH_DELAY
 from scripts.basic_item.ui_item import new_frame, new_btn
+from scripts.data_edit.card_prefetch import CardPrefetcher
+
+ROW_HEIGHT: int = 30
+SELECT_BG: QColor = QColor(180, 200, 255)
+SELECT_FG: QColor = QColor(0, 0, 0)
+
+
+# 卡片列表的資料模型, 直接讀取 cdb.show_id_lst, 只有可見的行才會被繪製
+class CardListModel(QAbstractTableModel):
+    cdb: CDB | None = None
+    headers: tuple[str, str] = ("ID", "Name")
+    _row_ct: int = 0  # 上次通知 view 的行數
+
+    def set_cdb(self, cdb: CDB | None):
+        self.beginResetModel()
+        self.cdb = cdb
+        self._row_ct = 0 if cdb is None else len(cdb.show_id_lst)
+        self.endResetModel()
+
+    def reset(self):
+        """show_id_lst 改變後重新整理"""
+        self.beginResetModel()
+        self._row_ct = 0 if self.cdb is None else len(self.cdb.show_id_lst)
+        self.endResetModel()
+
+    def sync_rows(self):
+        """show_id_lst 原地增加卡片後 (背景載入), 只通知新增的行, 不重置 view"""
+        if self.cdb is None:
+            return
+        old_ct, new_ct = self._row_ct, len(self.cdb.show_id_lst)
+        if new_ct < old_ct:
+            self.reset()
+            return
+        if new_ct > old_ct:
+            self.beginInsertRows(QModelIndex(), old_ct, new_ct - 1)
+            self._row_ct = new_ct
+            self.endInsertRows()
+        # 載入期間新增的卡片可能使原本的行後移
+        self.refresh_rows(0, old_ct - 1)
+
+    def refresh_rows(self, first: int, last: int):
+        """通知 first ~ last 行的內容 (選中狀態) 已改變"""
+        if first > last:
+            return
+        self.dataChanged.emit(self.index(first, 0), self.index(last, 1))
+
+    # ---------------- QAbstractTableModel ----------------
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._row_ct
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else 2
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self.cdb is None:
+            return None
+        if (row := index.row()) >= len(self.cdb.show_id_lst):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            card_id = self.cdb.show_id_lst[row]
+            if index.column() == 0:
+                return str(card_id)
+            return self.cdb.get_name(card_id)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if self.cdb.select_id_lst.has_pos(row):  # 使用淺藍色作為選中高亮
+                return SELECT_BG
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if self.cdb.select_id_lst.has_pos(row):
+                return SELECT_FG
+        return None
 
 
-class CardTable(QTableWidget):
-    def __init__(self, frame: QVBoxLayout):
+class CardTable(QTableView):
+    row_clicked = pyqtSignal(int)
+
+    def __init__(self, model: CardListModel, frame: QVBoxLayout):
         super().__init__()
         self._press_on_empty = False
         self._press_index = None
 
-        self.setColumnCount(2)
-        self.setHorizontalHeaderLabels(["ID", "Name"])
+        self.setModel(model)
         self.verticalHeader().setVisible(False)
+        # 固定行高, 捲動大量資料時不需逐行計算高度
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(ROW_HEIGHT)
         self.horizontalHeader().setDefaultAlignment(
             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
         )
         self.setColumnWidth(0, 80)
         self.horizontalHeader().setStretchLastSection(True)
-        self.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)  # 禁編輯
-        self.setSelectionMode(QTableWidget.SelectionMode.NoSelection)  # 禁選中
-        self.setDragDropMode(QTableWidget.DragDropMode.NoDragDrop)  # 禁拖放
+        self.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)  # 禁編輯
+        self.setSelectionMode(QTableView.SelectionMode.NoSelection)  # 禁選中
+        self.setDragDropMode(QTableView.DragDropMode.NoDragDrop)  # 禁拖放
         self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
         self.setDragEnabled(False)
         self.setAcceptDrops(False)
         self.setStyleSheet("""
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: transparent;
                 color: black;
             }
@@ -71,45 +164,65 @@ class CardTable(QTableWidget):
             self._press_on_empty = False
             self._press_index = None
             return
-        # 如果是從項目上按下（即使期間有移動），在放開時強制發出 itemClicked 以模擬 click
+        # 如果是從項目上按下（即使期間有移動），在放開時發出 row_clicked 以模擬 click
         if self._press_index is not None:
             row = self._press_index.row()
-            col = self._press_index.column()
-            item = self.item(row, col)
-            if item is not None:
-                # 手動發出信號（保持行為一致）
-                try:
-                    self.itemClicked.emit(item)
-                except Exception:
-                    pass
             # 重置狀態，並且不要呼叫父類以避免造成選取/高亮
             self._press_index = None
+            self.row_clicked.emit(row)
             return
         super().mouseReleaseEvent(event)
 
+    def visible_rows(self) -> tuple[int, int]:
+        """回傳目前可見的第一行與最後一行"""
+        first = max(0, self.rowAt(0))
+        last = self.rowAt(self.viewport().height() - 1)
+        if last < 0:
+            last = self.model().rowCount() - 1
+        return (first, last)
+
 
 # 卡片列表組件
 class CardListItem(QWidget):
+    card_model: CardListModel
     card_lst: CardTable
+    prefetcher: CardPrefetcher
+    search_box: QLineEdit
+    search_timer: QTimer
     page_text: QLineEdit
     page_label: QLabel
     refresh_edit = pyqtSignal()
     # 卡片列表屬性
     cdb: CDB | None = None
-    id_to_row: dict[int, int]
-    # 前後頁屬性
+    # 前後頁屬性 (一頁為列表可見的行數, 換頁即捲動列表)
     rows_per_page: int = 10
     now_page: int = 1
     total_page: int = 1
 
     def __init__(self, frame: QHBoxLayout):
         super().__init__()
-        self.id_to_row = {}
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         main_frame = new_frame("V", self)
+        # 搜索框 : 純數字時搜索 id 開頭的卡, 否則全文搜索
+        # 與編輯區的卡名, id 分開, 修改卡片時不會篩選列表
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("搜索 ID / 卡名 / 文本")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.returnPressed.connect(self._search_box_enter)
+        main_frame.addWidget(self.search_box)
+        # 輸入停止 SEARCH_DELAY 後即時搜索
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY)
+        self.search_timer.timeout.connect(self._search_box_live)
+        self.search_box.textEdited.connect(self.search_timer.start)
         # 卡片列表
-        self.card_lst = CardTable(main_frame)
-        self.card_lst.itemClicked.connect(self.on_item_clicked)
+        self.card_model = CardListModel()
+        self.card_lst = CardTable(self.card_model, main_frame)
+        self.card_lst.row_clicked.connect(self.on_row_clicked)
+        self.card_lst.verticalScrollBar().valueChanged.connect(self.update_page)
+        self.card_lst.verticalScrollBar().rangeChanged.connect(self.update_page)
+        self.prefetcher = CardPrefetcher(parent=self)
         # 按鈕控制區
         page_frame: QHBoxLayout = new_frame("H", main_frame)
         page_frame.addStretch()
@@ -130,12 +243,12 @@ class CardListItem(QWidget):
     # ---------------- UI 事件處理 ----------------
     def showEvent(self, event):
         super().showEvent(event)
-        self.calc_rows_per_page()
-        self.refresh_view()
+        self.update_page()
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        self.refresh_view()
+        # 只需重算頁數, 列表內容由 QTableView 依可見範圍繪製
+        self.update_page()
 
     # 處理上下鍵移動 now_ind 到前一個/下一個
     def keyPressEvent(self, event):
@@ -152,14 +265,12 @@ class CardListItem(QWidget):
     # 上一頁
     def prev_page(self):
         if self.now_page > 1:
-            self.now_page -= 1
-            self.refresh_view()
+            self.show_page(self.now_page - 1)
 
     # 下一頁
     def next_page(self):
         if self.now_page < self.total_page:
-            self.now_page += 1
-            self.refresh_view()
+            self.show_page(self.now_page + 1)
 
     # 跳轉到指定頁
     def goto_page(self):
@@ -168,132 +279,126 @@ class CardListItem(QWidget):
         except ValueError:
             page = self.now_page
         if 1 <= page <= self.total_page:
-            self.now_page = page
-            self.refresh_view()
+            self.show_page(page)
         else:
             self.page_text.setText(str(self.now_page))
 
+    def show_page(self, page: int):
+        """捲動列表使 page 頁的第一行位於頂端, 並改為預先載入該頁的卡"""
+        self.card_lst.verticalScrollBar().setValue((page - 1) * self.rows_per_page)
+        self.update_page()
+        if self.cdb is not None:
+            page_rows = self.card_lst.visible_rows()
+            self.prefetcher.schedule(self.cdb, page_rows[0] - 1, 1, page_rows)
+
     def calc_rows_per_page(self):
         # 顯示欄數 = 卡片列表 widget 高度 / 單行高度
-        show_row = self.card_lst.viewport().height() // 30
+        show_row = self.card_lst.viewport().height() // ROW_HEIGHT
         self.rows_per_page = max(1, show_row)
 
-    # ---------------- 顯示 ----------------
-    def refresh_view(self):
-        """根據當前的 cdb 和過濾列表刷新 QTableWidget 的內容"""
-        self.card_lst.setRowCount(0)
-        keys = self.cdb.show_id_lst if self.cdb else []
+    def update_page(self):
+        """根據捲動位置更新頁碼顯示"""
         self.calc_rows_per_page()
+        row_ct = self.card_model.rowCount()
         self.total_page = max(
-            1, (len(keys) + self.rows_per_page - 1) // self.rows_per_page
+            1, (row_ct + self.rows_per_page - 1) // self.rows_per_page
         )
-        # 頁碼校正
-        if self.now_page > self.total_page:
+        scroll_bar = self.card_lst.verticalScrollBar()
+        if scroll_bar.maximum() > 0 and scroll_bar.value() >= scroll_bar.maximum():
             self.now_page = self.total_page
-        # 更新 page_text 與 page_label
+        else:
+            self.now_page = min(
+                self.total_page, scroll_bar.value() // self.rows_per_page + 1
+            )
         self.page_text.setText(str(self.now_page))
         self.page_label.setText(f"/ {self.total_page}")
-        # 計算當前頁的索引範圍
-        st_ind = (self.now_page - 1) * self.rows_per_page
-        ed_ind = min(st_ind + self.rows_per_page, len(keys))
-        self.card_lst.setRowCount(ed_ind - st_ind)
-        self.id_to_row.clear()
-        # 填充表格
-        for row, key_idx in enumerate(range(st_ind, ed_ind)):
-            card_id = keys[key_idx]
-            card = self.cdb.card_dict[card_id]
-            self.id_to_row[int(card.id)] = row
-            is_selected = card_id in self.cdb.select_id_lst
-            for col, txt in enumerate([str(card.id), card.name]):
-                item = QTableWidgetItem(txt)
-                item.setTextAlignment(
-                    Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
-                )
-                if is_selected:  # 使用淺藍色作為選中高亮
-                    item.setBackground(QColor(180, 200, 255))
-                    item.setForeground(QColor(0, 0, 0))
-                else:  # 重置為預設背景
-                    item.setBackground(QBrush())
-                    item.setForeground(QBrush())
-                self.card_lst.setItem(row, col, item)
-
-    # 點擊時事件
-    def on_item_clicked(self, item: QTableWidgetItem):
-        row = item.row()
-        id_item = self.card_lst.item(row, 0)
-        clicked_id = int(id_item.text())
+
+    # ---------------- 顯示 ----------------
+    def refresh_view(self):
+        """show_id_lst 改變後刷新列表, 並捲動到 now_page"""
+        self.reset_model()
+        self.show_page(self.now_page)
+
+    def reset_model(self):
+        """重置模型並立即更新列表的捲動範圍, 以便隨後捲動到指定行"""
+        self.card_model.reset()
+        self.card_lst.doItemsLayout()
+
+    def refresh_select(self, old_rows: set[int] | None = None):
+        """
+        選中狀態改變後重繪, old_rows 為改變前選中的位置\n
+        前後的選中都不多時只重繪狀態改變的行, 否則重繪可見的行
+        """
+        select_id_lst = self.cdb.select_id_lst
+        if old_rows is None or len(select_id_lst) > self.rows_per_page:
+            self.card_model.refresh_rows(*self.card_lst.visible_rows())
+            return
+        for row in old_rows.symmetric_difference(select_id_lst.iter_pos()):
+            self.card_model.refresh_rows(row, row)
+
+    def scroll_to_now(self):
+        """捲動列表使 now_id 可見"""
+        if self.cdb is None or (now_idx := self.cdb.get_show_pos(self.cdb.now_id)) < 0:
+            return
+        self.card_lst.scrollTo(self.card_model.index(now_idx, 0))
+        self.update_page()
+
+    # 點擊時事件, row 為 show_id_lst 中的位置, direction 為上下鍵移動的方向
+    def on_row_clicked(self, row: int, direction: int = 1):
+        keys = self.cdb.show_id_lst
+        clicked_id = keys[row]
         modifiers = QApplication.keyboardModifiers()
+        select_id_lst = self.cdb.select_id_lst
+        old_rows = None
+        if len(select_id_lst) <= self.rows_per_page:
+            old_rows = set(select_id_lst.iter_pos())
         # ------------------ 處理 Shift 範圍選擇 ------------------
         if modifiers & Qt.KeyboardModifier.ShiftModifier:
             pre_id = self.cdb.now_id
-            keys = self.cdb.show_id_lst
-            if keys and pre_id != 0:
-                try:
-                    ind_st = keys.index(pre_id)
-                    ind_ed = keys.index(clicked_id)
-                except ValueError:  # 如果 ID 不在當前列表
-                    ind_st, ind_ed = -1, -1
-                if ind_st != -1:
-                    range_st = min(ind_st, ind_ed)
-                    range_ed = max(ind_st, ind_ed)
-                    self.cdb.select_id_lst.clear()
-                    for i in range(range_st, range_ed + 1):
-                        self.cdb.select_id_lst.add(keys[i])
+            # 如果 ID 不在當前列表則不動作
+            if pre_id != 0 and (ind_st := self.cdb.get_show_pos(pre_id)) != -1:
+                select_id_lst.clear()
+                select_id_lst.add_range(min(ind_st, row), max(ind_st, row))
         # ------------------ 處理 Ctrl 選擇 ------------------
         elif modifiers & Qt.KeyboardModifier.ControlModifier:
-            if clicked_id in self.cdb.select_id_lst:
-                if len(self.cdb.select_id_lst) > 1:
-                    self.cdb.select_id_lst.remove(clicked_id)
+            if select_id_lst.has_pos(row):
+                if len(select_id_lst) > 1:
+                    select_id_lst.discard(clicked_id)
             else:
-                self.cdb.select_id_lst.add(clicked_id)
+                select_id_lst.add_range(row, row)
         # ------------------ 單擊 ------------------
         else:
-            self.cdb.select_id_lst.clear()
-            self.cdb.select_id_lst.add(clicked_id)
+            select_id_lst.clear()
+            select_id_lst.add_range(row, row)
 
         self.cdb.now_id = clicked_id
-        self.refresh_view()
+        self.refresh_select(old_rows)
         self.refresh_edit.emit()
+        self.prefetcher.schedule(self.cdb, row, direction, self.card_lst.visible_rows())
 
     def _move_index(self, delta: int):
-        """根據目前 self.cdb.show_id_lst 的順序移動 now_ind 並觸發 on_item_clicked"""
+        """根據目前 self.cdb.show_id_lst 的順序移動 now_ind 並觸發 on_row_clicked"""
         if not (keys := self.cdb.show_id_lst):
             return
-        try:
-            cur_idx = keys.index(self.cdb.now_id)
-        except ValueError:  # 若沒有選擇，從 -1 開始
-            cur_idx = -1
-        new_idx = cur_idx + delta
+        # 若沒有選擇，從 -1 開始
+        new_idx = self.cdb.get_show_pos(self.cdb.now_id) + delta
         if new_idx < 0 or new_idx >= len(keys):
             return  # 超出範圍則不動作
-        new_page = (new_idx // self.rows_per_page) + 1
-        # 目標行在當前頁，直接觸發 on_item_clicked
-        if new_page == self.now_page:
-            cur_row = new_idx % self.rows_per_page
-        else:
-            self.now_page = new_page
-            self.refresh_view()
-            if delta == 1:
-                cur_row = 0
-            else:
-                cur_row = self.card_lst.rowCount() - 1
-
-        self.on_item_clicked(self.card_lst.item(cur_row, 0))
+        # 只在新的行不可見時才捲動
+        self.card_lst.scrollTo(self.card_model.index(new_idx, 0))
+        self.on_row_clicked(new_idx, delta)
         self.setFocus()
 
     # ---------------- 數據操作 ----------------
     # 清除所有過濾條件
     def clear_filter(self):
-        all_ids = sorted(self.cdb.card_dict.keys(), key=lambda k: int(k))
-        self.cdb.show_id_lst = all_ids
-        if self.cdb.now_id not in self.cdb.show_id_lst and self.cdb.show_id_lst:
+        self.search_timer.stop()
+        self.search_box.clear()
+        self.cdb.show_all()
+        if self.cdb.get_show_pos(self.cdb.now_id) == -1 and self.cdb.show_id_lst:
             self.cdb.now_id = self.cdb.show_id_lst[0]
-        try:
-            now_idx = self.cdb.show_id_lst.index(self.cdb.now_id)
-            self.current_page = (now_idx // self.rows_per_page) + 1
-        except ValueError:
-            self.current_page = 1
-        self.refresh_view()
+        self.reset_model()
+        self.scroll_to_now()
 
     # 搜索 id
     def search_id(self, id: str):
@@ -301,29 +406,75 @@ class CardListItem(QWidget):
         self.now_page = 1
         self.refresh_view()
 
-    # 搜索 name
-    def search_name(self, name: str):
-        self.cdb.search_name(name)
+    # 全文搜索 name, desc 與提示文字
+    def search_text(self, text: str):
+        self.cdb.search_text(text)
+        self.now_page = 1
+        self.refresh_view()
+
+    # 搜索框按下 Enter : 搜索並切換到第一張符合的卡
+    def _search_box_enter(self):
+        self.search_timer.stop()
+        if self.cdb is None:
+            return
+        text = self.search_box.text().strip()
+        if text.isdigit():
+            self.search_id(text)
+        else:
+            self.search_text(text)
+        self.refresh_edit.emit()
+
+    # 搜索框輸入中的即時搜索
+    def _search_box_live(self):
+        text = self.search_box.text().strip()
+        if text.isdigit():
+            self.live_search_id(text)
+        else:
+            self.live_search_text(text)
+
+    # 輸入中的即時搜索, 只更新列表, 不改變當前卡與選中的卡
+    def live_search_id(self, id: str):
+        if self.cdb is None:
+            return
+        self.cdb.search_id(id, keep_now=True)
+        self.now_page = 1
+        self.refresh_view()
+
+    def live_search_text(self, text: str):
+        if self.cdb is None:
+            return
+        self.cdb.search_text(text, keep_now=True)
+        self.now_page = 1
+        self.refresh_view()
+
+    # 按屬性篩選, filter_args 為 CDB.filter 的參數
+    def filter_cards(self, filter_args: dict):
+        self.cdb.filter(**filter_args)
         self.now_page = 1
         self.refresh_view()
 
     def set_data_source(self, cdb: CDB):
-        """設定卡片資料庫 (CDB) 並初始化卡片索引和過濾列表"""
+        """設定卡片資料庫 (CDB) 並捲動到當前的卡"""
+        # 之前的搜索文字屬於上一個 cdb
+        self.search_timer.stop()
+        self.search_box.clear()
         self.cdb = cdb
-        try:
-            now_idx = self.cdb.show_id_lst.index(self.cdb.now_id)
-            self.now_page = (now_idx // self.rows_per_page) + 1
-        except (ValueError, AttributeError):
-            self.now_page = 1
-        self.refresh_view()
+        self.card_model.set_cdb(cdb)
+        self.card_lst.doItemsLayout()
+        self.now_page = 1
+        self.show_page(1)
+        self.scroll_to_now()
+
+    # cdb 背景載入新的卡片時, 保留捲動位置與選中狀態
+    def on_cdb_loaded(self):
+        was_empty = self.card_model.rowCount() == 0
+        self.card_model.sync_rows()
+        self.update_page()
+        if was_empty:
+            self.refresh_edit.emit()
 
     # cdb 更新時校正
     def on_cdb_change(self):
-        try:
-            now_idx = self.cdb.show_id_lst.index(self.cdb.now_id)
-            self.current_page = (now_idx // self.rows_per_page) + 1
-        except ValueError:
-            self.current_page = 1
-
-        self.refresh_view()
+        self.reset_model()
+        self.scroll_to_now()
         self.refresh_edit.emit()
@@ -0,0 +1,96 @@
+import sqlite3
+from itertools import chain
+from PyQt6.QtCore import QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+from scripts.global_set.card_db import CDB, select_texts
+from scripts.data_edit.pic_loader import get_pic_loader
+
+# 當前卡前後各預先載入的卡片數量
+PREFETCH_NEAR: int = 8
+
+
+# 在背景執行緒中以獨立的連線讀取延遲載入的文本
+class _TextTask(QRunnable):
+    cdb: CDB
+    id_lst: list[int]
+    text_dict: dict[int, tuple]
+    prefetcher: "CardPrefetcher"
+
+    def __init__(self, cdb: CDB, id_lst: list[int], prefetcher: "CardPrefetcher"):
+        super().__init__()
+        self.cdb = cdb
+        self.id_lst = id_lst
+        self.text_dict = {}
+        self.prefetcher = prefetcher
+        # 由 CardPrefetcher 持有, 以便安全地從佇列中取回
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            conn = sqlite3.connect(self.cdb.path)
+            try:
+                self.text_dict = select_texts(conn, self.id_lst)
+            finally:
+                conn.close()
+        except Exception:
+            # 只是預先讀取, 失敗時等到顯示再由 get_card 讀取並回報錯誤
+            pass
+        self.prefetcher.texts_ready.emit(self)
+
+
+# 預先載入當前卡附近的卡圖與文本, 上下移動時切換到的卡通常已經準備好
+class CardPrefetcher(QObject):
+    near: int
+    pool: QThreadPool  # 讀取文本用, 單一低優先度的執行緒
+    _text_task: _TextTask | None = None
+    texts_ready = pyqtSignal(object)  # 背景執行緒 -> 主執行緒
+
+    def __init__(self, near: int = PREFETCH_NEAR, parent=None):
+        super().__init__(parent)
+        self.near = near
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.pool.setThreadPriority(QThread.Priority.LowPriority)
+        self.texts_ready.connect(self._on_texts_ready)
+
+    def schedule(self, cdb: CDB, pos: int, direction: int, page: tuple[int, int]):
+        """
+        取消之前的預先載入, 改為載入 show_id_lst 中 pos 前後各 near 張與 page 範圍內的卡\n
+        direction 為移動的方向, 該方向的卡優先; page 為目前頁面的 (第一行, 最後一行)
+        """
+        self.cancel()
+        id_lst = cdb.show_id_lst
+        step = -1 if direction < 0 else 1
+        ahead = range(pos + step, pos + step * (self.near + 1), step)
+        behind = range(pos - step, pos - step * (self.near + 1), -step)
+        page_rows = range(page[0], page[1] + 1)
+        ids = []
+        seen = {pos}
+        for p in chain(ahead, behind, page_rows):
+            if 0 <= p < len(id_lst) and p not in seen:
+                seen.add(p)
+                ids.append(id_lst[p])
+        if not ids:
+            return
+        # 越前面的卡優先度越高, 但都低於要顯示的卡圖
+        loader = get_pic_loader()
+        for i, id in enumerate(ids):
+            loader.prefetch(cdb.get_pic_path(id), -i, not cdb.read_only)
+        if text_ids := cdb.unloaded_text_ids(ids):
+            self._text_task = _TextTask(cdb, text_ids, self)
+            self.pool.start(self._text_task)
+
+    def cancel(self):
+        """取消還在佇列中的預先載入, 換頁或更換 cdb 時調用"""
+        get_pic_loader().cancel_prefetch()
+        if self._text_task is not None and self.pool.tryTake(self._text_task):
+            self._text_task = None
+
+    def wait(self):
+        """等待背景讀取結束, 關閉程式前調用"""
+        self.cancel()
+        self.pool.waitForDone()
+
+    def _on_texts_ready(self, task: _TextTask):
+        if self._text_task is task:
+            self._text_task = None
+        task.cdb.put_prefetched_texts(task.text_dict)
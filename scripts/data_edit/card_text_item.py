@@ -41,7 +41,7 @@ class CardTextItem(QWidget):
         frame.addWidget(self.gene_desc)
 
     # ---------------- 內部事件 ----------------
-    # 搜索 name 開頭的卡
+    # 全文搜索包含 name 的卡
     def _send_find_request(self):
         name = self.name.text()
         self.find_name.emit(name)
@@ -2,24 +2,37 @@ import os
 import subprocess
 import platform
 import shutil
-from PyQt6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QFileDialog
+from PyQt6.QtWidgets import (
+    QWidget,
+    QHBoxLayout,
+    QVBoxLayout,
+    QFileDialog,
+    QDialog,
+    QPushButton,
+)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QKeySequence, QShortcut
 from scripts.global_set.app_set import TYPE_MONS, TYPE_AREA
-from scripts.global_set.card_db import CDB, Card
+from scripts.global_set.card_db import CDB, Card, CONFLICT_ASK
+from scripts.global_set.card_db_ro import READ_ONLY_MSG
 from scripts.global_set.config_set import get_config
 from scripts.basic_item.ui_item import new_frame, new_btn
 import scripts.basic_item.msg_item as show
 from scripts.data_edit.card_list_item import CardListItem
 from scripts.data_edit.card_data_item import CardDataItem
 from scripts.data_edit.card_text_item import CardTextItem
+from scripts.data_edit.filter_item import FilterDialog
+from scripts.data_edit.pic_loader import remove_thumbs
+from scripts.data_edit.pic_import import PicImportDialog
 
 
 class DataEditFrom(QWidget):
     card_list: CardListItem
     card_data: CardDataItem
     card_text: CardTextItem
+    filter_dialog: FilterDialog
     copy_card: dict[int, Card]
+    edit_btns: list[QPushButton]  # 唯讀的 cdb 會停用這些按鈕
     update_past_txt = pyqtSignal(int)
 
     def __init__(self):
@@ -37,6 +50,7 @@ class DataEditFrom(QWidget):
         btn_frame: QHBoxLayout = new_frame("H", mid_frame)
         btn_frame.addStretch()
         new_btn("重置列表", btn_frame, self.card_list.clear_filter)
+        new_btn("筛选", btn_frame, self.filter_cards)
         new_btn("脚本", btn_frame, self.open_script)
         new_btn("重置资料", btn_frame, self.clear_edit)
         btn_frame.addStretch()
@@ -49,17 +63,25 @@ class DataEditFrom(QWidget):
         # 添加 & 修改 & 删除 按鈕
         btn_frame: QHBoxLayout = new_frame("H", right_frame)
         btn_frame.addStretch()
-        new_btn("添加", btn_frame, self.add_card)
-        new_btn("保存 (Ctrl + S)", btn_frame, self.save_card)
-        new_btn(
-            "删除",
-            btn_frame,
-            self.delete_card,
-            "background-color: #d9534f; color: black;",
-        )
+        self.edit_btns = [
+            new_btn("添加", btn_frame, self.add_card),
+            new_btn("保存 (Ctrl + S)", btn_frame, self.save_card),
+            new_btn(
+                "删除",
+                btn_frame,
+                self.delete_card,
+                "background-color: #d9534f; color: black;",
+            ),
+        ]
         shortcut = QShortcut(QKeySequence("Ctrl+S"), self)
         shortcut.activated.connect(self.save_card)
+        shortcut = QShortcut(QKeySequence("Ctrl+Z"), self)
+        shortcut.activated.connect(self.undo)
+        shortcut = QShortcut(QKeySequence("Ctrl+Y"), self)
+        shortcut.activated.connect(self.redo)
         btn_frame.addStretch()
+        # 篩選條件視窗 (保留上次的條件)
+        self.filter_dialog = FilterDialog(self)
         # ---------------- 信號接收 ----------------
         self.card_list.refresh_edit.connect(self.refresh_edit)
         self.card_data.code.find_id.connect(self.find_id)
@@ -73,9 +95,9 @@ class DataEditFrom(QWidget):
         self.card_list.search_id(id)
         self.refresh_edit()
 
-    # 搜索 name 開頭的卡
+    # 全文搜索包含 name 的卡
     def find_name(self, name: str):
-        self.card_list.search_name(name)
+        self.card_list.search_text(name)
         self.refresh_edit()
 
     # 隱藏不合法項
@@ -94,7 +116,7 @@ class DataEditFrom(QWidget):
     # 點擊 pic 時導入卡圖
     def set_pic(self):
         cdb, card = self._get_cdb_and_card()
-        if not (cdb and card):
+        if not (cdb and card) or not self._check_writable(cdb):
             return
         file_path, _ = QFileDialog.getOpenFileName(
             None, "选择卡图", "", "Images (*.jpg);;All Files (*)"
@@ -108,8 +130,9 @@ class DataEditFrom(QWidget):
             show.error(f"無法建立資料夾 : {pic_dir}\n{e}")
             return
 
-        pic_path = os.path.join(pic_dir, f"c{int(card.id)}.jpg")
+        pic_path = cdb.get_pic_path(card.id)
         shutil.copyfile(file_path, pic_path)
+        remove_thumbs(pic_path)
         self.card_text.pic.set_path(pic_path)
 
     # ---------------- 按鈕事件 ----------------
@@ -145,6 +168,15 @@ class DataEditFrom(QWidget):
         except Exception as e:
             show.error(f"無法打開檔案 : {script_path}\n{e}")
 
+    # 按屬性篩選卡片
+    def filter_cards(self):
+        if self.card_list.cdb is None:
+            return
+        if self.filter_dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        self.card_list.filter_cards(self.filter_dialog.get_filter())
+        self.refresh_edit()
+
     # 編輯區 資料清除
     def clear_edit(self):
         self.card_data.clear()
@@ -157,8 +189,9 @@ class DataEditFrom(QWidget):
             return
         self.card_data.load_card(card)
         self.card_text.load_card(card)
-        pic_path = os.path.join(cdb.get_pic_dir(), f"c{card.id}.jpg")
-        self.card_text.pic.set_path(pic_path)
+        pic_path = cdb.get_pic_path(card.id)
+        # 唯讀開啟的參考資料庫不在其卡圖資料夾寫入縮圖
+        self.card_text.pic.set_path(pic_path, not cdb.read_only)
 
     # 添加卡片
     def add_card(self):
@@ -167,7 +200,11 @@ class DataEditFrom(QWidget):
             show.error("ID 格式錯誤")
             return
         cdb, _ = self._get_cdb_and_card()
-        if cdb and cdb.add_card(self._pack_edit_to_card(id, alias)):
+        if (
+            cdb
+            and self._check_writable(cdb)
+            and cdb.add_card(self._pack_edit_to_card(id, alias))
+        ):
             self.card_list.on_cdb_change()
 
     # 保存卡片
@@ -176,6 +213,8 @@ class DataEditFrom(QWidget):
         if not card:
             show.error("当前没有可编辑的卡片, 请使用 添加")
             return
+        if not self._check_writable(cdb):
+            return
         id, alias = self.card_data.get_code()
         if id == 0:
             show.error("ID 格式錯誤")
@@ -198,6 +237,33 @@ class DataEditFrom(QWidget):
             self.card_list.set_data_source(cdb)
             self.refresh_edit()
 
+    # 批量導入卡圖
+    def import_pics(self):
+        if (cdb := self.card_list.cdb) is None or not self._check_writable(cdb):
+            return
+        PicImportDialog(cdb, self).exec()
+        self.refresh_edit()
+
+    # 撤銷上一次的修改
+    def undo(self):
+        if (cdb := self.card_list.cdb) is None:
+            return
+        if not cdb.undo():
+            show.msg("没有可撤销的操作")
+            return
+        self.card_list.set_data_source(cdb)
+        self.refresh_edit()
+
+    # 重做上一次撤銷的修改
+    def redo(self):
+        if (cdb := self.card_list.cdb) is None:
+            return
+        if not cdb.redo():
+            show.msg("没有可重做的操作")
+            return
+        self.card_list.set_data_source(cdb)
+        self.refresh_edit()
+
     # ---------------- 內部函數 ----------------
     # 將當前編輯器內容打包成 Card 並返回
     def _pack_edit_to_card(self, id: int, alias: int) -> Card:
@@ -216,14 +282,19 @@ class DataEditFrom(QWidget):
             return
         self.copy_card = {}
         copy_ct = 0
-        for id in id_list:
-            if id in cdb.card_dict:
-                card = cdb.card_dict[id]
-                self.copy_card[id] = card
-                copy_ct += 1
+        for card in cdb.get_cards(id_list):
+            self.copy_card[card.id] = card
+            copy_ct += 1
         show.msg(f"已复制 {copy_ct} 张卡片")
         self.update_past_txt.emit(copy_ct)
 
+    # 唯讀的 cdb 顯示錯誤並返回 False
+    def _check_writable(self, cdb: CDB) -> bool:
+        if cdb.read_only:
+            show.error(READ_ONLY_MSG)
+            return False
+        return True
+
     # 獲取 cdb 與 now card
     def _get_cdb_and_card(self) -> tuple[CDB | None, Card | None]:
         cdb = self.card_list.cdb
@@ -233,9 +304,16 @@ class DataEditFrom(QWidget):
     # ---------------- 調用事件 ----------------
     # 設定 cdb
     def set_cdb(self, cdb: CDB):
+        for btn in self.edit_btns:
+            btn.setEnabled(not cdb.read_only)
         self.card_list.set_data_source(cdb)
         self.refresh_edit()
 
+    # cdb 背景載入了新的卡片
+    def on_cdb_loaded(self, cdb: CDB):
+        if self.card_list.cdb is cdb:
+            self.card_list.on_cdb_loaded()
+
     # 复制选中卡片
     def copy_select_card(self):
         if (cdb := self.card_list.cdb) is None:
@@ -246,8 +324,7 @@ class DataEditFrom(QWidget):
     def copy_all_card(self):
         if (cdb := self.card_list.cdb) is None:
             return
-        id_list = sorted(cdb.card_dict.keys(), key=lambda k: int(k))
-        self._copy_id_list(cdb, id_list)
+        self._copy_id_list(cdb, cdb.id_index)
 
     # 粘贴卡片
     def paste_cards(self):
@@ -255,22 +332,9 @@ class DataEditFrom(QWidget):
             return
         if (cdb := self.card_list.cdb) is None:
             return
-        paste_ct = 0
-        last_id = None
-        for card in self.copy_card.values():
-            id = card.id
-            try:
-                if cdb.has_id(id):
-                    if not show.quest(f"ID {id} 已存在, 是否覆蓋"):
-                        continue
-                cdb.add_card(card)
-                last_id = id
-                paste_ct += 1
-            except Exception:
-                continue
+        # 一次加入所有卡片, 已存在的 id 只詢問一次
+        paste_ct = len(cdb.add_cards(list(self.copy_card.values()), CONFLICT_ASK))
         if paste_ct > 0:
-            if last_id:
-                cdb.now_id = last_id
             self.card_list.set_data_source(cdb)
             self.refresh_edit()
             show.msg(f"已贴上 {paste_ct} 张卡片")
@@ -0,0 +1,146 @@
+from PyQt6.QtWidgets import (
+    QLabel,
+    QWidget,
+    QDialog,
+    QComboBox,
+    QHBoxLayout,
+    QVBoxLayout,
+)
+from PyQt6.QtCore import Qt
+from scripts.global_set.card_data_set import get_card_data
+from scripts.global_set.app_set import DICT_VAL_TO_TYP, TYPE_SUB
+from scripts.basic_item.ui_item import new_frame, new_title, new_btn
+from scripts.data_edit.move_item import MoveItem
+
+ANY_TEXT: str = "不限"
+
+
+# 帶標題的下拉框, 第一項為 "不限" (data 為 None)
+def _new_filter_combobox(
+    title: str, data_show_dict: dict[str, str], frame: QVBoxLayout
+) -> QComboBox:
+    row_frame: QHBoxLayout = new_frame("H", frame)
+    lab = QLabel(title)
+    lab.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+    row_frame.addWidget(lab)
+    combobox = QComboBox()
+    _set_filter_combobox(combobox, data_show_dict)
+    row_frame.addWidget(combobox)
+    row_frame.setStretch(1, 1)
+    return combobox
+
+
+def _set_filter_combobox(combobox: QComboBox, data_show_dict: dict[str, str]):
+    combobox.clear()
+    combobox.addItem(ANY_TEXT, None)
+    for data, show in data_show_dict.items():
+        combobox.addItem(show, data)
+
+
+# 獲取下拉框的整數值, "不限" 返回 None
+def _get_combobox_int(combobox: QComboBox) -> int | None:
+    data = combobox.currentData()
+    return None if data is None else int(data, 0)
+
+
+# 卡片屬性篩選視窗
+class FilterDialog(QDialog):
+    main_typ: QComboBox
+    sub_typ: QComboBox
+    setcode: QComboBox
+    atk_min: QComboBox
+    atk_max: QComboBox
+    race: QComboBox
+    from_: QComboBox
+    moveset: MoveItem
+    _sub_data: dict[str, dict[str, str]]
+
+    def __init__(self, parent: QWidget | None = None):
+        super().__init__(parent)
+        self.setWindowTitle("筛选卡片")
+        card_data = get_card_data()
+        main_frame: QVBoxLayout = new_frame("V", self, None, False)
+        # 卡片类型
+        new_title("卡片类型", main_frame)
+        _, typ_mapping = card_data.get_typ_data()
+        typ_to_val = {typ: val for val, typ in DICT_VAL_TO_TYP.items()}
+        main_show_dict = {}
+        self._sub_data = {}
+        for typ_str, typ_dict in typ_mapping.items():
+            main_data = hex(typ_to_val[typ_str])
+            main_show_dict[main_data] = typ_dict.get("display", typ_str)
+            self._sub_data[main_data] = typ_dict.get("options", {})
+        self.main_typ = _new_filter_combobox("主类型", main_show_dict, main_frame)
+        self.sub_typ = _new_filter_combobox("子类型", {}, main_frame)
+        self.main_typ.currentIndexChanged.connect(self._main_typ_change)
+        # 卡片字段
+        new_title("卡片字段", main_frame)
+        _, setcode_list = card_data.get_setcode_data()
+        setcode_show_dict = {value: name for name, value in setcode_list}
+        setcode_show_dict.pop("-1", None)  # 自定义 無法作為篩選條件
+        self.setcode = _new_filter_combobox("字段", setcode_show_dict, main_frame)
+        # 卡片细节
+        new_title("卡片细节", main_frame)
+        atk_title, atk_mapping, _ = card_data.get_combobox_data("atk")
+        self.atk_min = _new_filter_combobox(f"{atk_title} ≥", atk_mapping, main_frame)
+        self.atk_max = _new_filter_combobox(f"{atk_title} ≤", atk_mapping, main_frame)
+        race_title, race_mapping, _ = card_data.get_combobox_data("race")
+        self.race = _new_filter_combobox(race_title, race_mapping, main_frame)
+        from_title, from_mapping, _ = card_data.get_combobox_data("from")
+        self.from_ = _new_filter_combobox(from_title, from_mapping, main_frame)
+        # 移動箭頭 (需包含所有勾選的方向)
+        self.moveset = MoveItem(main_frame)
+        # 按鈕
+        btn_frame: QHBoxLayout = new_frame("H", main_frame)
+        btn_frame.addStretch()
+        new_btn("筛选", btn_frame, self.accept)
+        new_btn("清空条件", btn_frame, self.clear)
+        new_btn("取消", btn_frame, self.reject)
+        btn_frame.addStretch()
+
+    # ---------------- 內部事件 ----------------
+    def _main_typ_change(self):
+        main_data = self.main_typ.currentData()
+        _set_filter_combobox(self.sub_typ, self._sub_data.get(main_data, {}))
+
+    # ---------------- 調用事件 ----------------
+    def clear(self):
+        for combobox in (
+            self.main_typ,
+            self.setcode,
+            self.atk_min,
+            self.atk_max,
+            self.race,
+            self.from_,
+        ):
+            combobox.setCurrentIndex(0)
+        self.moveset.clear()
+
+    def get_filter(self) -> dict[str, int | tuple[int, int] | None]:
+        """返回 CDB.filter 的參數"""
+        type_mask = _get_combobox_int(self.sub_typ)
+        sub_mask = None
+        if type_mask is None:
+            type_mask = _get_combobox_int(self.main_typ)
+        else:
+            # 選中子類型時只符合該子類型, 例如 "通常" 不含速攻, 永续等
+            sub_mask = 0
+            for data in self._sub_data.get(self.main_typ.currentData(), {}):
+                sub_mask |= int(data, 0) & TYPE_SUB
+        atk_min = _get_combobox_int(self.atk_min)
+        atk_max = _get_combobox_int(self.atk_max)
+        atk_range = None
+        if atk_min is not None or atk_max is not None:
+            atk_range = (
+                atk_min if atk_min is not None else -(1 << 63),
+                atk_max if atk_max is not None else (1 << 63) - 1,
+            )
+        return {
+            "type_mask": type_mask,
+            "atk_range": atk_range,
+            "setcode": _get_combobox_int(self.setcode),
+            "race": _get_combobox_int(self.race),
+            "from_": _get_combobox_int(self.from_),
+            "move_mask": self.moveset.get_move() or None,
+            "sub_mask": sub_mask,
+        }
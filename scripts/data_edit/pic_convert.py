@@ -0,0 +1,51 @@
+import os
+from PyQt6.QtGui import QImage, QImageReader, QPainter, QColor
+from PyQt6.QtCore import QSize, Qt
+from scripts.data_edit.pic_loader import remove_thumbs
+
+# 在子程序中執行, 只使用 QtGui 的圖片處理, 不需要 QApplication
+
+
+def convert_pic(src: str, dst: str, width: int, height: int, quality: int) -> str:
+    """
+    將 src 縮放到 width x height 以內 (保持比例, 不放大), 重新編碼為 jpg 寫入 dst\n
+    成功回傳空字串, 失敗回傳錯誤訊息
+    """
+    reader = QImageReader(src)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and (size.width() > width or size.height() > height):
+        # 直接解碼為縮小後的大小, jpg 可省去大部分的解碼成本
+        reader.setScaledSize(
+            size.scaled(QSize(width, height), Qt.AspectRatioMode.KeepAspectRatio)
+        )
+    image = reader.read()
+    if image.isNull():
+        return reader.errorString() or "无法读取图片"
+    if image.width() > width or image.height() > height:
+        image = image.scaled(
+            width,
+            height,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+    if image.hasAlphaChannel():
+        # jpg 沒有透明度, 透明的部分以白色填滿
+        flat = QImage(image.size(), QImage.Format.Format_RGB32)
+        flat.fill(QColor(255, 255, 255))
+        painter = QPainter(flat)
+        painter.drawImage(0, 0, image)
+        painter.end()
+        image = flat
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        if not image.save(tmp, "JPG", quality):
+            return "无法写入图片"
+        os.replace(tmp, dst)
+    except OSError as e:
+        return str(e)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    remove_thumbs(dst)
+    return ""
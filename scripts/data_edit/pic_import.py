@@ -0,0 +1,320 @@
+import os
+import re
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PyQt6.QtWidgets import (
+    QLabel,
+    QWidget,
+    QDialog,
+    QLineEdit,
+    QSpinBox,
+    QCheckBox,
+    QHBoxLayout,
+    QVBoxLayout,
+    QFileDialog,
+    QProgressBar,
+    QPlainTextEdit,
+    QPushButton,
+)
+from PyQt6.QtCore import QThread, pyqtSignal
+from scripts.global_set.card_db import CDB
+from scripts.basic_item.ui_item import new_frame, new_title, new_btn
+import scripts.basic_item.msg_item as show
+from scripts.data_edit.pic_convert import convert_pic
+
+# 可導入的圖片格式
+PIC_IMPORT_EXTS: tuple[str, ...] = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+# 預設從檔名取出卡片 id 的正則, 第一個群組為 id
+PIC_IMPORT_PATTERN: str = r"(\d+)"
+PIC_IMPORT_WIDTH: int = 400
+PIC_IMPORT_HEIGHT: int = 570
+PIC_IMPORT_QUALITY: int = 90
+# 報告中列出的失敗檔案數量上限
+REPORT_FAIL_COUNT: int = 20
+
+
+def plan_import(
+    folder: str,
+    pattern: re.Pattern,
+    cdb: CDB,
+    only_existing: bool,
+    overwrite: bool,
+) -> tuple[list[tuple[str, str]], dict[str, list[str]]]:
+    """
+    依檔名將 folder 中的圖片對應到卡片 id\n
+    回傳 ([(來源路徑, 目標路徑)], {跳過的原因: [檔名]})
+    """
+    tasks = []
+    skipped: dict[str, list[str]] = {
+        "文件名不匹配": [],
+        "CDB 中不存在": [],
+        "ID 重复": [],
+        "卡图已存在": [],
+    }
+    seen = set()
+    for name in sorted(os.listdir(folder)):
+        src = os.path.join(folder, name)
+        if not (name.lower().endswith(PIC_IMPORT_EXTS) and os.path.isfile(src)):
+            continue
+        match = pattern.search(os.path.splitext(name)[0])
+        try:
+            id = int(match.group(1) if match.groups() else match.group(0))
+        # 沒有匹配時 match 為 None, 可選的群組沒有匹配時 group(1) 為 None
+        except (AttributeError, TypeError, ValueError):
+            skipped["文件名不匹配"].append(name)
+            continue
+        if only_existing and not cdb.has_id(id):
+            skipped["CDB 中不存在"].append(name)
+            continue
+        if id in seen:
+            skipped["ID 重复"].append(name)
+            continue
+        seen.add(id)
+        dst = cdb.get_pic_path(id)
+        if not overwrite and os.path.exists(dst):
+            skipped["卡图已存在"].append(name)
+            continue
+        tasks.append((src, dst))
+    return tasks, skipped
+
+
+# 在背景執行緒中掃描資料夾並管理程序池, 每張圖片在子程序中縮放並重新編碼
+# 導入視窗為模態, 執行期間 cdb 不會被修改
+class PicImportJob(QThread):
+    folder: str
+    pattern: re.Pattern
+    cdb: CDB
+    only_existing: bool
+    overwrite: bool
+    width: int
+    height: int
+    quality: int
+    tasks: list[tuple[str, str]]  # 掃描後才有內容
+    skipped: dict[str, list[str]]
+    error: str | None  # 無法讀取資料夾時的錯誤訊息
+    failed: list[tuple[str, str]]  # (來源路徑, 錯誤訊息)
+    done_ct: int
+    planned = pyqtSignal(int)  # 掃描完成, 參數為要導入的數量
+    progress = pyqtSignal(int, int)  # 已完成數量, 總數量
+
+    def __init__(
+        self,
+        folder: str,
+        pattern: re.Pattern,
+        cdb: CDB,
+        only_existing: bool,
+        overwrite: bool,
+        width: int,
+        height: int,
+        quality: int,
+        parent: QWidget | None = None,
+    ):
+        super().__init__(parent)
+        self.folder = folder
+        self.pattern = pattern
+        self.cdb = cdb
+        self.only_existing = only_existing
+        self.overwrite = overwrite
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.tasks = []
+        self.skipped = {}
+        self.error = None
+        self.failed = []
+        self.done_ct = 0
+
+    def run(self):
+        try:
+            self.tasks, self.skipped = plan_import(
+                self.folder,
+                self.pattern,
+                self.cdb,
+                self.only_existing,
+                self.overwrite,
+            )
+        except OSError as e:
+            self.error = str(e)
+            return
+        self.planned.emit(total := len(self.tasks))
+        if not total or self.isInterruptionRequested():
+            return
+        # Qt 已載入的程序不適合 fork, 子程序以 spawn 建立
+        ctx = multiprocessing.get_context("spawn")
+        workers = max(1, min(os.cpu_count() or 1, total))
+        with ProcessPoolExecutor(workers, mp_context=ctx) as executor:
+            futures = {
+                executor.submit(
+                    convert_pic, src, dst, self.width, self.height, self.quality
+                ): src
+                for src, dst in self.tasks
+            }
+            for future in as_completed(futures):
+                if self.isInterruptionRequested():
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    return
+                try:
+                    err = future.result()
+                except Exception as e:
+                    err = str(e)
+                if err:
+                    self.failed.append((futures[future], err))
+                self.done_ct += 1
+                self.progress.emit(self.done_ct, total)
+
+
+# 批量導入卡圖視窗
+class PicImportDialog(QDialog):
+    cdb: CDB
+    folder: QLineEdit
+    pattern: QLineEdit
+    width_box: QSpinBox
+    height_box: QSpinBox
+    quality_box: QSpinBox
+    only_existing: QCheckBox
+    overwrite: QCheckBox
+    progress_bar: QProgressBar
+    report: QPlainTextEdit
+    start_btn: QPushButton
+    job: PicImportJob | None = None
+    _start_time: float = 0
+
+    def __init__(self, cdb: CDB, parent: QWidget | None = None):
+        super().__init__(parent)
+        self.cdb = cdb
+        self.setWindowTitle("批量导入卡图")
+        self.setMinimumWidth(480)
+        main_frame: QVBoxLayout = new_frame("V", self, None, False)
+        # 來源
+        new_title("来源", main_frame)
+        row_frame: QHBoxLayout = new_frame("H", main_frame)
+        self.folder = QLineEdit()
+        self.folder.setPlaceholderText("图片文件夹")
+        row_frame.addWidget(self.folder)
+        new_btn("浏览", row_frame, self._browse)
+        row_frame: QHBoxLayout = new_frame("H", main_frame)
+        row_frame.addWidget(QLabel("文件名规则 (正则, 第一个分组为 ID)"))
+        self.pattern = QLineEdit(PIC_IMPORT_PATTERN)
+        row_frame.addWidget(self.pattern)
+        self.only_existing = QCheckBox("只导入 CDB 中存在的卡片")
+        self.only_existing.setChecked(True)
+        main_frame.addWidget(self.only_existing)
+        self.overwrite = QCheckBox("覆盖已有的卡图")
+        main_frame.addWidget(self.overwrite)
+        # 輸出
+        new_title("输出", main_frame)
+        row_frame: QHBoxLayout = new_frame("H", main_frame)
+        self.width_box = _new_spinbox("宽", PIC_IMPORT_WIDTH, 16, 4096, row_frame)
+        self.height_box = _new_spinbox("高", PIC_IMPORT_HEIGHT, 16, 4096, row_frame)
+        self.quality_box = _new_spinbox("品质", PIC_IMPORT_QUALITY, 1, 100, row_frame)
+        # 進度與報告
+        self.progress_bar = QProgressBar()
+        main_frame.addWidget(self.progress_bar)
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        main_frame.addWidget(self.report)
+        # 按鈕
+        btn_frame: QHBoxLayout = new_frame("H", main_frame)
+        btn_frame.addStretch()
+        self.start_btn = new_btn("开始导入", btn_frame, self.start)
+        new_btn("关闭", btn_frame, self.reject)
+        btn_frame.addStretch()
+
+    # ---------------- 內部事件 ----------------
+    def _browse(self):
+        folder = QFileDialog.getExistingDirectory(self, "选择图片文件夹")
+        if folder:
+            self.folder.setText(folder)
+
+    def _on_planned(self, total: int):
+        self.report.setPlainText(f"导入中 : {total} 张卡图")
+        self._on_progress(0, total)
+
+    def _on_progress(self, done: int, total: int):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+
+    def _on_finished(self):
+        if (job := self.job) is None:
+            return
+        self.job = None
+        self.start_btn.setEnabled(True)
+        if job.error is not None:
+            self.progress_bar.setMaximum(1)
+            self.report.clear()
+            show.error(f"無法讀取文件夹 : {job.folder}\n{job.error}", self)
+            return
+        lines = [f"导入完成 : {job.done_ct - len(job.failed)} / {len(job.tasks)}"]
+        if job.done_ct < len(job.tasks):
+            lines[0] += " (已取消)"
+        for reason, names in job.skipped.items():
+            if names:
+                lines.append(f"跳过 ({reason}) : {len(names)}")
+        if job.failed:
+            lines.append(f"失败 : {len(job.failed)}")
+            for src, err in job.failed[:REPORT_FAIL_COUNT]:
+                lines.append(f"  {os.path.basename(src)} : {err}")
+            if len(job.failed) > REPORT_FAIL_COUNT:
+                lines.append("  ...")
+        lines.append(f"耗时 : {time.perf_counter() - self._start_time:.1f} 秒")
+        self.report.setPlainText("\n".join(lines))
+
+    # ---------------- 調用事件 ----------------
+    def start(self):
+        """掃描資料夾並開始在程序池中導入"""
+        if self.job is not None:
+            return
+        folder = self.folder.text()
+        if not os.path.isdir(folder):
+            show.error(f"文件夹不存在\n{folder}", self)
+            return
+        try:
+            pattern = re.compile(self.pattern.text())
+        except re.error as e:
+            show.error(f"文件名规则错误\n{e}", self)
+            return
+        try:
+            os.makedirs(self.cdb.get_pic_dir(), exist_ok=True)
+        except OSError as e:
+            show.error(f"无法创建卡图文件夹 : {self.cdb.get_pic_dir()}\n{e}", self)
+            return
+        self._start_time = time.perf_counter()
+        # 大量檔案時掃描也需要時間, 一併在背景執行緒中進行
+        self.job = PicImportJob(
+            folder,
+            pattern,
+            self.cdb,
+            self.only_existing.isChecked(),
+            self.overwrite.isChecked(),
+            self.width_box.value(),
+            self.height_box.value(),
+            self.quality_box.value(),
+            self,
+        )
+        self.job.planned.connect(self._on_planned)
+        self.job.progress.connect(self._on_progress)
+        self.job.finished.connect(self._on_finished)
+        self.start_btn.setEnabled(False)
+        self.report.setPlainText("扫描文件夹中...")
+        self.progress_bar.setRange(0, 0)  # 掃描期間顯示忙碌
+        self.job.start()
+
+    def reject(self):
+        """關閉視窗時取消尚未開始的圖片, 並等待正在處理的完成"""
+        if self.job is not None:
+            self.job.requestInterruption()
+            self.job.wait()
+            self._on_finished()
+        super().reject()
+
+
+def _new_spinbox(
+    title: str, value: int, min_val: int, max_val: int, frame: QHBoxLayout
+) -> QSpinBox:
+    frame.addWidget(QLabel(title))
+    spinbox = QSpinBox()
+    spinbox.setRange(min_val, max_val)
+    spinbox.setValue(value)
+    frame.addWidget(spinbox)
+    return spinbox
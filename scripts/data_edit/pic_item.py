@@ -6,8 +6,9 @@ from scripts.global_set.app_set import (
     SCALED_WIDTH,
     SCALED_HEIGHT,
     PATH_COVER,
-    COVER_CODE,
+    get_cover_code,
 )
+from scripts.data_edit.pic_loader import get_pic_loader
 
 
 # 根據路徑加載 QPixmap
@@ -31,7 +32,7 @@ def _get_default_cover() -> QPixmap | None:
     if (pixmap := _new_pix_map(PATH_COVER)) is not None:
         return pixmap
     pixmap = QPixmap()
-    if pixmap.loadFromData(COVER_CODE, "PNG"):
+    if pixmap.loadFromData(get_cover_code()):
         return pixmap.scaled(
             SCALED_WIDTH,
             SCALED_HEIGHT,
@@ -45,14 +46,18 @@ def _get_default_cover() -> QPixmap | None:
 class PicItem(QLabel):
     set_pic = pyqtSignal()
     default_cover: QPixmap | None
+    path: str  # 目前顯示的卡圖路徑
+    write_thumb: bool = True
 
     def __init__(self, frame: QLayout):
         super().__init__()
+        self.path = ""
         self.setFixedSize(SCALED_WIDTH, SCALED_HEIGHT)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.default_cover = _get_default_cover()
         self.setPixmap(self.default_cover)
+        get_pic_loader().pic_ready.connect(self._on_pic_ready)
 
         frame.addWidget(self)
 
@@ -65,8 +70,21 @@ class PicItem(QLabel):
     def clear(self):
         self.set_path("")
 
-    def set_path(self, path: str):
-        if (pixmap := _new_pix_map(path)) is not None:
+    def set_path(self, path: str, write_thumb: bool = True):
+        """
+        顯示 path 的卡圖, 未快取時先顯示預設封面, 背景解碼完成後再更新\n
+        write_thumb 為 False 時不在卡圖資料夾寫入縮圖
+        """
+        self.path = path
+        self.write_thumb = write_thumb
+        if (pixmap := get_pic_loader().request(path, write_thumb)) is not None:
             self.setPixmap(pixmap)
             return
         self.setPixmap(self.default_cover)
+
+    # ---------- 內部事件 ----------
+    def _on_pic_ready(self, path: str):
+        if path != self.path:
+            return
+        if (pixmap := get_pic_loader().request(path, self.write_thumb)) is not None:
+            self.setPixmap(pixmap)
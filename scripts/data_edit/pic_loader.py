@@ -0,0 +1,231 @@
+import os
+import threading
+from collections import OrderedDict
+from PyQt6.QtGui import QPixmap, QImage, QImageReader
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+from scripts.global_set.app_set import SCALED_WIDTH, SCALED_HEIGHT
+
+# 卡圖快取的記憶體上限 (縮放後約 230 KB 一張)
+PIC_CACHE_BYTES: int = 64 * 1024 * 1024
+# 解碼卡圖的執行緒數量上限
+PIC_THREAD_MAX: int = 4
+# 執行緒池的優先度 : 要顯示的卡圖優先於預先載入的卡圖 (預先載入為 0 以下)
+PRIORITY_SHOW: int = 1
+
+# 卡圖的快取鍵 : (路徑, 修改時間, 檔案大小), 檔案被替換後自然失效
+PicKey = tuple[str, int, int]
+# 縮圖存放在卡圖資料夾中的子資料夾, 檔名為 <卡圖檔名>.<大小>_<修改時間>.jpg
+THUMB_DIR: str = ".thumbs"
+THUMB_QUALITY: int = 90
+
+_PIC_LOADER: "PicLoader | None" = None
+
+
+def pic_key(path: str) -> PicKey | None:
+    """回傳 path 的快取鍵, 不是存在的 .jpg 檔案回傳 None"""
+    if not path.lower().endswith(".jpg"):
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def read_scaled_image(path: str) -> QImage:
+    """
+    以 QImageReader 直接解碼為縮放後的大小, 不會解碼完整解析度的圖片\n
+    失敗時回傳 null 的 QImage
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid():
+        reader.setScaledSize(
+            size.scaled(
+                QSize(SCALED_WIDTH, SCALED_HEIGHT), Qt.AspectRatioMode.KeepAspectRatio
+            )
+        )
+    image = reader.read()
+    if not image.isNull() and not size.isValid():
+        # 無法預先取得大小的格式, 讀取後再縮放
+        image = image.scaled(
+            SCALED_WIDTH,
+            SCALED_HEIGHT,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation,
+        )
+    return image
+
+
+def thumb_path(key: PicKey) -> str:
+    """回傳卡圖對應的縮圖路徑, 卡圖的大小或修改時間改變後路徑也會改變"""
+    path, mtime, size = key
+    pic_dir, name = os.path.split(path)
+    stem = os.path.splitext(name)[0]
+    return os.path.join(pic_dir, THUMB_DIR, f"{stem}.{size}_{mtime}.jpg")
+
+
+def remove_thumbs(path: str, keep: str = ""):
+    """刪除卡圖 path 的所有縮圖 (keep 除外), 替換卡圖後調用"""
+    pic_dir, name = os.path.split(path)
+    prefix = os.path.splitext(name)[0] + "."
+    thumb_dir = os.path.join(pic_dir, THUMB_DIR)
+    try:
+        names = os.listdir(thumb_dir)
+    except OSError:
+        return
+    for thumb in names:
+        if (
+            thumb.startswith(prefix)
+            and (thumb_file := os.path.join(thumb_dir, thumb)) != keep
+        ):
+            try:
+                os.remove(thumb_file)
+            except OSError:
+                pass
+
+
+def load_thumbnail(key: PicKey, write: bool = True) -> QImage:
+    """
+    讀取卡圖的縮圖, 沒有時從卡圖解碼並寫入縮圖, 重新開啟程式後不需再解碼原圖
+
+    縮圖無法寫入 (如唯讀的資料夾) 或 write 為 False 時只回傳解碼的圖片
+    """
+    thumb = thumb_path(key)
+    if os.path.exists(thumb):
+        image = QImage(thumb)
+        if not image.isNull():
+            return image
+    image = read_scaled_image(key[0])
+    if image.isNull() or not write:
+        return image
+    try:
+        os.makedirs(os.path.dirname(thumb), exist_ok=True)
+        # 先寫入暫存檔再替換, 其他執行緒不會讀到寫到一半的縮圖
+        tmp = f"{thumb}.{threading.get_ident()}.tmp"
+        if image.save(tmp, "JPG", THUMB_QUALITY):
+            os.replace(tmp, thumb)
+            remove_thumbs(key[0], thumb)
+    except OSError:
+        pass
+    return image
+
+
+# 在執行緒池中解碼一張卡圖
+class _DecodeTask(QRunnable):
+    key: PicKey
+    loader: "PicLoader"
+    prefetch: bool  # 預先載入, 可被取消
+    write_thumb: bool  # 是否將縮圖寫入卡圖資料夾
+
+    def __init__(
+        self, key: PicKey, loader: "PicLoader", prefetch: bool, write_thumb: bool
+    ):
+        super().__init__()
+        self.key = key
+        self.loader = loader
+        self.prefetch = prefetch
+        self.write_thumb = write_thumb
+        # 由 PicLoader 持有到解碼完成, 以便安全地從佇列中取回
+        self.setAutoDelete(False)
+
+    def run(self):
+        # QImage 可以跨執行緒傳遞, QPixmap 只能在主執行緒建立
+        self.loader.decoded.emit(self.key, load_thumbnail(self.key, self.write_thumb))
+
+
+# 縮放後卡圖的 LRU 快取, 未命中時在背景執行緒解碼, 完成後發出 pic_ready
+class PicLoader(QObject):
+    max_bytes: int
+    pool: QThreadPool
+    _cache: OrderedDict[PicKey, QPixmap]
+    _bytes: int
+    _pending: dict[PicKey, _DecodeTask]  # 等待或正在解碼的卡圖
+    _failed: set[PicKey]  # 無法解碼的卡圖, 不再重試
+    decoded = pyqtSignal(object, QImage)  # 背景執行緒 -> 主執行緒
+    pic_ready = pyqtSignal(str)  # 卡圖已放入快取, 參數為路徑
+
+    def __init__(self, max_bytes: int = PIC_CACHE_BYTES, parent=None):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(
+            max(1, min(PIC_THREAD_MAX, QThreadPool.globalInstance().maxThreadCount()))
+        )
+        self._cache = OrderedDict()
+        self._bytes = 0
+        self._pending = {}
+        self._failed = set()
+        self.decoded.connect(self._on_decoded)
+
+    # ---------------- 調用事件 ----------------
+    def request(self, path: str, write_thumb: bool = True) -> QPixmap | None:
+        """
+        回傳 path 已快取的卡圖, 未快取時開始在背景解碼並回傳 None\n
+        解碼完成後發出 pic_ready(path), 檔案不存在或無法解碼時不會發出\n
+        write_thumb 為 False 時不在卡圖資料夾寫入縮圖 (唯讀開啟的 cdb)
+        """
+        if (key := pic_key(path)) is None:
+            return None
+        if (pixmap := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            return pixmap
+        if (task := self._pending.get(key)) is not None:
+            # 預先載入的卡圖現在要顯示, 若還在佇列中則提高優先度
+            if task.prefetch and self.pool.tryTake(task):
+                task.prefetch = False
+                self.pool.start(task, PRIORITY_SHOW)
+        elif key not in self._failed:
+            self._start(key, False, PRIORITY_SHOW, write_thumb)
+        return None
+
+    def prefetch(self, path: str, priority: int = 0, write_thumb: bool = True):
+        """在背景預先解碼 path 的卡圖, priority 應為 0 以下, 越大越先處理"""
+        if (key := pic_key(path)) is None:
+            return
+        if key in self._cache or key in self._pending or key in self._failed:
+            return
+        self._start(key, True, min(priority, PRIORITY_SHOW - 1), write_thumb)
+
+    def cancel_prefetch(self):
+        """取消還在佇列中的預先載入, 正在解碼的會繼續完成"""
+        for key, task in list(self._pending.items()):
+            if task.prefetch and self.pool.tryTake(task):
+                del self._pending[key]
+
+    def wait(self):
+        """等待所有解碼完成, 關閉程式前調用"""
+        self.pool.clear()
+        self.pool.waitForDone()
+
+    # ---------------- 內部事件 ----------------
+    def _start(self, key: PicKey, prefetch: bool, priority: int, write_thumb: bool):
+        task = _DecodeTask(key, self, prefetch, write_thumb)
+        self._pending[key] = task
+        self.pool.start(task, priority)
+
+    def _on_decoded(self, key: PicKey, image: QImage):
+        self._pending.pop(key, None)
+        if image.isNull():
+            self._failed.add(key)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._cache[key] = pixmap
+        self._bytes += _pixmap_bytes(pixmap)
+        while self._bytes > self.max_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._bytes -= _pixmap_bytes(old)
+        self.pic_ready.emit(key[0])
+
+
+def _pixmap_bytes(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+def get_pic_loader() -> PicLoader:
+    """獲取共用的卡圖載入器, 第一次使用時建立 (需要已建立 QApplication)"""
+    global _PIC_LOADER
+    if _PIC_LOADER is None:
+        _PIC_LOADER = PicLoader()
+    return _PIC_LOADER
@@ -1,14 +1,91 @@
 import sqlite3
 import os
+import sys
+from bisect import bisect_left
+from itertools import islice
+from collections import OrderedDict
+from typing import Iterator, TYPE_CHECKING
 from scripts.global_set.app_set import (
     get_sql_code_data,
     get_sql_code_text,
+    SQL_DATA_COLUMNS,
+    SQL_TEXT_COLUMNS,
     TEXT_HINTS_COUNT,
+    QUERY_CHUNK_SIZE,
 )
+from scripts.global_set.card_search import (
+    new_text_index,
+    FtsTextIndex,
+    NgramTextIndex,
+    SqlTextIndex,
+)
+from scripts.global_set.card_filter import AttrIndex
+from scripts.global_set.card_select import CardSelection
+from scripts.global_set.card_journal import CardJournal, JournalEntry, apply_delta
 import scripts.basic_item.msg_item as show
 
+if TYPE_CHECKING:
+    from scripts.global_set.card_writer import CdbWriter
+
 sql_set_datas, sql_insert_datas = get_sql_code_data()
 sql_set_texts, sql_insert_texts = get_sql_code_text()
+sql_delete_datas = "DELETE FROM datas WHERE id = ?"
+sql_delete_texts = "DELETE FROM texts WHERE id = ?"
+# 以 id 合併 datas 與 texts, 每列為 (id, datas 欄位..., texts 欄位...)
+# 以 LEFT JOIN 保留沒有 texts 的 datas 列 (其他工具編輯過的 cdb), 文本視為空字串
+_SQL_TEXT_OR_EMPTY: str = ",".join(
+    f"ifnull({col},'')" for col in SQL_TEXT_COLUMNS.split(",")
+)
+sql_select_cards = (
+    f"SELECT id,{SQL_DATA_COLUMNS},{_SQL_TEXT_OR_EMPTY} "
+    "FROM datas LEFT JOIN texts USING(id) ORDER BY id"
+)
+# 延遲載入模式只讀取 datas 與卡名, desc 與提示文字在需要時才讀取
+sql_select_cards_lazy = (
+    f"SELECT id,{SQL_DATA_COLUMNS},ifnull(name,'') "
+    "FROM datas LEFT JOIN texts USING(id) ORDER BY id"
+)
+# 背景載入時依 id 分段讀取 : 參數為 (上一批最後的 id, 批次大小)
+sql_select_cards_page = sql_select_cards.replace(
+    "ORDER BY id", "WHERE id > ? ORDER BY id LIMIT ?"
+)
+sql_select_cards_lazy_page = sql_select_cards_lazy.replace(
+    "ORDER BY id", "WHERE id > ? ORDER BY id LIMIT ?"
+)
+SQL_LAZY_TEXT_COLUMNS: str = SQL_TEXT_COLUMNS.split(",", 1)[1]
+DATA_ROW_LEN: int = len(SQL_DATA_COLUMNS.split(",")) + 1
+LOAD_BATCH_SIZE: int = 2000
+# 延遲載入模式下常駐文本的卡片數量上限
+TEXT_CACHE_SIZE: int = 512
+# add_cards 遇到已存在的 id 時的處理方式
+CONFLICT_OVERWRITE: str = "overwrite"  # 覆蓋
+CONFLICT_SKIP: str = "skip"  # 跳過
+CONFLICT_RENUMBER: str = "renumber"  # 改用之後第一個未使用的 id
+CONFLICT_ASK: str = "ask"  # 詢問一次, 再以選擇的方式處理所有衝突
+CONFLICT_CHOICES: dict[str, str] = {
+    CONFLICT_OVERWRITE: "全部覆盖",
+    CONFLICT_SKIP: "全部跳过",
+    CONFLICT_RENUMBER: "重新编号",
+}
+# 刪除確認時最多列出的 id 數量
+DELETE_PREVIEW_COUNT: int = 10
+# 等待寫入的變更 : id -> (get_data_row, get_text_row), 刪除的 id 為 None
+CardRows = dict[int, tuple[tuple, tuple] | None]
+# 長期連線的頁快取大小 (KiB)
+SQLITE_CACHE_KIB: int = 16384
+# 每個連線快取的預編譯語句數量
+SQLITE_CACHED_STATEMENTS: int = 256
+# 多數卡片的提示文字全為空, 共用同一個 tuple
+EMPTY_HINTS: tuple[str, ...] = ("",) * TEXT_HINTS_COUNT
+
+
+# 將提示文字整理為固定 TEXT_HINTS_COUNT 個的 tuple, 並共用重複的字串
+def _pack_hints(hints) -> tuple[str, ...]:
+    if not any(hints):
+        return EMPTY_HINTS
+    res = [sys.intern(h) if h else "" for h in hints[:TEXT_HINTS_COUNT]]
+    res += [""] * (TEXT_HINTS_COUNT - len(res))
+    return tuple(res)
 
 
 # 建立新的 CDB 資料庫檔案, 包含 datas 與 texts 兩個表
@@ -22,22 +99,69 @@ def create_database_file(file_path: str):
 
 
 class Card:
+    # 使用 __slots__ 省去每張卡的 __dict__, 大量卡片時可明顯減少記憶體
+    __slots__ = (
+        "id",
+        "alias",
+        "setcode",
+        "type",
+        "value",
+        "atk",
+        "move",
+        "race",
+        "from_",
+        "name",
+        "desc",
+        "_hints",
+        "text_loaded",
+    )
     id: int
-    alias: int = 0
-    setcode: int = 0
-    type: int = 0
-    value: int = 0
-    atk: int = 0
-    move: int = 0
-    race: int = 0
-    from_: int = 0
-    name: str = ""
-    desc: str = ""
-    hints: list[str]
+    alias: int
+    setcode: int
+    type: int
+    value: int
+    atk: int
+    move: int
+    race: int
+    from_: int
+    name: str
+    desc: str
+    _hints: tuple[str, ...]
+    text_loaded: bool  # desc 與 hints 是否已載入
 
     def __init__(self, id: int):
         self.id = id
-        self.hints = []
+        self.alias = 0
+        self.setcode = 0
+        self.type = 0
+        self.value = 0
+        self.atk = 0
+        self.move = 0
+        self.race = 0
+        self.from_ = 0
+        self.name = ""
+        self.desc = ""
+        self._hints = EMPTY_HINTS
+        self.text_loaded = True
+
+    @property
+    def hints(self) -> tuple[str, ...]:
+        """腳本提示文字, 固定為 TEXT_HINTS_COUNT 個"""
+        return self._hints
+
+    @hints.setter
+    def hints(self, hints: list[str] | tuple[str, ...]):
+        self._hints = _pack_hints(hints)
+
+    def copy(self) -> "Card":
+        """回傳獨立的副本, 避免不同 CDB 共用同一物件"""
+        c = Card(self.id)
+        c.load_sql_data(self.get_data_row())
+        c.name = self.name
+        c.desc = self.desc
+        c._hints = self._hints
+        c.text_loaded = self.text_loaded
+        return c
 
     # ---------------- sql 相關 ----------------
     def get_data_row(self) -> tuple:
@@ -54,12 +178,11 @@ class Card:
         )
 
     def get_text_row(self) -> tuple:
-        hints = self.hints
-        if len(hints) < TEXT_HINTS_COUNT:
-            hints += [""] * (TEXT_HINTS_COUNT - len(hints))
-        else:
-            hints = hints[:TEXT_HINTS_COUNT]
-        return (self.id, self.name, self.desc, *hints)
+        return (self.id, self.name, self.desc, *self._hints)
+
+    def get_sql_row(self) -> tuple:
+        """回傳與 sql_select_cards 相同格式的一列, 可由 load_sql_row 讀回"""
+        return (*self.get_data_row(), self.name, self.desc, *self._hints)
 
     def load_sql_data(self, data_row: list[int]):
         self.alias = data_row[1]
@@ -81,10 +204,30 @@ class Card:
         self.race = data_lst[5]
         self.from_ = data_lst[6]
 
-    def load_sql_text(self, text_row: list[str]):
-        self.name = text_row[1]
-        self.desc = text_row[2]
-        self.hints = text_row[3:]
+    def load_sql_row(self, card_row: tuple):
+        """讀取 sql_select_cards 的一列 (datas 欄位後接 texts 欄位)"""
+        self.load_sql_data(card_row)
+        self.name = card_row[DATA_ROW_LEN]
+        self.desc = card_row[DATA_ROW_LEN + 1]
+        self.hints = card_row[DATA_ROW_LEN + 2 :]
+
+    def load_sql_lazy_row(self, card_row: tuple):
+        """讀取 sql_select_cards_lazy 的一列, 文本尚未載入"""
+        self.load_sql_data(card_row)
+        self.name = card_row[DATA_ROW_LEN]
+        self.unload_text()
+
+    def load_lazy_text(self, text_row: tuple):
+        """讀取延遲載入的文本 (desc, str1 ~ 16)"""
+        self.desc = text_row[0]
+        self.hints = text_row[1:]
+        self.text_loaded = True
+
+    def unload_text(self):
+        """釋放 desc 與 hints, 之後需重新讀取"""
+        self.desc = ""
+        self._hints = EMPTY_HINTS
+        self.text_loaded = False
 
     def load_edit_text(self, text_lst: list[str]):
         self.name = text_lst[0]
@@ -96,28 +239,174 @@ class Card:
         return bool(self.type & typ)
 
 
+# 開啟 cdb 的長期連線 : WAL 日誌讓讀取與寫入互不阻塞, synchronous=NORMAL 在 WAL 下
+# 只在 checkpoint 時 fsync, 相同的 sql 字串會重複使用連線快取中已編譯的語句
+def connect_cdb(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, cached_statements=SQLITE_CACHED_STATEMENTS)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KIB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+# 將變更以單一交易寫入 conn, 失敗時回滾並拋出例外
+# 表結構在開啟檔案時已檢查過, 這裡不再執行 CREATE TABLE
+def write_card_rows(conn: sqlite3.Connection, rows: CardRows):
+    del_rows = []
+    data_rows = []
+    text_rows = []
+    for id in sorted(rows):
+        if (row := rows[id]) is None:
+            del_rows.append((id,))
+        else:
+            data_rows.append(row[0])
+            text_rows.append(row[1])
+    with conn:
+        cur = conn.cursor()
+        cur.executemany(sql_delete_datas, del_rows)
+        cur.executemany(sql_delete_texts, del_rows)
+        cur.executemany(sql_insert_datas, data_rows)
+        cur.executemany(sql_insert_texts, text_rows)
+
+
+# 以 sql_select_cards (lazy 時為 sql_select_cards_lazy) 的一列建立 Card
+def _new_card(row: tuple, lazy: bool) -> Card:
+    card = Card(row[0])
+    if lazy:
+        card.load_sql_lazy_row(row)
+    else:
+        card.load_sql_row(row)
+    return card
+
+
+# 依 id 分批讀取延遲載入的文本
+def select_texts(conn: sqlite3.Connection, id_lst: list[int]) -> dict[int, tuple]:
+    """讀取 id_lst 的文本, 回傳 id 對應 (desc, str1 ~ 16) 的 dict"""
+    res = {}
+    cur = conn.cursor()
+    for i in range(0, len(id_lst), QUERY_CHUNK_SIZE):
+        chunk = id_lst[i : i + QUERY_CHUNK_SIZE]
+        marks = ",".join(["?"] * len(chunk))
+        cur.execute(
+            f"SELECT id,{SQL_LAZY_TEXT_COLUMNS} FROM texts WHERE id IN ({marks})",
+            chunk,
+        )
+        for row in cur:
+            res[row[0]] = row[1:]
+    return res
+
+
+# 以固定批次從 cursor 逐批讀取卡片, 避免一次 fetchall 整個資料庫
+def iter_card_batches(
+    cursor: sqlite3.Cursor, batch_size: int = LOAD_BATCH_SIZE, lazy: bool = False
+) -> Iterator[list[Card]]:
+    cursor.execute(sql_select_cards_lazy if lazy else sql_select_cards)
+    while rows := cursor.fetchmany(batch_size):
+        yield [_new_card(row, lazy) for row in rows]
+
+
+# 依 id 分段讀取 path 中的卡片, 每批為獨立的查詢, 批次之間不會持有檔案的讀鎖
+# 供背景執行緒使用, 載入期間主執行緒仍可寫入檔案
+def iter_card_pages(
+    path: str, lazy: bool = False, batch_size: int = LOAD_BATCH_SIZE
+) -> Iterator[list[Card]]:
+    sql = sql_select_cards_lazy_page if lazy else sql_select_cards_page
+    conn = connect_cdb(path)
+    try:
+        last_id = -(1 << 63)
+        while rows := conn.execute(sql, (last_id, batch_size)).fetchall():
+            last_id = rows[-1][0]
+            yield [_new_card(row, lazy) for row in rows]
+    finally:
+        conn.close()
+
+
+# 回傳 path 中的卡片數量
+def count_cards(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT count(*) FROM datas").fetchone()[0]
+    finally:
+        conn.close()
+
+
+# 在排序的 id 列表中找出十進位字串以 prefix 開頭的 id
+# prefix 開頭的 id 必定落在 [p, p+1), [p*10, (p+1)*10), ... 這些遞增的數值區間內,
+# 因此只需對每個區間做兩次 bisect, 結果也自然保持排序
+def match_id_prefix(sorted_ids: list[int], prefix: str) -> list[int]:
+    if not (prefix.isascii() and prefix.isdigit()) or prefix.startswith("0"):
+        return []
+    res = []
+    lo = int(prefix)
+    hi = lo + 1
+    max_id = sorted_ids[-1] if sorted_ids else 0
+    while lo <= max_id:
+        st = bisect_left(sorted_ids, lo)
+        ed = bisect_left(sorted_ids, hi, st)
+        res.extend(sorted_ids[st:ed])
+        lo *= 10
+        hi *= 10
+    return res
+
+
 class CDB:
+    read_only: bool = False  # 唯讀的 cdb 不能修改, 見 ReadOnlyCDB
     path: str
     pic_dir: str
     script_dir: str
     card_dict: dict[int, Card]
+    id_index: list[int]  # 所有卡片 id 的排序列表, 增刪時以 bisect 維護
     now_id: int = 0
-    show_id_lst: list[int]
-    select_id_lst: set[int]
+    _show_id_lst: list[int]  # 未篩選時即為 id_index 本身, 不可直接修改
+    # id -> show_id_lst 中的位置, 篩選後第一次查詢時才建立
+    _show_pos: dict[int, int] | None = None
+    select_id_lst: CardSelection  # 以 show_id_lst 中位置的區間儲存
+    # 延遲載入文本, 已載入文本的 id 依最近使用排序
+    lazy: bool
+    _text_cache: OrderedDict[int, None]
+    # 離開 _text_cache 時尚未保存的 id, 保存後再釋放文本
+    _unsaved_texts: set[int]
+    # 全文索引, 第一次搜索時才建立
+    _text_index: FtsTextIndex | NgramTextIndex | SqlTextIndex | None = None
+    # 屬性索引, 第一次篩選時才建立
+    _attr_index: AttrIndex | None = None
+    # 上次全文搜索的 (文字, 結果), 新的搜索文字延長上次文字時直接從結果中縮小
+    _last_search: tuple[str, list[int]] | None = None
+    # 尚未寫入檔案的變更 (新增或修改的 id / 刪除的 id)
+    _dirty_ids: set[int]
+    _deleted_ids: set[int]
+    # 主執行緒使用的長期連線, 第一次使用時開啟
+    _conn: sqlite3.Connection | None = None
+    # 延後寫入的背景執行緒, 沒有時 save 會直接寫入檔案
+    _writer: "CdbWriter | None" = None
+    # 背景載入期間刪除的 id, 之後送達的批次不再放入
+    _load_skip: set[int] | None = None
+    # 撤銷 / 重做紀錄, 以及尚未保存的變更在變更前的列 (重播紀錄時為 None)
+    journal: CardJournal
+    _undo_before: dict[int, tuple | None] | None
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, lazy: bool = False):
         self.path = path
+        self.lazy = lazy
+        self._text_cache = OrderedDict()
+        self._unsaved_texts = set()
         cdb_dir = os.path.dirname(self.path)
         self.pic_dir = os.path.join(cdb_dir, "pics")
         self.script_dir = os.path.join(cdb_dir, "script")
         self.card_dict = {}
-        self.show_id_lst = []
-        self.select_id_lst = set()
+        self.id_index = []
+        self.show_id_lst = self.id_index
+        self.select_id_lst = CardSelection(lambda: self._show_id_lst, self.get_show_pos)
+        self._dirty_ids = set()
+        self._deleted_ids = set()
+        self.journal = CardJournal()
+        self._undo_before = {}
 
     # ---------------- 檢查路徑並創建 ----------------
-    @classmethod
-    def create(cls, path: str) -> "CDB | None":
-        """檢查 CDB 路徑並創建, 不合法或載入失敗則返回 None"""
+    @staticmethod
+    def check_file(path: str) -> bool:
+        """檢查 CDB 路徑與表結構, 不合法時顯示錯誤並返回 False"""
         if not (
             path
             and isinstance(path, str)
@@ -125,39 +414,68 @@ class CDB:
             and path.lower().endswith(".cdb")
         ):
             show.error(f"路徑無效\n{path}")
-            return None
+            return False
 
         try:
-            instance = cls(path)
-            with sqlite3.connect(instance.path) as conn:
+            with sqlite3.connect(path) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('datas', 'texts')"
                 )
                 tables = {row[0] for row in cursor.fetchall()}
-                if "datas" not in tables or "texts" not in tables:
-                    show.error(f"CDB 文件結構不匹配\n{path}")
-                    return None
-                cursor.execute("SELECT * FROM datas")
-                datas = cursor.fetchall()
-                cursor.execute("SELECT * FROM texts")
-                texts = cursor.fetchall()
-                for data, text in zip(datas, texts):
-                    card = Card(data[0])
-                    card.load_sql_data(data)
-                    card.load_sql_text(text)
-                    instance.card_dict[data[0]] = card
+        except Exception as e:
+            show.error(f"CDB 載入時發生錯誤\n{path}\n{e}")
+            return False
+        if "datas" not in tables or "texts" not in tables:
+            show.error(f"CDB 文件結構不匹配\n{path}")
+            return False
+        return True
+
+    @classmethod
+    def create(cls, path: str, lazy: bool = False) -> "CDB | None":
+        """
+        檢查 CDB 路徑並創建, 不合法或載入失敗則返回 None
+        lazy 為 True 時只載入 datas 與卡名, 文本在 get_card 時才讀取
+        """
+        if not cls.check_file(path):
+            return None
+
+        try:
+            instance = cls(path, lazy)
+            cursor = instance._get_conn().cursor()
+            for batch in iter_card_batches(cursor, lazy=lazy):
+                instance.add_batch(batch)
         except Exception as e:
             show.error(f"CDB 載入時發生錯誤\n{path}\n{e}")
             return None
-        if instance.card_dict:
-            instance.show_id_lst = sorted(
-                instance.card_dict.keys(), key=lambda k: int(k)
-            )
-            instance.now_id = instance.show_id_lst[0]
-            instance.select_id_lst.add(instance.now_id)
         return instance
 
+    def add_batch(self, cards: list[Card]):
+        """
+        放入從檔案讀取的一批卡片 (依 id 排序), 不會標記為變更\n
+        背景載入期間已新增, 修改或刪除的 id 以記憶體中的為準
+        """
+        skip = self._load_skip or ()
+        cards = [c for c in cards if c.id not in self.card_dict and c.id not in skip]
+        if not cards:
+            return
+        was_empty = not self.id_index
+        for card in cards:
+            self.card_dict[card.id] = card
+        if was_empty or cards[0].id > self.id_index[-1]:
+            # 依 id 排序讀取, 直接接在索引尾端
+            self.id_index.extend(card.id for card in cards)
+        else:
+            for card in cards:
+                self._insert_index(card.id)
+        # 全文索引直接讀取檔案, 已包含這些卡片; 屬性索引則在下次篩選時重建
+        self._attr_index = None
+        self._last_search = None
+        if was_empty:
+            self.now_id = self.id_index[0]
+            self.select_id_lst.clear()
+            self.select_id_lst.add(self.now_id)
+
     # ---------------- 設定數據 ----------------
     def add_card(self, c: Card) -> bool:
         """增加一張卡"""
@@ -168,42 +486,364 @@ class CDB:
 
     def save_card(self, c: Card):
         """保存一張卡"""
-        self.card_dict[c.id] = c
+        self._put_card(c)
         self.save()
-        self.show_id_lst = sorted(self.card_dict.keys(), key=lambda k: int(k))
+        self.show_id_lst = self.id_index
         self.now_id = c.id
         self.select_id_lst.clear()
         self.select_id_lst.add(self.now_id)
 
+    def add_cards(
+        self, cards: list[Card], conflict_policy: str = CONFLICT_ASK
+    ) -> list[int]:
+        """
+        一次增加多張卡 (放入副本), 只保存一次並只合併一次索引\n
+        conflict_policy 為 CONFLICT_* 之一, 決定 id 已存在時的處理方式\n
+        回傳實際加入的 id, 新加入的卡會成為選中的卡
+        """
+        conflicts = [c.id for c in cards if c.id in self.card_dict]
+        if conflicts and conflict_policy == CONFLICT_ASK:
+            preview = [str(id) for id in conflicts[:DELETE_PREVIEW_COUNT]]
+            if len(conflicts) > DELETE_PREVIEW_COUNT:
+                preview.append("...")
+            msg = f"{len(conflicts)} 张卡片的 ID 已存在\n" + "\n".join(preview)
+            choice = show.choose(msg, list(CONFLICT_CHOICES.values()))
+            if choice == -1:
+                return []
+            conflict_policy = list(CONFLICT_CHOICES)[choice]
+
+        new_cards = []
+        taken = {c.id for c in cards}
+        for card in cards:
+            if card.id in self.card_dict:
+                if conflict_policy == CONFLICT_SKIP:
+                    continue
+                if conflict_policy == CONFLICT_RENUMBER:
+                    new_id = card.id + 1
+                    while new_id in self.card_dict or new_id in taken:
+                        new_id += 1
+                    taken.add(new_id)
+                    card = card.copy()
+                    card.id = new_id
+                    new_cards.append(card)
+                    continue
+            new_cards.append(card.copy())
+        if not new_cards:
+            return []
+
+        self._put_cards(new_cards)
+        self.save()
+        self._release_texts(new_cards)
+
+        added = [c.id for c in new_cards]
+        self.show_id_lst = self.id_index
+        self.now_id = added[-1]
+        self.select_id_lst.reset_ids(added)
+        return added
+
     def del_id(self, id: int):
         """刪除 id 的卡並保存"""
         if show.quest(f"是否刪除\n{id}"):
-            del self.card_dict[id]
+            self._remove_cards({id})
             self.save()
 
     def save(self):
-        """將 cdb 保存到 path"""
+        """
+        將尚未保存的變更以單一交易寫入 path, 只處理變更過的 id\n
+        有 writer 時只將變更交給背景執行緒, 由其合併後寫入
+        """
+        if not (self._dirty_ids or self._deleted_ids):
+            return
+        rows: CardRows = {id: None for id in self._deleted_ids}
+        for id in self._dirty_ids:
+            c = self.card_dict[id]
+            rows[id] = (c.get_data_row(), c.get_text_row())
+        if self._writer is not None:
+            self._writer.put_rows(rows)
+        else:
+            try:
+                write_card_rows(self._get_conn(), rows)
+            except Exception as e:
+                # 保留變更紀錄, 下次保存時重試
+                show.error(f"CDB 保存時發生錯誤\n{self.path}\n{e}")
+                return
+        if self._undo_before is not None:
+            after = {id: None for id in self._deleted_ids}
+            for id in self._dirty_ids:
+                after[id] = self.card_dict[id].get_sql_row()
+            self.journal.record(self._undo_before, after)
+            self._undo_before = {}
+        # 已寫入 (或交給 writer) 且不在快取中的文本可以釋放
+        for id in self._unsaved_texts:
+            if id not in self._text_cache and (card := self.card_dict.get(id)):
+                card.unload_text()
+        self._unsaved_texts.clear()
+        self._dirty_ids.clear()
+        self._deleted_ids.clear()
+
+    # ---------------- 撤銷 / 重做 ----------------
+    def undo(self) -> bool:
+        """撤銷上一次保存的變更, 以單一交易寫入, 沒有可撤銷的變更回傳 False"""
+        return self._replay(self.journal.undo_entry(), True)
+
+    def redo(self) -> bool:
+        """重做上一次撤銷的變更, 以單一交易寫入, 沒有可重做的變更回傳 False"""
+        return self._replay(self.journal.redo_entry(), False)
+
+    def _replay(self, entry: JournalEntry | None, undo: bool) -> bool:
+        """套用一筆紀錄並保存, 之後顯示所有卡片並選中仍存在的變更的卡"""
+        if entry is None:
+            return False
+        # 修改的 delta 只有差異的欄位, 需要目前完整的列
+        cur_rows = self._card_rows([id for id, d in entry.items() if len(d) == 3])
+        put_cards = []
+        del_ids = set()
+        for id, delta in entry.items():
+            row = apply_delta(delta, cur_rows.get(id), undo)
+            if row is None:
+                if id in self.card_dict:
+                    del_ids.add(id)
+            else:
+                c = Card(id)
+                c.load_sql_row(row)
+                put_cards.append(c)
+        # 重播的變更不再記錄, 只移動紀錄的位置
+        self._undo_before = None
         try:
-            with sqlite3.connect(self.path) as conn:
-                cur = conn.cursor()
-                cur.execute(sql_set_datas)
-                cur.execute(sql_set_texts)
-                cur.execute("DELETE FROM datas")
-                cur.execute("DELETE FROM texts")
-                sorted_cards = sorted(self.card_dict.values(), key=lambda card: card.id)
-                for card in sorted_cards:
-                    cur.execute(sql_insert_datas, card.get_data_row())
-                    cur.execute(sql_insert_texts, card.get_text_row())
-                conn.commit()
-        except Exception as e:
-            show.error(f"CDB 保存時發生錯誤\n{self.path}\n{e}")
+            if del_ids:
+                self._remove_cards(del_ids)
+            if put_cards:
+                self._put_cards(put_cards)
+            self.save()
+        finally:
+            self._undo_before = {}
+        self._release_texts(put_cards)
+
+        changed = sorted(c.id for c in put_cards)
+        self.show_id_lst = self.id_index
+        self.now_id = changed[-1] if changed else self.get_first_id()
+        if changed:
+            self.select_id_lst.reset_ids(changed)
+        else:
+            self.select_id_lst.clear()
+            self.select_id_lst.add(self.now_id)
+        return True
+
+    def _record_before(self, ids):
+        """記錄 ids 在第一次變更前的列, 保存時與變更後的列一起寫入撤銷紀錄"""
+        if self._undo_before is None:
+            return
+        ids = [id for id in ids if id not in self._undo_before]
+        if ids:
+            self._undo_before.update(self._card_rows(ids))
+
+    def _card_rows(self, id_lst: list[int]) -> dict[int, tuple | None]:
+        """回傳 id_lst 中每張卡完整的列 (含文本), 不存在的卡為 None"""
+        res: dict[int, tuple | None] = {id: None for id in id_lst}
+        unloaded = []
+        for id in id_lst:
+            if (card := self.card_dict.get(id)) is None:
+                continue
+            if card.text_loaded:
+                res[id] = card.get_sql_row()
+            else:
+                unloaded.append(id)
+        for card in self.get_cards(unloaded):
+            res[card.id] = card.get_sql_row()
+        return res
+
+    def set_writer(self, writer: "CdbWriter | None"):
+        """設定延後寫入的背景執行緒, 之後的 save 都交給 writer"""
+        self._writer = writer
+
+    def flush(self) -> str | None:
+        """立即寫入所有尚未寫入的變更並等待完成, 失敗時回傳錯誤訊息"""
+        self.save()
+        if self._writer is None:
+            return None
+        return self._writer.flush()
+
+    def close(self, discard: bool = False) -> str | None:
+        """
+        寫入所有變更, 停止 writer 並關閉連線, 關閉分頁或程式時調用\n
+        寫入失敗時保留變更與 writer 並回傳錯誤訊息, 不會關閉\n
+        discard 為 True 時放棄尚未寫入的變更
+        """
+        if discard:
+            self._dirty_ids.clear()
+            self._deleted_ids.clear()
+            if self._writer is not None:
+                self._writer.discard()
+        else:
+            self.save()
+            if unsaved := len(self._dirty_ids) + len(self._deleted_ids):
+                return f"有 {unsaved} 张卡片尚未保存"
+        if (writer := self._writer) is not None:
+            if err := writer.stop():
+                if not discard:
+                    return err
+                # 放棄時仍在寫入的變更會被放回佇列
+                writer.discard()
+                writer.stop()
+            self._writer = None
+        if self._text_index is not None:
+            self._text_index.close()
+            self._text_index = None
+        # 其他連線都已關閉, 將檔案切回一般日誌模式, 讓其他程式能以唯讀方式開啟
+        if self._conn is None and os.path.exists(self.path):
+            try:
+                self._get_conn()
+            except Exception:
+                pass
+        if self._conn is not None:
+            try:
+                self._conn.execute("PRAGMA journal_mode=DELETE")
+            except Exception:
+                pass
+            self._conn.close()
+            self._conn = None
+        return None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """獲取主執行緒的長期連線"""
+        if self._conn is None:
+            self._conn = connect_cdb(self.path)
+        return self._conn
+
+    def _put_card(self, c: Card):
+        """放入一張卡 (新增或覆蓋), 並更新索引與變更紀錄"""
+        self._record_before([c.id])
+        if c.id not in self.card_dict:
+            self._insert_index(c.id)
+        self.card_dict[c.id] = c
+        self._mark_dirty(c.id)
+        self._last_search = None
+        if self._text_index is not None:
+            self._text_index.update(c.id, c.name, c.desc, c.hints)
+        if self._attr_index is not None:
+            self._attr_index.update(c.get_data_row())
+        if self.lazy:
+            self._touch_text(c.id)
+
+    def _put_cards(self, cards: list[Card]):
+        """放入多張卡 (新增或覆蓋), 索引只合併一次"""
+        self._record_before([c.id for c in cards])
+        # 新的 id 排序後與 id_index 合併一次 (兩段已排序的序列, 排序為線性時間)
+        new_ids = [c.id for c in cards if c.id not in self.card_dict]
+        if new_ids:
+            # id_index 原地修改, 選中的位置以 id 重新換算
+            is_show = self._show_id_lst is self.id_index
+            if is_show:
+                keep_ids = list(self.select_id_lst)
+            new_ids.sort()
+            self.id_index.extend(new_ids)
+            self.id_index.sort()
+            if is_show:
+                self.select_id_lst.reset_ids(keep_ids)
+        for c in cards:
+            self.card_dict[c.id] = c
+            self._mark_dirty(c.id)
+            if self._text_index is not None:
+                self._text_index.update(c.id, c.name, c.desc, c.hints)
+        # 大量變更時屬性索引在下次篩選時重建較快
+        self._attr_index = None
+        self._last_search = None
+
+    def _release_texts(self, cards: list[Card]):
+        """延遲載入模式下, 保存大量卡片後只保留最後的部分文本"""
+        if not self.lazy:
+            return
+        # 已交給 writer 或寫入檔案, 保存失敗仍未寫入的卡保留文本以便重試
+        for c in cards[:-TEXT_CACHE_SIZE]:
+            if c.id in self._dirty_ids:
+                self._unsaved_texts.add(c.id)
+            else:
+                c.unload_text()
+        for c in cards[-TEXT_CACHE_SIZE:]:
+            self._touch_text(c.id)
+
+    def begin_load(self):
+        """開始背景載入, 之後刪除的卡不會被載入的批次加回"""
+        self._load_skip = set()
+
+    def end_load(self):
+        """背景載入結束或取消"""
+        self._load_skip = None
+
+    def _insert_index(self, id: int):
+        """將新的 id 插入 id_index, 並校正選中的位置"""
+        ind = bisect_left(self.id_index, id)
+        self.id_index.insert(ind, id)
+        if self._show_id_lst is self.id_index:
+            self.select_id_lst.insert_pos(ind)
+
+    def _remove_cards(self, id_set: set[int]):
+        """移除 id_set 中的卡, 並更新索引與變更紀錄"""
+        self._record_before(id_set)
+        self._last_search = None
+        if self._load_skip is not None:
+            self._load_skip.update(id_set)
+        for id in id_set:
+            del self.card_dict[id]
+            self._mark_deleted(id)
+            if self._text_index is not None:
+                self._text_index.remove(id)
+            if self._attr_index is not None:
+                self._attr_index.remove(id)
+        # id_index 皆原地修改, 保持與 show_id_lst 的共用
+        is_show = self._show_id_lst is self.id_index
+        if len(id_set) > 1:
+            # 大量刪除時整體過濾一次, 避免逐一刪除的搬移成本
+            if is_show:
+                keep_ids = [id for id in self.select_id_lst if id not in id_set]
+            self.id_index[:] = [id for id in self.id_index if id not in id_set]
+            if is_show:
+                self.select_id_lst.reset_ids(keep_ids)
+        else:
+            for id in id_set:
+                ind = bisect_left(self.id_index, id)
+                if ind < len(self.id_index) and self.id_index[ind] == id:
+                    del self.id_index[ind]
+                    if is_show:
+                        self.select_id_lst.remove_pos(ind)
+
+    def _mark_dirty(self, id: int):
+        """標記 id 為新增或修改, 等待保存"""
+        self._deleted_ids.discard(id)
+        self._dirty_ids.add(id)
+
+    def _mark_deleted(self, id: int):
+        """標記 id 為刪除, 等待保存"""
+        self._dirty_ids.discard(id)
+        self._deleted_ids.add(id)
+
+    # ---------------- 顯示列表 ----------------
+    @property
+    def show_id_lst(self) -> list[int]:
+        return self._show_id_lst
+
+    @show_id_lst.setter
+    def show_id_lst(self, id_lst: list[int]):
+        self._show_id_lst = id_lst
+        self._show_pos = None
+
+    def get_show_pos(self, id: int) -> int:
+        """回傳 id 在 show_id_lst 中的位置, 不在其中回傳 -1"""
+        id_lst = self._show_id_lst
+        if id_lst is self.id_index:
+            # 未篩選時列表已排序且隨增刪原地更新, 直接二分搜尋
+            ind = bisect_left(id_lst, id)
+            return ind if ind < len(id_lst) and id_lst[ind] == id else -1
+        if self._show_pos is None:
+            self._show_pos = {id: i for i, id in enumerate(id_lst)}
+        return self._show_pos.get(id, -1)
 
     # ---------------- 獲取數據 ----------------
     def get_first_id(self) -> int:
         """獲取第一張卡的 id"""
-        if not self.card_dict:
+        if not self.id_index:
             return 0
-        return next(iter(self.card_dict))
+        return self.id_index[0]
 
     def get_now_card(self) -> Card | None:
         """回傳當前指向的 id 的 Card, 無卡回傳 None"""
@@ -211,51 +851,114 @@ class CDB:
 
     def get_card(self, id: int) -> Card | None:
         """回傳指定 id 的 Card, 找不到對應 id 回傳 None"""
-        return self.card_dict.get(id)
+        card = self.card_dict.get(id)
+        if card is not None and self.lazy:
+            if not card.text_loaded:
+                if (text_row := self._fetch_texts([id]).get(id)) is not None:
+                    card.load_lazy_text(text_row)
+            self._touch_text(id)
+        return card
+
+    def get_name(self, id: int) -> str:
+        """回傳指定 id 的卡名, 名稱常駐記憶體, 不會觸發文本載入"""
+        card = self.card_dict.get(id)
+        return "" if card is None else card.name
+
+    def get_cards(self, id_lst: list[int]) -> list[Card]:
+        """回傳 id_lst 中存在的卡片的完整 (含文本) 副本, 用於複製"""
+        cards = [self.card_dict[id] for id in id_lst if id in self.card_dict]
+        res = [c.copy() for c in cards]
+        unloaded = [c.id for c in res if not c.text_loaded]
+        if unloaded:
+            text_dict = self._fetch_texts(unloaded)
+            for c in res:
+                if (text_row := text_dict.get(c.id)) is not None:
+                    c.load_lazy_text(text_row)
+        return res
 
     def has_id(self, id: int) -> bool:
         """檢查是否存在 id"""
         return id in self.card_dict
 
-    def search_id(self, id_prefix: str):
+    def search_id(self, id_prefix: str, keep_now: bool = False):
         """
         根據 id 篩選卡片, 如果為空則顯示所有卡片, 同時清空已選中的卡
         不會回傳值, 只會更新內部的 now_id, show_id_lst 和 select_id_lst
+        keep_now 為 True 時 (輸入中的即時搜索) 只更新 show_id_lst
         """
+        # 區間查詢的成本只與結果數量有關, 不需要從上次結果縮小
         if id_prefix and id_prefix != "0":
-            match_id_lst = [
-                id for id in self.card_dict.keys() if str(id).startswith(id_prefix)
-            ]
-            self.show_id_lst = match_id_lst
+            self.show_id_lst = match_id_prefix(self.id_index, id_prefix)
         else:
-            self.show_id_lst = sorted(self.card_dict.keys(), key=lambda k: int(k))
+            self.show_id_lst = self.id_index
+        if not keep_now:
+            self._reset_now_id()
 
-        if self.now_id in self.show_id_lst:
-            pass
-        elif self.show_id_lst:
-            self.now_id = self.show_id_lst[0]
+    def search_text(self, text: str, keep_now: bool = False):
+        """
+        在 name, desc 與提示文字中全文搜索 (不區分大小寫), 依相關度排序, 卡名命中優先
+        如果為空則顯示所有卡片, 同時清空已選中的卡
+        不會回傳值, 只會更新內部的 now_id, show_id_lst 和 select_id_lst
+        keep_now 為 True 時 (輸入中的即時搜索) 只更新 show_id_lst
+        """
+        last_search, self._last_search = self._last_search, None
+        if text:
+            if (text_index := self._get_text_index()) is not None:
+                within = None
+                if last_search and text.startswith(last_search[0]):
+                    within = last_search[1]
+                match_id_lst = text_index.query(text, within)
+                self.show_id_lst = [id for id in match_id_lst if self.has_id(id)]
+                self._last_search = (text, self.show_id_lst)
+            else:  # 索引無法建立時退回逐張比對卡名
+                text_lower = text.lower()
+                self.show_id_lst = [
+                    id
+                    for id in self.id_index
+                    if text_lower in (self.get_name(id) or "").lower()
+                ]
         else:
-            self.now_id = 0
-        self.select_id_lst.clear()
-        self.select_id_lst.add(self.now_id)
+            self.show_id_lst = self.id_index
+        if not keep_now:
+            self._reset_now_id()
 
-    def search_name(self, name: str):
+    def filter(
+        self,
+        type_mask: int | None = None,
+        atk_range: tuple[int, int] | None = None,
+        value_range: tuple[int, int] | None = None,
+        setcode: int | None = None,
+        race: int | None = None,
+        from_: int | None = None,
+        move_mask: int | None = None,
+        sub_mask: int | None = None,
+    ):
         """
-        根據 name 篩選卡片, 如果為空則顯示所有卡片, 同時清空已選中的卡
+        根據卡片屬性篩選卡片, 條件為 None 表示不限, 條件的意義見 AttrIndex.query
         不會回傳值, 只會更新內部的 now_id, show_id_lst 和 select_id_lst
         """
-        if name:
-            name_lower = name.lower()  # 進行不區分大小寫的匹配
-            match_id_lst = [
-                key
-                for key, card in self.card_dict.items()
-                if card.name and name_lower in card.name.lower()
-            ]
-            self.show_id_lst = match_id_lst
-        else:
-            self.show_id_lst = sorted(self.card_dict.keys(), key=lambda k: int(k))
+        if self._attr_index is None:
+            self._attr_index = AttrIndex(self._iter_data_rows())
+        self.show_id_lst = self._attr_index.query(
+            type_mask,
+            atk_range,
+            value_range,
+            setcode,
+            race,
+            from_,
+            move_mask,
+            sub_mask,
+        )
+        self._reset_now_id()
 
-        if self.now_id in self.show_id_lst:
+    def _iter_data_rows(self) -> Iterator[tuple]:
+        """依 id 順序產生所有卡片的 get_data_row, 用於建立屬性索引"""
+        for id in self.id_index:
+            yield self.card_dict[id].get_data_row()
+
+    def _reset_now_id(self):
+        """篩選後校正 now_id 到 show_id_lst 中, 並只選中 now_id"""
+        if self.get_show_pos(self.now_id) != -1:
             pass
         elif self.show_id_lst:
             self.now_id = self.show_id_lst[0]
@@ -264,22 +967,62 @@ class CDB:
         self.select_id_lst.clear()
         self.select_id_lst.add(self.now_id)
 
+    def _get_text_index(self) -> FtsTextIndex | NgramTextIndex | SqlTextIndex | None:
+        """
+        獲取全文索引, 第一次使用時從檔案建立並補上尚未保存的變更\n
+        延遲載入時直接查詢檔案, 不在記憶體中複製所有文本
+        """
+        if self._text_index is not None:
+            return self._text_index
+        try:
+            if self.lazy:
+                text_index = SqlTextIndex(self._get_conn())
+            else:
+                text_index = new_text_index(self.path)
+        except Exception as e:
+            show.error(f"CDB 建立搜索索引時發生錯誤\n{self.path}\n{e}")
+            return None
+        # 補上已交給 writer 但可能尚未寫入檔案的變更
+        if self._writer is not None:
+            for id, row in self._writer.pending_rows().items():
+                if row is None:
+                    text_index.remove(id)
+                else:
+                    text_row = row[1]
+                    text_index.update(id, text_row[1], text_row[2], text_row[3:])
+        for id in self._deleted_ids:
+            text_index.remove(id)
+        for id in self._dirty_ids:
+            c = self.card_dict[id]
+            text_index.update(id, c.name, c.desc, c.hints)
+        self._text_index = text_index
+        return text_index
+
+    def show_all(self):
+        """取消篩選, 顯示所有卡片"""
+        self.show_id_lst = self.id_index
+
     def del_select_card(self) -> bool:
         """刪除 self.select_id_lst 中選中的所有卡片, 然後更新 now_id, show_id_lst 和 select_id_lst"""
         if not self.select_id_lst:
             return
 
-        msg = "是否刪除\n" + "\n".join([str(id) for id in self.select_id_lst])
+        select_ct = len(self.select_id_lst)
+        preview = [str(id) for id in islice(self.select_id_lst, DELETE_PREVIEW_COUNT)]
+        if select_ct > DELETE_PREVIEW_COUNT:
+            preview.append("...")
+        msg = f"是否刪除 {select_ct} 張卡片\n" + "\n".join(preview)
         if not show.quest(msg):
             return False
 
-        del_id_lst = self.select_id_lst.copy()
-        for id in del_id_lst:
-            del self.card_dict[id]
+        del_id_lst = set(self.select_id_lst)
+        self._remove_cards(del_id_lst)
 
         self.save()
 
-        self.show_id_lst = [id for id in self.show_id_lst if id not in del_id_lst]
+        # 未篩選時 show_id_lst 即為 id_index, 已在 _remove_cards 中更新
+        if self.show_id_lst is not self.id_index:
+            self.show_id_lst = [id for id in self.show_id_lst if id not in del_id_lst]
         self.select_id_lst.clear()
 
         if self.show_id_lst:
@@ -290,8 +1033,67 @@ class CDB:
         self.now_id = new_now_id
         return True
 
+    # ---------------- 延遲載入文本 ----------------
+    def _fetch_texts(self, id_lst: list[int]) -> dict[int, tuple]:
+        """從檔案讀取 id_lst 的文本, 回傳 id 對應 (desc, str1 ~ 16) 的 dict"""
+        res = {}
+        # 尚未寫入檔案的變更以 writer 中的為準
+        if self._writer is not None and (pending := self._writer.pending_rows()):
+            for id in id_lst:
+                if (row := pending.get(id)) is not None:
+                    res[id] = row[1][2:]
+            id_lst = [id for id in id_lst if id not in res]
+        if not id_lst:
+            return res
+        try:
+            res.update(select_texts(self._get_conn(), id_lst))
+        except Exception as e:
+            show.error(f"CDB 讀取文本時發生錯誤\n{self.path}\n{e}")
+        return res
+
+    def _touch_text(self, id: int):
+        """將 id 標為最近使用, 超出上限時釋放最久未用且已保存的卡片文本"""
+        self._text_cache[id] = None
+        self._text_cache.move_to_end(id)
+        while len(self._text_cache) > TEXT_CACHE_SIZE:
+            old_id, _ = self._text_cache.popitem(last=False)
+            card = self.card_dict.get(old_id)
+            if card is None:
+                continue
+            if old_id in self._dirty_ids:
+                self._unsaved_texts.add(old_id)
+            else:
+                card.unload_text()
+
+    def unloaded_text_ids(self, id_lst: list[int]) -> list[int]:
+        """回傳 id_lst 中文本尚未載入的 id, 用於預先讀取"""
+        if not self.lazy:
+            return []
+        return [
+            id
+            for id in id_lst
+            if (card := self.card_dict.get(id)) is not None and not card.text_loaded
+        ]
+
+    def put_prefetched_texts(self, text_dict: dict[int, tuple]):
+        """
+        放入在背景從檔案預先讀取的文本 (id 對應 (desc, str1 ~ 16))
+
+        已載入文本, 或變更尚未寫入檔案的卡會被略過
+        """
+        pending = self._writer.pending_rows() if self._writer is not None else {}
+        for id, text_row in text_dict.items():
+            card = self.card_dict.get(id)
+            if card is None or card.text_loaded or id in pending:
+                continue
+            card.load_lazy_text(text_row)
+            self._touch_text(id)
+
     def get_pic_dir(self) -> str:
         return self.pic_dir
 
+    def get_pic_path(self, id: int) -> str:
+        return os.path.join(self.pic_dir, f"c{id}.jpg")
+
     def get_script_dir(self) -> str:
         return self.script_dir
@@ -0,0 +1,193 @@
+import os
+import sqlite3
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterator
+from scripts.global_set.app_set import SQL_DATA_COLUMNS
+from scripts.global_set.card_db import (
+    CDB,
+    Card,
+    sql_select_cards,
+    QUERY_CHUNK_SIZE,
+)
+from scripts.global_set.card_search import SqlTextIndex, _ro_uri
+import scripts.basic_item.msg_item as show
+
+# 唯讀模式下快取的完整卡片數量
+CARD_CACHE_SIZE: int = 256
+# 唯讀模式下快取的卡名數量 (卡片列表每頁只需要卡名)
+NAME_CACHE_SIZE: int = 4096
+# mmap 的最小大小, 檔案較小時也保留一些空間
+MMAP_MIN_SIZE: int = 1 << 20
+
+sql_select_card_by_id = sql_select_cards.replace("ORDER BY id", "WHERE id = ?")
+sql_select_datas = f"SELECT id,{SQL_DATA_COLUMNS} FROM datas ORDER BY id"
+
+READ_ONLY_MSG: str = "只读模式无法修改卡片"
+
+
+def connect_cdb_ro(path: str) -> sqlite3.Connection:
+    """
+    以 immutable 唯讀開啟 path, 並將整個檔案 mmap 到記憶體\n
+    immutable 使 sqlite 不再加鎖與檢查變更, 檔案在開啟期間不能被其他程式修改\n
+    immutable 會忽略 -wal 檔, 有尚未寫回的 wal (其他程式正在編輯或異常結束) 時只以一般唯讀開啟
+    """
+    uri = _ro_uri(path)
+    if not _has_wal(path):
+        uri += "&immutable=1"
+    conn = sqlite3.connect(uri, uri=True)
+    size = max(os.path.getsize(path), MMAP_MIN_SIZE)
+    conn.execute(f"PRAGMA mmap_size={size}")
+    conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+# path 是否有非空的 -wal 檔
+def _has_wal(path: str) -> bool:
+    try:
+        return os.path.getsize(path + "-wal") > 0
+    except OSError:
+        return False
+
+
+# 唯讀開啟的 cdb, 用於瀏覽大型的參考資料庫
+# 只在記憶體中保留排序的 id, 卡片依 id 主鍵直接從 mmap 的檔案查詢, 並以 LRU 快取最近使用的卡
+class ReadOnlyCDB(CDB):
+    read_only: bool = True
+    id_index: array  # array('q'), 比 list[int] 佔用少得多
+    _card_cache: OrderedDict[int, Card]
+    _name_cache: OrderedDict[int, str]
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.id_index = array("q")
+        self.show_id_lst = self.id_index
+        self._card_cache = OrderedDict()
+        self._name_cache = OrderedDict()
+
+    @classmethod
+    def create(cls, path: str) -> "ReadOnlyCDB | None":
+        """檢查 CDB 路徑並以唯讀模式開啟, 只讀取所有 id, 不合法或載入失敗則返回 None"""
+        if not cls.check_file(path):
+            return None
+
+        try:
+            instance = cls(path)
+            cur = instance._get_conn().execute("SELECT id FROM datas ORDER BY id")
+            while rows := cur.fetchmany(QUERY_CHUNK_SIZE * 8):
+                instance.id_index.extend(row[0] for row in rows)
+        except Exception as e:
+            show.error(f"CDB 載入時發生錯誤\n{path}\n{e}")
+            return None
+        instance.now_id = instance.get_first_id()
+        instance.select_id_lst.add(instance.now_id)
+        return instance
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect_cdb_ro(self.path)
+        return self._conn
+
+    def close(self, discard: bool = False) -> str | None:
+        """關閉連線, 唯讀模式沒有需要寫入的變更"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        # 文本索引使用同一個連線
+        self._text_index = None
+        return None
+
+    # ---------------- 禁止修改 ----------------
+    def add_card(self, c: Card) -> bool:
+        show.error(READ_ONLY_MSG)
+        return False
+
+    def save_card(self, c: Card):
+        show.error(READ_ONLY_MSG)
+
+    def add_cards(self, cards: list[Card], conflict_policy: str = "") -> list[int]:
+        show.error(READ_ONLY_MSG)
+        return []
+
+    def del_id(self, id: int):
+        show.error(READ_ONLY_MSG)
+
+    def del_select_card(self) -> bool:
+        show.error(READ_ONLY_MSG)
+        return False
+
+    def save(self):
+        pass
+
+    # ---------------- 獲取數據 ----------------
+    def has_id(self, id: int) -> bool:
+        ind = bisect_left(self.id_index, id)
+        return ind < len(self.id_index) and self.id_index[ind] == id
+
+    def get_card(self, id: int) -> Card | None:
+        """依 id 主鍵從檔案讀取卡片, 最近使用的卡片會被快取"""
+        if (card := self._card_cache.get(id)) is not None:
+            self._card_cache.move_to_end(id)
+            return card
+        if not self.has_id(id):
+            return None
+        try:
+            row = self._get_conn().execute(sql_select_card_by_id, (id,)).fetchone()
+        except Exception as e:
+            show.error(f"CDB 讀取卡片時發生錯誤\n{self.path}\n{e}")
+            return None
+        if row is None:
+            return None
+        card = Card(row[0])
+        card.load_sql_row(row)
+        self._card_cache[id] = card
+        while len(self._card_cache) > CARD_CACHE_SIZE:
+            self._card_cache.popitem(last=False)
+        return card
+
+    def get_name(self, id: int) -> str:
+        """依 id 主鍵讀取卡名, 最近使用的卡名會被快取"""
+        if (name := self._name_cache.get(id)) is not None:
+            self._name_cache.move_to_end(id)
+            return name
+        if (card := self._card_cache.get(id)) is not None:
+            name = card.name
+        else:
+            try:
+                row = (
+                    self._get_conn()
+                    .execute("SELECT name FROM texts WHERE id = ?", (id,))
+                    .fetchone()
+                )
+            except Exception:
+                return ""
+            name = "" if row is None else row[0] or ""
+        self._name_cache[id] = name
+        while len(self._name_cache) > NAME_CACHE_SIZE:
+            self._name_cache.popitem(last=False)
+        return name
+
+    def get_cards(self, id_lst: list[int]) -> list[Card]:
+        """回傳 id_lst 中存在的卡片的副本, 用於複製"""
+        res = []
+        for id in id_lst:
+            if (card := self.get_card(id)) is not None:
+                res.append(card.copy())
+        return res
+
+    def _iter_data_rows(self) -> Iterator[tuple]:
+        """直接從檔案依 id 順序讀取所有 datas, 不建立卡片物件"""
+        cur = self._get_conn().execute(sql_select_datas)
+        while rows := cur.fetchmany(QUERY_CHUNK_SIZE * 8):
+            yield from rows
+
+    def _get_text_index(self) -> SqlTextIndex | None:
+        """唯讀模式直接在 mmap 的檔案上以 LIKE 搜索, 不另外建立索引"""
+        if self._text_index is None:
+            try:
+                self._text_index = SqlTextIndex(self._get_conn())
+            except Exception as e:
+                show.error(f"CDB 建立搜索索引時發生錯誤\n{self.path}\n{e}")
+                return None
+        return self._text_index
@@ -0,0 +1,188 @@
+from array import array
+from typing import Callable, Iterable
+from scripts.global_set.app_set import TYPE_MAIN, TYPE_SUB
+
+# get_data_row 中各欄位的位置 : (id, alias, setcode, type, value, atk, move, race, from)
+COL_SETCODE: int = 2
+COL_TYPE: int = 3
+COL_VALUE: int = 4
+COL_ATK: int = 5
+COL_MOVE: int = 6
+COL_RACE: int = 7
+COL_FROM: int = 8
+INDEX_COLS: tuple[int, ...] = (
+    COL_SETCODE,
+    COL_TYPE,
+    COL_VALUE,
+    COL_ATK,
+    COL_MOVE,
+    COL_RACE,
+    COL_FROM,
+)
+SETCODE_LANES: int = 4  # setcode 由 4 個 16 位元的字段組成
+
+
+# 將 setcode 拆成非 0 的 16 位元字段
+def _setcode_lanes(setcode: int) -> set[int]:
+    lanes = set()
+    for i in range(SETCODE_LANES):
+        if lane := (setcode >> (i * 16)) & 0xFFFF:
+            lanes.add(lane)
+    return lanes
+
+
+# 以序號列表建立 bitset (python int), 比逐位 | 快得多
+def _bits_from_ords(ords: list[int], size: int) -> int:
+    buf = bytearray(size // 8 + 1)
+    for o in ords:
+        buf[o >> 3] |= 1 << (o & 7)
+    return int.from_bytes(buf, "little")
+
+
+# 列出 bitset 中為 1 的序號
+def _ords_from_bits(bits: int) -> list[int]:
+    res = []
+    s = bin(bits)[:1:-1]  # 低位在前
+    i = s.find("1")
+    while i != -1:
+        res.append(i)
+        i = s.find("1", i + 1)
+    return res
+
+
+# 卡片屬性索引, 每個欄位的每個值對應一個 bitset, 複合條件只需做 bitset 交集
+class AttrIndex:
+    _id_of: list[int]  # 序號 -> id, 0 表示空位
+    _ord_of: dict[int, int]  # id -> 序號
+    _free: list[int]
+    _vals: dict[int, array]  # 欄位 -> 每個序號的值
+    _bits: dict[int, dict[int, int]]  # 欄位 -> 值 -> bitset
+    _lanes: dict[int, int]  # setcode 字段 -> bitset
+    _all: int
+
+    def __init__(self, data_rows: Iterable[tuple]):
+        self._id_of = []
+        self._ord_of = {}
+        self._free = []
+        self._vals = {col: array("q") for col in INDEX_COLS}
+        ord_lst: dict[int, dict[int, list[int]]] = {col: {} for col in INDEX_COLS}
+        lane_lst: dict[int, list[int]] = {}
+        for row in data_rows:
+            o = len(self._id_of)
+            self._id_of.append(row[0])
+            self._ord_of[row[0]] = o
+            for col in INDEX_COLS:
+                self._vals[col].append(row[col])
+                ord_lst[col].setdefault(row[col], []).append(o)
+            for lane in _setcode_lanes(row[COL_SETCODE]):
+                lane_lst.setdefault(lane, []).append(o)
+        size = len(self._id_of)
+        self._bits = {
+            col: {v: _bits_from_ords(ords, size) for v, ords in val_dict.items()}
+            for col, val_dict in ord_lst.items()
+        }
+        self._lanes = {v: _bits_from_ords(ords, size) for v, ords in lane_lst.items()}
+        self._all = _bits_from_ords(list(range(size)), size)
+
+    # ---------------- 維護 ----------------
+    def update(self, data_row: tuple):
+        """新增或更新一張卡的屬性"""
+        id = data_row[0]
+        self.remove(id)
+        if self._free:
+            o = self._free.pop()
+            self._id_of[o] = id
+            for col in INDEX_COLS:
+                self._vals[col][o] = data_row[col]
+        else:
+            o = len(self._id_of)
+            self._id_of.append(id)
+            for col in INDEX_COLS:
+                self._vals[col].append(data_row[col])
+        self._ord_of[id] = o
+        bit = 1 << o
+        for col in INDEX_COLS:
+            val_bits = self._bits[col]
+            val_bits[data_row[col]] = val_bits.get(data_row[col], 0) | bit
+        for lane in _setcode_lanes(data_row[COL_SETCODE]):
+            self._lanes[lane] = self._lanes.get(lane, 0) | bit
+        self._all |= bit
+
+    def remove(self, id: int):
+        """移除一張卡的屬性"""
+        if (o := self._ord_of.pop(id, None)) is None:
+            return
+        bit = 1 << o
+        for col in INDEX_COLS:
+            val = self._vals[col][o]
+            val_bits = self._bits[col]
+            if not (bits := val_bits[val] & ~bit):
+                del val_bits[val]
+            else:
+                val_bits[val] = bits
+        for lane in _setcode_lanes(self._vals[COL_SETCODE][o]):
+            if not (bits := self._lanes[lane] & ~bit):
+                del self._lanes[lane]
+            else:
+                self._lanes[lane] = bits
+        self._all &= ~bit
+        self._id_of[o] = 0
+        self._free.append(o)
+
+    # ---------------- 查詢 ----------------
+    def _union(self, col: int, match: Callable[[int], bool]) -> int:
+        """欄位中符合 match 的所有值的 bitset 聯集"""
+        res = 0
+        for val, bits in self._bits[col].items():
+            if match(val):
+                res |= bits
+        return res
+
+    def query(
+        self,
+        type_mask: int | None = None,
+        atk_range: tuple[int, int] | None = None,
+        value_range: tuple[int, int] | None = None,
+        setcode: int | None = None,
+        race: int | None = None,
+        from_: int | None = None,
+        move_mask: int | None = None,
+        sub_mask: int | None = None,
+    ) -> list[int]:
+        """
+        回傳符合所有條件的卡片 id (已排序), 條件為 None 表示不限\n
+        type_mask : 主類型 (TYPE_MAIN) 符合其一, 且包含所有子類型 (TYPE_SUB) 位元\n
+        sub_mask : 只比較其中的子類型位元且需與 type_mask 完全相同\n
+        (例如 "通常" 需不含速攻, 永续等位元), None 時為 type_mask 的子類型位元\n
+        atk_range, value_range : 包含兩端的數值範圍\n
+        setcode : 任一 16 位元字段相同, 0 表示沒有字段\n
+        race, from_ : 包含任一位元, 0 表示沒有種族 / 陣營\n
+        move_mask : 包含所有移動方向位元
+        """
+        bits = self._all
+        if type_mask is not None:
+            main, sub = type_mask & TYPE_MAIN, type_mask & TYPE_SUB
+            mask = sub if sub_mask is None else (sub_mask | sub) & TYPE_SUB
+            bits &= self._union(
+                COL_TYPE, lambda v: (not main or v & main) and v & mask == sub
+            )
+        if atk_range is not None:
+            lo, hi = atk_range
+            bits &= self._union(COL_ATK, lambda v: lo <= v <= hi)
+        if value_range is not None:
+            lo, hi = value_range
+            bits &= self._union(COL_VALUE, lambda v: lo <= v <= hi)
+        if setcode is not None:
+            if setcode:
+                bits &= self._lanes.get(setcode & 0xFFFF, 0)
+            else:
+                bits &= self._bits[COL_SETCODE].get(0, 0)
+        if race is not None:
+            bits &= self._union(COL_RACE, lambda v: v & race if race else not v)
+        if from_ is not None:
+            bits &= self._union(COL_FROM, lambda v: v & from_ if from_ else not v)
+        if move_mask is not None:
+            bits &= self._union(COL_MOVE, lambda v: v & move_mask == move_mask)
+        res = [self._id_of[o] for o in _ords_from_bits(bits)]
+        res.sort()
+        return res
@@ -0,0 +1,117 @@
+import sys
+from collections import deque
+
+# 卡片的完整資料列 : Card.get_sql_row(), 不存在的卡為 None
+# 單張卡的變更 (delta) :
+#   新增或刪除 : (變更前的列, 變更後的列), 其中一個為 None
+#   修改 : (變更的欄位位置, 變更前的值, 變更後的值), 只保留不同的欄位
+CardDelta = tuple
+JournalEntry = dict[int, CardDelta]
+
+# 撤銷紀錄預設的記憶體上限
+UNDO_MEMORY_BYTES: int = 32 * 1024 * 1024
+# 估計記憶體時每個 delta 的固定開銷 (dict 項目與 tuple 本身)
+_DELTA_OVERHEAD: int = 160
+
+
+def make_delta(before: tuple | None, after: tuple | None) -> CardDelta | None:
+    """比較一張卡變更前後的列, 沒有差異回傳 None"""
+    if before is None or after is None:
+        if before is None and after is None:
+            return None
+        return (before, after)
+    cols = tuple(i for i, (a, b) in enumerate(zip(before, after)) if a != b)
+    if not cols:
+        return None
+    return (cols, tuple(before[i] for i in cols), tuple(after[i] for i in cols))
+
+
+def apply_delta(delta: CardDelta, row: tuple | None, undo: bool) -> tuple | None:
+    """
+    回傳 row 套用 delta 後的列 (None 表示刪除)\n
+    undo 為 True 時還原為變更前, 否則重做為變更後; 修改的 delta 需要目前的 row
+    """
+    if len(delta) == 2:
+        return delta[0] if undo else delta[1]
+    cols, old, new = delta
+    res = list(row)
+    for i, val in zip(cols, old if undo else new):
+        res[i] = val
+    return tuple(res)
+
+
+def _delta_size(delta: CardDelta) -> int:
+    size = _DELTA_OVERHEAD
+    for part in delta:
+        if part is not None:
+            size += sys.getsizeof(part)
+            size += sum(sys.getsizeof(val) for val in part)
+    return size
+
+
+# 撤銷 / 重做紀錄, 每次保存為一筆, 只記錄變更過的卡片的差異
+# 超出記憶體上限時捨棄最舊的紀錄
+class CardJournal:
+    max_bytes: int
+    _undo: deque[tuple[JournalEntry, int]]  # (紀錄, 估計的位元組數)
+    _redo: deque[tuple[JournalEntry, int]]
+    _bytes: int
+
+    def __init__(self, max_bytes: int = UNDO_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self._undo = deque()
+        self._redo = deque()
+        self._bytes = 0
+
+    def record(self, before: dict[int, tuple | None], after: dict[int, tuple | None]):
+        """記錄一次保存的變更, 並清空重做紀錄"""
+        entry = {}
+        size = 0
+        for id, row in after.items():
+            if (delta := make_delta(before.get(id), row)) is not None:
+                entry[id] = delta
+                size += _delta_size(delta)
+        if not entry:
+            return
+        self._redo.clear()
+        self._undo.append((entry, size))
+        self._recount()
+
+    def undo_entry(self) -> JournalEntry | None:
+        """取出最新的紀錄並移到重做紀錄, 沒有則回傳 None"""
+        if not self._undo:
+            return None
+        item = self._undo.pop()
+        self._redo.append(item)
+        return item[0]
+
+    def redo_entry(self) -> JournalEntry | None:
+        """取出最新的重做紀錄並移回撤銷紀錄, 沒有則回傳 None"""
+        if not self._redo:
+            return None
+        item = self._redo.pop()
+        self._undo.append(item)
+        return item[0]
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+
+    def memory_bytes(self) -> int:
+        """回傳所有紀錄估計佔用的位元組數"""
+        return self._bytes
+
+    def _recount(self):
+        """重新計算大小, 超出上限時依序捨棄最舊的撤銷紀錄"""
+        self._bytes = sum(size for _, size in self._undo)
+        self._bytes += sum(size for _, size in self._redo)
+        while self._bytes > self.max_bytes and self._undo:
+            _, size = self._undo.popleft()
+            self._bytes -= size
@@ -0,0 +1,263 @@
+import os
+import sqlite3
+from pathlib import Path
+from scripts.global_set.app_set import TEXT_HINTS_COUNT, QUERY_CHUNK_SIZE
+
+# 提示文字以換行合併為單一欄位建立索引
+_SQL_HINTS_JOIN: str = "||char(10)||".join(
+    f"ifnull(str{i},'')" for i in range(1, TEXT_HINTS_COUNT + 1)
+)
+_SQL_SELECT_TEXTS: str = (
+    f"SELECT id,ifnull(name,''),ifnull(desc,''),{_SQL_HINTS_JOIN} FROM texts"
+)
+# trigram 分詞最少需要 3 個字元才能使用索引, 較短的查詢改為 LIKE 掃描
+TRIGRAM_MIN_LEN: int = 3
+# bm25 權重 : name, desc, hints
+BM25_WEIGHTS: str = "10.0, 1.0, 0.5"
+# 縮小搜索時, 上次結果超過此數量則直接重新查詢索引
+REFINE_LIMIT: int = 5000
+
+_FTS5_TRIGRAM: bool | None = None
+
+
+# 檢查 sqlite 是否支援 fts5 的 trigram 分詞 (sqlite 3.34+)
+def _has_fts5_trigram() -> bool:
+    global _FTS5_TRIGRAM
+    if _FTS5_TRIGRAM is None:
+        try:
+            conn = sqlite3.connect(":memory:")
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(a, tokenize='trigram')")
+            conn.close()
+            _FTS5_TRIGRAM = True
+        except sqlite3.Error:
+            _FTS5_TRIGRAM = False
+    return _FTS5_TRIGRAM
+
+
+# 以 uri 唯讀開啟 path, 路徑中的特殊字元會被正確編碼
+def _ro_uri(path: str) -> str:
+    return Path(os.path.abspath(path)).as_uri() + "?mode=ro"
+
+
+# 將查詢轉為 LIKE 字串, 跳脫 % 與 _
+def _like_pattern(text: str) -> str:
+    text = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{text}%"
+
+
+# 在 within 中分批查詢符合的 id 並保留 within 的順序
+# sql 中的 {marks} 為 IN 的參數位置, 參數依序為 like_args 與該批 id
+def _refine(
+    conn: sqlite3.Connection, sql: str, like_args: tuple, within: list[int]
+) -> list[int]:
+    hits = set()
+    for i in range(0, len(within), QUERY_CHUNK_SIZE):
+        chunk = within[i : i + QUERY_CHUNK_SIZE]
+        marks = ",".join(["?"] * len(chunk))
+        cur = conn.execute(sql.format(marks=marks), (*like_args, *chunk))
+        hits.update(row[0] for row in cur)
+    return [id for id in within if id in hits]
+
+
+# fts5 索引, 以 trigram 分詞, 可直接處理中日韓文字的子字串搜索
+class FtsTextIndex:
+    _conn: sqlite3.Connection
+
+    def __init__(self, path: str):
+        # 索引建在記憶體中的資料庫, 不在 cdb 檔案內加入額外的表
+        self._conn = sqlite3.connect(":memory:")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE fts USING fts5(name, desc, hints, tokenize='trigram')"
+        )
+        # 直接由 sqlite 從 cdb 複製文本, 不經過 python 物件
+        self._conn.execute("ATTACH DATABASE ? AS cdb", (_ro_uri(path),))
+        self._conn.execute(
+            "INSERT INTO fts(rowid,name,desc,hints) "
+            + _SQL_SELECT_TEXTS.replace("FROM texts", "FROM cdb.texts")
+        )
+        self._conn.commit()
+        self._conn.execute("DETACH DATABASE cdb")
+
+    def update(self, id: int, name: str, desc: str, hints: tuple[str, ...]):
+        self._conn.execute("DELETE FROM fts WHERE rowid = ?", (id,))
+        self._conn.execute(
+            "INSERT INTO fts(rowid,name,desc,hints) VALUES (?,?,?,?)",
+            (id, name or "", desc or "", "\n".join(h or "" for h in hints)),
+        )
+
+    def remove(self, id: int):
+        self._conn.execute("DELETE FROM fts WHERE rowid = ?", (id,))
+
+    def query(self, text: str, within: list[int] | None = None) -> list[int]:
+        """
+        回傳包含 text 的卡片 id, 依相關度排序 (卡名命中優先)
+        within 為上次搜索的結果時, 只在其中逐一比對並保留原本的順序
+        """
+        if within is not None and len(within) <= REFINE_LIMIT:
+            return _refine(
+                self._conn,
+                "SELECT rowid FROM fts WHERE (name LIKE ?1 ESCAPE '\\' "
+                "OR desc LIKE ?1 ESCAPE '\\' OR hints LIKE ?1 ESCAPE '\\') "
+                "AND rowid IN ({marks})",
+                (_like_pattern(text),),
+                within,
+            )
+        if len(text) >= TRIGRAM_MIN_LEN:
+            phrase = '"' + text.replace('"', '""') + '"'
+            cur = self._conn.execute(
+                "SELECT rowid FROM fts WHERE fts MATCH ? "
+                f"ORDER BY bm25(fts, {BM25_WEIGHTS})",
+                (phrase,),
+            )
+        else:
+            like = _like_pattern(text)
+            cur = self._conn.execute(
+                "SELECT rowid FROM fts WHERE name LIKE ?1 ESCAPE '\\' "
+                "OR desc LIKE ?1 ESCAPE '\\' OR hints LIKE ?1 ESCAPE '\\' "
+                "ORDER BY (name LIKE ?1 ESCAPE '\\') DESC, rowid",
+                (like,),
+            )
+        return [row[0] for row in cur]
+
+    def close(self):
+        self._conn.close()
+
+
+# 純記憶體的 bigram 索引, 用於不支援 fts5 trigram 的 sqlite
+class NgramTextIndex:
+    _names: dict[int, str]
+    _texts: dict[int, str]
+    _postings: dict[str, set[int]]
+
+    def __init__(self, path: str):
+        self._names = {}
+        self._texts = {}
+        self._postings = {}
+        conn = sqlite3.connect(path)
+        try:
+            for id, name, desc, hints in conn.execute(_SQL_SELECT_TEXTS):
+                self._add(id, name, f"{name}\n{desc}\n{hints}")
+        finally:
+            conn.close()
+
+    def _add(self, id: int, name: str, text: str):
+        text = text.lower()
+        self._names[id] = name.lower()
+        self._texts[id] = text
+        for gram in {text[i : i + 2] for i in range(len(text) - 1)}:
+            self._postings.setdefault(gram, set()).add(id)
+
+    def update(self, id: int, name: str, desc: str, hints: tuple[str, ...]):
+        self.remove(id)
+        hint_txt = "\n".join(h or "" for h in hints)
+        self._add(id, name or "", f"{name or ''}\n{desc or ''}\n{hint_txt}")
+
+    def remove(self, id: int):
+        if (text := self._texts.pop(id, None)) is None:
+            return
+        del self._names[id]
+        for gram in {text[i : i + 2] for i in range(len(text) - 1)}:
+            if (ids := self._postings.get(gram)) is not None:
+                ids.discard(id)
+                if not ids:
+                    del self._postings[gram]
+
+    def query(self, text: str, within: list[int] | None = None) -> list[int]:
+        """
+        回傳包含 text 的卡片 id, 卡名命中優先, 其餘依 id 排序
+        within 為上次搜索的結果時, 只在其中逐一比對並保留原本的順序
+        """
+        text = text.lower()
+        if within is not None:
+            return [id for id in within if text in self._texts.get(id, "")]
+        if len(text) < 2:
+            candidates = self._texts.keys()
+        else:
+            grams = sorted(
+                {text[i : i + 2] for i in range(len(text) - 1)},
+                key=lambda g: len(self._postings.get(g, ())),
+            )
+            candidates = set(self._postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= self._postings.get(gram, set())
+        res = [id for id in candidates if text in self._texts[id]]
+        res.sort(key=lambda id: (text not in self._names[id], id))
+        return res
+
+    def close(self):
+        self._postings.clear()
+
+
+# 直接以 LIKE 查詢 cdb 的 texts 表, 不在記憶體中複製文本
+# 用於唯讀開啟的大型 cdb 與延遲載入文本的 cdb, 尚未寫入檔案的變更另外記錄並合併到結果
+class SqlTextIndex:
+    _conn: sqlite3.Connection
+    _where: str
+    _texts: dict[int, tuple[str, str]]  # 變更過的卡 : id -> (小寫卡名, 小寫全部文本)
+    _removed: set[int]
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        cols = ["name", "desc"] + [f"str{i}" for i in range(1, TEXT_HINTS_COUNT + 1)]
+        self._where = " OR ".join(f"{col} LIKE ?1 ESCAPE '\\'" for col in cols)
+        self._texts = {}
+        self._removed = set()
+
+    def update(self, id: int, name: str, desc: str, hints: tuple[str, ...]):
+        self._removed.discard(id)
+        hint_txt = "\n".join(h or "" for h in hints)
+        name = (name or "").lower()
+        self._texts[id] = (name, f"{name}\n{desc or ''}\n{hint_txt}".lower())
+
+    def remove(self, id: int):
+        self._texts.pop(id, None)
+        self._removed.add(id)
+
+    def _changed(self, id: int) -> bool:
+        return id in self._texts or id in self._removed
+
+    def query(self, text: str, within: list[int] | None = None) -> list[int]:
+        """
+        回傳包含 text 的卡片 id, 卡名命中優先, 其餘依 id 排序
+        within 為上次搜索的結果時, 只在其中比對並保留原本的順序
+        """
+        like = _like_pattern(text)
+        text = text.lower()
+        if within is not None and len(within) <= REFINE_LIMIT:
+            res = _refine(
+                self._conn,
+                f"SELECT id FROM texts WHERE ({self._where}) AND id IN ({{marks}})",
+                (like,),
+                within,
+            )
+            if not (self._texts or self._removed):
+                return res
+            hits = {id for id in res if not self._changed(id)}
+            hits.update(id for id, (_, txt) in self._texts.items() if text in txt)
+            return [id for id in within if id in hits]
+        cur = self._conn.execute(
+            f"SELECT id, name LIKE ?1 ESCAPE '\\' FROM texts WHERE {self._where} "
+            "ORDER BY 2 DESC, id",
+            (like,),
+        )
+        if not (self._texts or self._removed):
+            return [row[0] for row in cur]
+        res = [(not name_hit, id) for id, name_hit in cur if not self._changed(id)]
+        for id, (name, txt) in self._texts.items():
+            if text in txt:
+                res.append((text not in name, id))
+        res.sort()
+        return [id for _, id in res]
+
+    def close(self):
+        self._texts.clear()
+        self._removed.clear()
+
+
+# 根據 sqlite 支援程度建立全文索引
+def new_text_index(path: str) -> FtsTextIndex | NgramTextIndex:
+    if _has_fts5_trigram():
+        return FtsTextIndex(path)
+    return NgramTextIndex(path)
@@ -0,0 +1,163 @@
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterator
+
+
+# 以區間儲存的選中卡片, 每個區間 [st, ed] 為 show_id_lst 中連續的位置 (含兩端)
+# 連續選取大量卡片只需一個區間, 查詢以 bisect 完成, 遍歷時才逐一產生 id
+class CardSelection:
+    _get_lst: Callable[[], list[int]]  # 回傳目前的 show_id_lst
+    _get_pos: Callable[[int], int]  # 回傳 id 在 show_id_lst 中的位置, 不在其中為 -1
+    _lst: list[int]  # 區間位置所對應的列表
+    _starts: list[int]
+    _ends: list[int]
+    _count: int
+
+    def __init__(self, get_lst: Callable[[], list[int]], get_pos: Callable[[int], int]):
+        self._get_lst = get_lst
+        self._get_pos = get_pos
+        self._lst = get_lst()
+        self._starts = []
+        self._ends = []
+        self._count = 0
+
+    # ---------------- 與 show_id_lst 同步 ----------------
+    def _sync(self):
+        """show_id_lst 被替換時, 將選中的 id 換算到新列表的位置, 不在新列表中的 id 取消選中"""
+        if (lst := self._get_lst()) is self._lst:
+            return
+        ids = list(self._iter_ids())
+        self._lst = lst
+        self.reset_ids(ids)
+
+    def reset_ids(self, ids: list[int]):
+        """以 ids 重新建立選中區間"""
+        self._lst = self._get_lst()
+        pos_lst = sorted(p for id in ids if (p := self._get_pos(id)) != -1)
+        self._starts = []
+        self._ends = []
+        self._count = 0
+        for p in pos_lst:
+            if self._ends and p <= self._ends[-1] + 1:
+                if p > self._ends[-1]:
+                    self._ends[-1] = p
+                    self._count += 1
+            else:
+                self._starts.append(p)
+                self._ends.append(p)
+                self._count += 1
+
+    def insert_pos(self, pos: int):
+        """列表原地插入 pos 後, 將之後的區間後移, 新插入的位置不會被選中"""
+        if self._get_lst() is not self._lst:
+            self._sync()
+            return
+        i = bisect_left(self._ends, pos)
+        if i < len(self._starts) and self._starts[i] < pos:
+            # pos 落在區間中, 拆成兩段
+            self._starts.insert(i + 1, pos)
+            self._ends.insert(i, pos - 1)
+            i += 1
+        for j in range(i, len(self._starts)):
+            self._starts[j] += 1
+            self._ends[j] += 1
+
+    def remove_pos(self, pos: int):
+        """列表原地刪除 pos 後, 移除該位置並將之後的區間前移"""
+        if self._get_lst() is not self._lst:
+            self._sync()
+            return
+        i = bisect_left(self._ends, pos)
+        if i < len(self._starts) and self._starts[i] <= pos:
+            self._count -= 1
+            if self._starts[i] == self._ends[i]:
+                del self._starts[i]
+                del self._ends[i]
+            else:
+                self._ends[i] -= 1
+                i += 1
+        for j in range(i, len(self._starts)):
+            self._starts[j] -= 1
+            self._ends[j] -= 1
+        # 刪除後前後兩個區間可能相連
+        if 0 < i < len(self._starts) and self._starts[i] == self._ends[i - 1] + 1:
+            self._ends[i - 1] = self._ends[i]
+            del self._starts[i]
+            del self._ends[i]
+
+    # ---------------- 修改 ----------------
+    def clear(self):
+        self._lst = self._get_lst()
+        self._starts = []
+        self._ends = []
+        self._count = 0
+
+    def add(self, id: int):
+        """選中 id, 不在 show_id_lst 中的 id 會被忽略"""
+        self._sync()
+        if (pos := self._get_pos(id)) != -1:
+            self.add_range(pos, pos)
+
+    def add_range(self, st: int, ed: int):
+        """選中位置 st ~ ed (含兩端), 並與相鄰或重疊的區間合併"""
+        self._sync()
+        i = bisect_left(self._ends, st - 1)
+        j = bisect_right(self._starts, ed + 1)
+        if i < j:
+            st = min(st, self._starts[i])
+            ed = max(ed, self._ends[j - 1])
+            for k in range(i, j):
+                self._count -= self._ends[k] - self._starts[k] + 1
+        self._starts[i:j] = [st]
+        self._ends[i:j] = [ed]
+        self._count += ed - st + 1
+
+    def discard(self, id: int):
+        """取消選中 id"""
+        self._sync()
+        if (pos := self._get_pos(id)) == -1:
+            return
+        i = bisect_right(self._starts, pos) - 1
+        if i < 0 or pos > self._ends[i]:
+            return
+        st, ed = self._starts[i], self._ends[i]
+        new_ranges = [(s, e) for s, e in ((st, pos - 1), (pos + 1, ed)) if s <= e]
+        self._starts[i : i + 1] = [s for s, _ in new_ranges]
+        self._ends[i : i + 1] = [e for _, e in new_ranges]
+        self._count -= 1
+
+    # ---------------- 查詢 ----------------
+    def has_pos(self, pos: int) -> bool:
+        """位置 pos 是否選中"""
+        self._sync()
+        i = bisect_right(self._starts, pos) - 1
+        return i >= 0 and pos <= self._ends[i]
+
+    def __contains__(self, id: int) -> bool:
+        self._sync()
+        return (pos := self._get_pos(id)) != -1 and self.has_pos(pos)
+
+    def __len__(self) -> int:
+        self._sync()
+        return self._count
+
+    def ranges(self) -> list[tuple[int, int]]:
+        """回傳所有選中區間 (st, ed)"""
+        self._sync()
+        return list(zip(self._starts, self._ends))
+
+    def iter_pos(self) -> Iterator[int]:
+        """依列表順序逐一產生選中的位置"""
+        self._sync()
+        for st, ed in zip(self._starts, self._ends):
+            yield from range(st, ed + 1)
+
+    def _iter_ids(self) -> Iterator[int]:
+        lst = self._lst
+        for st, ed in zip(self._starts, self._ends):
+            for p in range(st, ed + 1):
+                yield lst[p]
+
+    def __iter__(self) -> Iterator[int]:
+        """依列表順序逐一產生選中的 id"""
+        self._sync()
+        return self._iter_ids()
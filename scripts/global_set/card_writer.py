@@ -0,0 +1,130 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from scripts.global_set.card_db import CardRows, connect_cdb, write_card_rows
+
+
+# 延後寫入的背景執行緒, 使用獨立的 sqlite 連線
+# 佇列中同一 id 的多次變更只保留最後一次, 每次以單一交易寫入
+class CdbWriter(QThread):
+    path: str
+    interval: float  # 自動寫入的間隔 (秒)
+    _cond: threading.Condition
+    _pending: CardRows  # 等待寫入的變更
+    _writing: CardRows  # 正在寫入的變更
+    _flush_req: int
+    _flush_done: int
+    _stopping: bool
+    _last_error: str | None
+    save_failed = pyqtSignal(str)
+
+    def __init__(self, path: str, interval_ms: int, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.interval = max(interval_ms, 0) / 1000
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._writing = {}
+        self._flush_req = 0
+        self._flush_done = 0
+        self._stopping = False
+        self._last_error = None
+
+    # ---------------- 主執行緒調用 ----------------
+    def put_rows(self, rows: CardRows):
+        """加入變更, 在下次自動寫入或 flush 時寫入"""
+        with self._cond:
+            self._pending.update(rows)
+            if self.interval == 0:
+                self._cond.notify_all()
+
+    def pending_rows(self) -> CardRows:
+        """回傳尚未寫入檔案的變更 (包含正在寫入的)"""
+        with self._cond:
+            rows = dict(self._writing)
+            rows.update(self._pending)
+            return rows
+
+    def flush(self) -> str | None:
+        """立即寫入所有變更並等待完成, 失敗時回傳錯誤訊息"""
+        if not self.isRunning():
+            return None
+        with self._cond:
+            self._flush_req += 1
+            req = self._flush_req
+            self._cond.notify_all()
+            while self._flush_done < req:
+                self._cond.wait()
+            return self._last_error
+
+    def stop(self) -> str | None:
+        """
+        寫入所有變更後結束執行緒, 失敗時回傳錯誤訊息\n
+        背景寫入失敗時在呼叫的執行緒再同步寫入一次, 仍失敗則保留變更並重新啟動執行緒
+        """
+        err = self.flush()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+        if err is None:
+            return None
+        with self._cond:
+            rows = self._pending
+        try:
+            conn = connect_cdb(self.path)
+            try:
+                write_card_rows(conn, rows)
+            finally:
+                conn.close()
+        except Exception as e:
+            with self._cond:
+                self._stopping = False
+            self.start()
+            return str(e)
+        with self._cond:
+            self._pending = {}
+            self._last_error = None
+        return None
+
+    def discard(self):
+        """放棄所有尚未寫入的變更"""
+        with self._cond:
+            self._pending = {}
+
+    # ---------------- 背景執行緒 ----------------
+    def run(self):
+        conn = None
+        reported = False
+        try:
+            while True:
+                with self._cond:
+                    if not (self._stopping or self._flush_req > self._flush_done):
+                        self._cond.wait(self.interval or None)
+                    if self._stopping:
+                        return
+                    self._writing, self._pending = self._pending, {}
+                    req = self._flush_req
+                err = None
+                if self._writing:
+                    try:
+                        if conn is None:
+                            conn = connect_cdb(self.path)
+                        write_card_rows(conn, self._writing)
+                    except Exception as e:
+                        err = str(e)
+                with self._cond:
+                    if err is not None:
+                        # 寫入失敗的變更放回佇列, 之後送來的新變更優先
+                        self._writing.update(self._pending)
+                        self._pending = self._writing
+                    self._writing = {}
+                    self._last_error = err
+                    self._flush_done = req
+                    self._cond.notify_all()
+                # 連續失敗時只回報一次
+                if err is not None and not reported:
+                    self.save_failed.emit(err)
+                reported = err is not None
+        finally:
+            if conn is not None:
+                conn.close()
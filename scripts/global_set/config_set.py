@@ -7,6 +7,9 @@ _DEFAULT_CONFIG = {
     "DATABASE_HISTORY": {"max_record": 10, "history_paths": []},
     "LUA_DEFAULT": "--{} {}\\nlocal cm, m = GetID()\\nfunction cm.initial_effect(c)\\n\\nend\\n",
     "HIDE_ILLEGAL": 1,
+    "LAZY_TEXT": 0,
+    "SAVE_INTERVAL": 1000,
+    "UNDO_MEMORY_MB": 32,
 }
 
 
@@ -69,6 +72,27 @@ class ConfigSet:
         self._data["HIDE_ILLEGAL"] = val
         self.save()
 
+    # ---------------- 延迟加载卡片文本 ----------------
+    def get_lazy_text(self) -> bool:
+        """是否 延迟加载卡片文本"""
+        return self._data.get("LAZY_TEXT", 0) == 1
+
+    def set_lazy_text(self, b: bool):
+        """設定 延迟加载卡片文本"""
+        val = 1 if b else 0
+        self._data["LAZY_TEXT"] = val
+        self.save()
+
+    # ---------------- 保存間隔 ----------------
+    def get_save_interval(self) -> int:
+        """獲取 延後寫入 cdb 的間隔 (毫秒)"""
+        return self._data.get("SAVE_INTERVAL", 1000)
+
+    # ---------------- 撤銷紀錄 ----------------
+    def get_undo_memory(self) -> int:
+        """獲取 撤銷紀錄的記憶體上限 (位元組)"""
+        return self._data.get("UNDO_MEMORY_MB", 32) * 1024 * 1024
+
 
 # 獲取 cardinfo.txt
 def get_config() -> ConfigSet:
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+
+# 啟動計時 : 以 --profile-startup[=報告路徑] 或環境變數 EFDE_PROFILE_STARTUP=報告路徑 開啟
+# 記錄各階段 (匯入, 單例通信, MainWindow 初始化, 首次載入 cdb, 首次繪製) 的時間並寫入 json
+# --profile-exit 或 EFDE_PROFILE_EXIT=1 時寫入報告後結束程式, 用於 benchmarks/startup_budget.py
+# 只使用標準庫, 需在其他模組之前匯入並調用 init 才能計算匯入時間
+
+PROFILE_FLAG: str = "--profile-startup"
+PROFILE_EXIT_FLAG: str = "--profile-exit"
+PROFILE_ENV: str = "EFDE_PROFILE_STARTUP"
+PROFILE_EXIT_ENV: str = "EFDE_PROFILE_EXIT"
+DEFAULT_REPORT: str = "startup_profile.json"
+
+_T0: float = time.perf_counter()
+_report_path: str | None = None
+_argv: list[str] = []  # 移除計時參數後的命令行參數, 記錄在報告中
+_exit_after: bool = False
+_phases: dict[str, list[float | None]] = {}  # 名稱 -> [開始, 結束] (秒, 相對 _T0)
+_waiting: set[str] = set()  # 寫入報告前需要結束的階段
+_written: bool = False
+_on_written: list = []  # 寫入報告後調用
+
+
+def init(argv: list[str]) -> list[str]:
+    """
+    從 argv 與環境變數讀取設定, 回傳移除計時參數後的 argv (以免被當成 cdb 路徑)\n
+    不會修改 argv, 調用前 begin 與 end 都不會記錄
+    """
+    global _report_path, _exit_after, _argv
+    _report_path = os.environ.get(PROFILE_ENV) or None
+    _exit_after = os.environ.get(PROFILE_EXIT_ENV) == "1"
+    res = argv[:1]
+    for arg in argv[1:]:
+        if arg == PROFILE_FLAG:
+            _report_path = DEFAULT_REPORT
+        elif arg.startswith(PROFILE_FLAG + "="):
+            _report_path = arg.split("=", 1)[1] or DEFAULT_REPORT
+        elif arg == PROFILE_EXIT_FLAG:
+            _exit_after = True
+        else:
+            res.append(arg)
+    _argv = res
+    return res
+
+
+def enabled() -> bool:
+    return _report_path is not None
+
+
+def exit_after() -> bool:
+    """是否在寫入報告後結束程式"""
+    return enabled() and _exit_after
+
+
+def begin(name: str):
+    """開始計時階段 name"""
+    if enabled():
+        _phases[name] = [time.perf_counter() - _T0, None]
+
+
+def end(name: str):
+    """結束階段 name, 所有等待的階段都結束後寫入報告"""
+    if not enabled() or name not in _phases or _phases[name][1] is not None:
+        return
+    _phases[name][1] = time.perf_counter() - _T0
+    if name in _waiting:
+        _waiting.discard(name)
+        if not _waiting:
+            write()
+
+
+def wait_for(*names: str):
+    """在 names 都結束前不寫入報告 (例如首次繪製與首次載入 cdb)"""
+    if enabled():
+        _waiting.update(names)
+
+
+def on_written(func):
+    """寫入報告後調用 func (例如 --profile-exit 時關閉視窗)"""
+    if enabled():
+        _on_written.append(func)
+
+
+def watch_first_paint(widget, name: str = "first_paint"):
+    """widget 第一次收到繪製事件時結束階段 name"""
+    if not enabled():
+        return
+    from PyQt6.QtCore import QObject, QEvent
+
+    class _PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                widget.removeEventFilter(self)
+                end(name)
+            return False
+
+    widget.installEventFilter(_PaintWatcher(widget))
+
+
+def write() -> str | None:
+    """寫入 json 報告, 回傳報告路徑"""
+    global _written
+    if not enabled() or _written:
+        return None
+    _written = True
+    phases = [
+        {
+            "name": name,
+            "start_ms": round(st * 1000, 3),
+            "ms": None if ed is None else round((ed - st) * 1000, 3),
+        }
+        for name, (st, ed) in _phases.items()
+    ]
+    ends = [ed for _, ed in _phases.values() if ed is not None]
+    report = {
+        "argv": _argv[1:],
+        "phases": phases,
+        "total_ms": round(max(ends, default=0) * 1000, 3),
+        # 報告的絕對時間, 用於加上直譯器本身的啟動時間
+        "written_at": time.time(),
+    }
+    path = _report_path
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+    except OSError:
+        path = None
+    for func in _on_written:
+        func()
+    return path
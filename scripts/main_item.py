@@ -1,9 +1,20 @@
 import os
 from typing import Callable
-from PyQt6.QtWidgets import QToolBar, QWidget, QPushButton, QMenu, QToolButton
+from PyQt6.QtWidgets import (
+    QToolBar,
+    QWidget,
+    QPushButton,
+    QMenu,
+    QToolButton,
+    QProgressBar,
+)
 from PyQt6.QtGui import QAction
-from PyQt6.QtCore import pyqtSignal, pyqtSlot
-from scripts.global_set.card_db import CDB
+from PyQt6.QtCore import pyqtSignal, pyqtSlot, QThread
+from scripts.global_set.card_db import CDB, iter_card_pages, count_cards
+from scripts.global_set.card_db_ro import ReadOnlyCDB
+from scripts.global_set.card_writer import CdbWriter
+from scripts.global_set.config_set import get_config
+import scripts.basic_item.msg_item as show
 
 
 def new_toolbtn(title: str, toolbar: QToolBar) -> QMenu:
@@ -74,6 +85,7 @@ class FileBtnToolBar(QToolBar):
     file_list: list[FileBtn]
     show_dataeditor = pyqtSignal(bool)
     load_cdb = pyqtSignal(CDB)
+    cdb_loaded = pyqtSignal(CDB)  # 當前分頁的 cdb 背景載入了新的卡片
 
     def __init__(self):
         super().__init__("file_list")
@@ -81,17 +93,29 @@ class FileBtnToolBar(QToolBar):
         self.file_list = []
 
     # ---------------- 檔案讀取 ----------------
-    def add_cdbfile(self, filepath: str):
-        """根據傳入路徑新增一個 cdb 檔案分頁（若已存在則不新增）"""
+    def add_cdbfile(self, filepath: str, read_only: bool = False):
+        """
+        根據傳入路徑新增一個 cdb 檔案分頁（若已存在則不新增）
+        read_only 為 True 時以唯讀模式開啟, 卡片直接從檔案查詢, 不載入到記憶體
+        """
         # 已存在相同路徑的分頁則指向該分頁
         for f in self.file_list:
             if isinstance(f, CdbFileBtn) and f.cdb.path == filepath:
                 f.on_clicked()
                 return
 
-        if (cdb := CDB.create(filepath)) is None:
-            return
-        cdb_file = CdbFileBtn(cdb, self)
+        if read_only:
+            if (cdb := ReadOnlyCDB.create(filepath)) is None:
+                return
+            cdb_file = CdbFileBtn(cdb, self)
+        else:
+            if not CDB.check_file(filepath):
+                return
+            # 卡片在背景執行緒中逐批載入, 分頁先以空的 cdb 顯示
+            cdb = CDB(filepath, get_config().get_lazy_text())
+            cdb_file = CdbFileBtn(cdb, self)
+            cdb_file.batch_loaded.connect(self.on_batch_loaded)
+            cdb_file.start_load()
         cdb_file.click_cdbfile.connect(self.load_cdbfile)
         cdb_file.closing.connect(self.remove_file)
         # 更新狀態
@@ -105,6 +129,20 @@ class FileBtnToolBar(QToolBar):
         self.set_ind(ind)
         self.load_cdb.emit(cdbfilebtn.cdb)
 
+    def on_batch_loaded(self, cdbfilebtn: "CdbFileBtn"):
+        if self.get_file_btn() is cdbfilebtn:
+            self.cdb_loaded.emit(cdbfilebtn.cdb)
+
+    def close_all(self) -> bool:
+        """
+        取消所有分頁的背景載入並寫入尚未保存的變更, 關閉程式前調用\n
+        有分頁保存失敗且不放棄變更時回傳 False
+        """
+        for f in self.file_list:
+            if isinstance(f, CdbFileBtn) and not f.close_cdb():
+                return False
+        return True
+
     # ---------------- 數據操作 ----------------
     def set_ind(self, ind: int):
         """設定 toolbar 的選中項（會處理樣式與 index 更新）"""
@@ -121,17 +159,19 @@ class FileBtnToolBar(QToolBar):
     @pyqtSlot(QWidget)
     def remove_file(self, filebtn: FileBtn):
         """移除檔案分頁"""
+        if isinstance(filebtn, CdbFileBtn) and not filebtn.close_cdb():
+            return
         remove_ind = self.file_list.index(filebtn)
         old_ind = self.index
 
         del self.file_list[remove_ind]
         filebtn.deleteLater()
         if remove_ind == old_ind:
+            self.index = -1  # 已移除的分頁不需取消選中
             if (flen := len(self.file_list)) > 0:
                 new_ind = min(remove_ind, flen - 1)
                 self.file_list[new_ind].on_clicked()
             else:
-                self.index = -1
                 self.show_dataeditor.emit(False)
         elif remove_ind < old_ind:
             self.index = old_ind - 1
@@ -144,17 +184,126 @@ class FileBtnToolBar(QToolBar):
         return self.file_list[self.index]
 
 
+# 在背景執行緒中逐批讀取 cdb 的卡片
+class CdbLoader(QThread):
+    path: str
+    lazy: bool
+    batch_ready = pyqtSignal(list)
+    progress = pyqtSignal(int, int)  # 已載入數量, 總數量
+    failed = pyqtSignal(str)
+
+    def __init__(self, path: str, lazy: bool, parent: QWidget | None = None):
+        super().__init__(parent)
+        self.path = path
+        self.lazy = lazy
+
+    def run(self):
+        try:
+            total = count_cards(self.path)
+            loaded = 0
+            for batch in iter_card_pages(self.path, self.lazy):
+                if self.isInterruptionRequested():
+                    return
+                loaded += len(batch)
+                self.batch_ready.emit(batch)
+                self.progress.emit(loaded, total)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
 # cdb 分頁按鈕
 class CdbFileBtn(FileBtn):
     cdb: CDB
+    loader: CdbLoader | None = None
+    writer: CdbWriter | None = None
+    progress_bar: QProgressBar
     click_cdbfile = pyqtSignal(FileBtn)
+    batch_loaded = pyqtSignal(FileBtn)
 
     def __init__(self, cdb: CDB, frame: QToolBar):
-        super().__init__(os.path.basename(cdb.path))
+        name = os.path.basename(cdb.path)
+        super().__init__(f"[只读]{name}" if cdb.read_only else name)
         self.cdb = cdb
         self.fileBtn.clicked.connect(self.on_clicked)
+        if cdb.read_only:
+            self.fileBtn.setToolTip(f"只读 : {cdb.path}")
+        else:
+            # 延後寫入, 編輯時不需等待檔案寫入
+            self.writer = CdbWriter(cdb.path, get_config().get_save_interval(), self)
+            self.writer.save_failed.connect(self._on_save_failed)
+            self.writer.start()
+            cdb.set_writer(self.writer)
+            cdb.journal.max_bytes = get_config().get_undo_memory()
+        # 載入進度 (貼在按鈕底部)
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setGeometry(0, 27, 100, 3)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setVisible(False)
         frame.addWidget(self)
 
+    # ---------------- 背景載入 ----------------
+    def start_load(self):
+        """開始在背景載入卡片, 點擊 X 關閉分頁即取消載入"""
+        self.cdb.begin_load()
+        self.loader = CdbLoader(self.cdb.path, self.cdb.lazy, self)
+        self.loader.batch_ready.connect(self._on_batch_ready)
+        self.loader.progress.connect(self._on_progress)
+        self.loader.failed.connect(self._on_failed)
+        self.loader.finished.connect(self._on_finished)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.fileBtn.setToolTip("载入中, 关闭分页即取消载入")
+        self.loader.start()
+
+    def stop_load(self):
+        """取消背景載入並等待執行緒結束"""
+        if self.loader is None:
+            return
+        self.loader.requestInterruption()
+        self.loader.wait()
+        self._on_finished()
+
+    def close_cdb(self) -> bool:
+        """
+        取消載入並寫入尚未保存的變更, 關閉分頁時調用\n
+        寫入失敗時詢問是否放棄變更, 不放棄則回傳 False (分頁保持開啟)
+        """
+        self.stop_load()
+        if err := self.cdb.close():
+            msg = f"CDB 保存時發生錯誤\n{self.cdb.path}\n{err}\n\n"
+            if not show.quest(msg + "是否放弃未保存的变更并关闭?"):
+                return False
+            self.cdb.close(discard=True)
+        return True
+
+    def is_loading(self) -> bool:
+        return self.loader is not None
+
+    def _on_batch_ready(self, batch: list):
+        # 取消後仍在佇列中的批次直接丟棄
+        if self.loader is None:
+            return
+        self.cdb.add_batch(batch)
+        self.batch_loaded.emit(self)
+
+    def _on_progress(self, loaded: int, total: int):
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(loaded)
+
+    def _on_failed(self, msg: str):
+        show.error(f"CDB 載入時發生錯誤\n{self.cdb.path}\n{msg}")
+
+    def _on_save_failed(self, msg: str):
+        show.error(f"CDB 保存時發生錯誤\n{self.cdb.path}\n{msg}")
+
+    def _on_finished(self):
+        if self.loader is None:
+            return
+        self.loader = None
+        self.cdb.end_load()
+        self.progress_bar.setVisible(False)
+        self.fileBtn.setToolTip("")
+
     # ---------------- 按鈕事件 ----------------
     def on_clicked(self):
         self.click_cdbfile.emit(self)
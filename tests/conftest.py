@@ -0,0 +1,14 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """整個測試期間共用一個 QApplication, 共用的卡圖載入器等物件才不會被刪除"""
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,30 @@
+import os
+import sys
+import base64
+import subprocess
+from scripts.global_set import app_set
+
+
+def test_import_does_not_load_embedded_res():
+    """匯入 app_set 時不匯入內嵌的 base64 資源"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        "import sys\n"
+        "import scripts.global_set.app_set\n"
+        "print('scripts.global_set.app_res' in sys.modules)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=root, capture_output=True, text=True
+    ).stdout
+    assert out.strip() == "False"
+
+
+def test_res_files_match_embedded(tmp_path):
+    """resource 中的檔案與內嵌的資料相同, 檔案不存在時退回內嵌的資料"""
+    from scripts.global_set import app_res
+
+    icon = base64.b64decode(app_res.icon_base64)
+    cover = base64.b64decode(app_res.cover_base64)
+    assert app_set.get_app_icon_code() == icon
+    assert app_set.get_cover_code() == cover
+    assert app_set._read_res(str(tmp_path / "none.png"), "icon_base64") == icon
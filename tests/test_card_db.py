@@ -0,0 +1,332 @@
+import os
+import sqlite3
+import pytest
+import scripts.global_set.card_db as card_db
+import scripts.basic_item.msg_item as show
+from scripts.global_set.card_db import CDB, Card, create_database_file
+from scripts.global_set.card_search import SqlTextIndex
+
+
+@pytest.fixture
+def errors(monkeypatch) -> list[str]:
+    """以列表記錄 show.error, 不顯示對話框"""
+    msgs = []
+    monkeypatch.setattr(show, "error", lambda msg, frame=None: msgs.append(msg))
+    return msgs
+
+
+def new_card(id: int) -> Card:
+    card = Card(id)
+    card.name = f"name{id}"
+    card.desc = f"desc{id}"
+    card.hints = [f"hint{id}"] + [""] * 15
+    return card
+
+
+def test_lazy_add_cards_retry_after_failed_save(tmp_path, monkeypatch, errors):
+    """保存失敗後重試, 延遲載入模式下仍寫入完整的文本"""
+    path = str(tmp_path / "test.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path, lazy=True)
+    monkeypatch.setattr(card_db, "TEXT_CACHE_SIZE", 2)
+    write_card_rows = card_db.write_card_rows
+    calls = []
+
+    def fail_once(conn, rows):
+        calls.append(rows)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        write_card_rows(conn, rows)
+
+    monkeypatch.setattr(card_db, "write_card_rows", fail_once)
+    cdb.add_cards([new_card(id) for id in range(1, 6)])
+    assert len(errors) == 1
+    cdb.save()
+    cdb.close()
+
+    with sqlite3.connect(path) as conn:
+        texts = conn.execute("SELECT id, desc, str1 FROM texts ORDER BY id").fetchall()
+    assert texts == [(id, f"desc{id}", f"hint{id}") for id in range(1, 6)]
+
+
+def test_lazy_search_queries_file(tmp_path, errors):
+    """延遲載入時搜索直接查詢檔案, 不在記憶體中複製所有文本"""
+    path = str(tmp_path / "test.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path, lazy=True)
+    cdb.add_cards([new_card(id) for id in range(1, 6)])
+    cdb.search_text("desc3")
+    assert isinstance(cdb._text_index, SqlTextIndex)
+    assert cdb.show_id_lst == [3]
+    cdb.close()
+    assert errors == []
+
+
+@pytest.fixture
+def cdb(tmp_path, errors) -> CDB:
+    path = str(tmp_path / "cards.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path)
+    cdb.add_cards([new_card(id) for id in (10, 20, 30)])
+    yield cdb
+    cdb.close()
+
+
+def test_put_cards_keeps_selection(cdb):
+    """在選中的卡之前插入新卡, 選中的仍是原本的卡"""
+    cdb.select_id_lst.reset_ids([20, 30])
+    cdb._put_cards([new_card(5), new_card(25)])
+    assert list(cdb.select_id_lst) == [20, 30]
+
+
+@pytest.mark.parametrize(
+    "policy, added, names",
+    [
+        (card_db.CONFLICT_OVERWRITE, [10, 40], {10: "new10", 11: None}),
+        (card_db.CONFLICT_SKIP, [40], {10: "name10", 11: None}),
+        (card_db.CONFLICT_RENUMBER, [11, 40], {10: "name10", 11: "new10"}),
+    ],
+)
+def test_add_cards_conflict(cdb, policy, added, names):
+    cards = [new_card(10), new_card(40)]
+    cards[0].name = "new10"
+    assert cdb.add_cards(cards, policy) == added
+    for id, name in names.items():
+        assert (cdb.card_dict[id].name if id in cdb.card_dict else None) == name
+
+
+def test_add_cards_asks_once(cdb, monkeypatch):
+    """貼上多張已存在的卡只詢問一次, 並以選擇的方式處理所有衝突"""
+    asked = []
+    skip = list(card_db.CONFLICT_CHOICES).index(card_db.CONFLICT_SKIP)
+    monkeypatch.setattr(
+        show, "choose", lambda msg, opts, frame=None: asked.append(msg) or skip
+    )
+    assert cdb.add_cards([new_card(id) for id in (10, 20, 30, 40)]) == [40]
+    assert len(asked) == 1
+
+
+def test_add_cards_ask_cancel(cdb, monkeypatch):
+    monkeypatch.setattr(show, "choose", lambda msg, opts, frame=None: -1)
+    assert cdb.add_cards([new_card(10), new_card(40)]) == []
+    assert 40 not in cdb.card_dict
+
+
+def test_lazy_text_released_after_save(tmp_path, monkeypatch, errors):
+    """尚未保存時離開文本快取的卡, 保存後釋放文本"""
+    path = str(tmp_path / "test.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path, lazy=True)
+    cdb.add_cards([new_card(id) for id in range(1, 6)])
+    monkeypatch.setattr(card_db, "TEXT_CACHE_SIZE", 2)
+    write_card_rows = card_db.write_card_rows
+    monkeypatch.setattr(card_db, "write_card_rows", lambda conn, rows: 1 / 0)
+    card = cdb.get_card(1).copy()
+    card.desc = "edited"
+    cdb.save_card(card)
+    for id in range(2, 6):
+        cdb.get_card(id)
+    assert cdb.card_dict[1].text_loaded  # 尚未保存, 保留文本
+    monkeypatch.setattr(card_db, "write_card_rows", write_card_rows)
+    cdb.save()
+    assert not cdb.card_dict[1].text_loaded
+    assert cdb.get_card(1).desc == "edited"
+    cdb.close()
+
+
+def test_undo_redo(cdb, monkeypatch):
+    monkeypatch.setattr(show, "quest", lambda msg, frame=None: True)
+    card = cdb.get_card(20).copy()
+    card.desc = "edited"
+    cdb.save_card(card)
+    cdb.del_id(30)
+    assert cdb.undo()
+    assert cdb.has_id(30)
+    assert cdb.undo()
+    assert cdb.get_card(20).desc == "desc20"
+    assert cdb.redo()
+    assert cdb.get_card(20).desc == "edited"
+    assert cdb.redo()
+    assert not cdb.has_id(30)
+    assert not cdb.redo()
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_load_rows_without_texts(tmp_path, errors, lazy):
+    """datas 與 texts 的寫入順序與列數不同時, 沒有 texts 的卡片仍會載入"""
+    path = str(tmp_path / "test.cdb")
+    create_database_file(path)
+    with sqlite3.connect(path) as conn:
+        for id in (30, 10, 40, 20):
+            conn.execute(card_db.sql_insert_datas, new_card(id).get_data_row())
+        # 40 沒有 texts, 50 只有 texts
+        for id in (20, 50, 10, 30):
+            conn.execute(card_db.sql_insert_texts, new_card(id).get_text_row())
+    conn.close()
+
+    cdb = CDB.create(path, lazy=lazy)
+    assert cdb.id_index == [10, 20, 30, 40]
+    assert cdb.get_name(40) == ""
+    assert cdb.get_card(30).desc == "desc30"
+    assert cdb.get_card(40).desc == ""
+    cdb.close()
+    pages = [c.id for batch in card_db.iter_card_pages(path, lazy, 3) for c in batch]
+    assert pages == [10, 20, 30, 40]
+    assert errors == []
+
+
+def test_save_only_changed_rows(cdb, monkeypatch):
+    """保存時只寫入修改與刪除的卡, 其他卡的列保持不變"""
+    monkeypatch.setattr(show, "quest", lambda msg, frame=None: True)
+    write_card_rows = card_db.write_card_rows
+    written = []
+
+    def record(conn, rows):
+        written.append(dict(rows))
+        write_card_rows(conn, rows)
+
+    monkeypatch.setattr(card_db, "write_card_rows", record)
+    card = cdb.get_card(20).copy()
+    card.desc = "edited"
+    cdb.save_card(card)
+    cdb.del_id(30)
+    assert [list(rows) for rows in written] == [[20], [30]]
+    assert written[1][30] is None
+
+    with sqlite3.connect(cdb.path) as conn:
+        texts = conn.execute("SELECT id, desc FROM texts ORDER BY id").fetchall()
+        datas = conn.execute("SELECT id FROM datas ORDER BY id").fetchall()
+    conn.close()
+    assert texts == [(10, "desc10"), (20, "edited")]
+    assert datas == [(10,), (20,)]
+
+
+def test_id_index_stays_sorted(cdb, monkeypatch):
+    """增刪卡片後 id_index 仍為排序的 id 列表, 未篩選時與 show_id_lst 共用"""
+    monkeypatch.setattr(show, "quest", lambda msg, frame=None: True)
+    cdb.save_card(new_card(15))
+    cdb.add_cards([new_card(id) for id in (40, 1, 25)])
+    cdb.del_id(20)
+    cdb.select_id_lst.reset_ids([1, 30])
+    cdb.del_select_card()
+    assert cdb.id_index == [10, 15, 25, 40]
+    assert cdb.id_index == sorted(cdb.card_dict)
+    assert cdb.show_id_lst is cdb.id_index
+
+
+@pytest.mark.parametrize(
+    "prefix, expected",
+    [
+        ("1", [1, 10, 12, 100, 123, 1999]),
+        ("12", [12, 123]),
+        ("20", [200, 2000]),
+        ("0", []),
+        ("012", []),
+        ("1a", []),
+        ("３", []),  # 全形數字
+        ("99999", []),
+    ],
+)
+def test_match_id_prefix(prefix, expected):
+    ids = [1, 2, 10, 12, 21, 100, 123, 200, 1999, 2000]
+    assert card_db.match_id_prefix(ids, prefix) == expected
+
+
+def test_search_id(cdb):
+    cdb.add_cards([new_card(id) for id in (1, 100, 2000)])
+    cdb.search_id("1")
+    assert cdb.show_id_lst == [1, 10, 100]
+    assert cdb.now_id == 1
+    cdb.search_id("")
+    assert cdb.show_id_lst is cdb.id_index
+
+
+def test_get_show_pos(cdb):
+    """未篩選時以二分搜尋, 篩選後以 id -> 位置的 dict 查詢, 列表替換後重建"""
+    assert [cdb.get_show_pos(id) for id in (10, 20, 30, 15)] == [0, 1, 2, -1]
+    cdb.show_id_lst = [30, 10]
+    assert [cdb.get_show_pos(id) for id in (10, 20, 30)] == [1, -1, 0]
+    cdb.show_id_lst = [20]
+    assert [cdb.get_show_pos(id) for id in (10, 20, 30)] == [-1, 0, -1]
+
+
+def test_background_load_keeps_edits(tmp_path, monkeypatch, errors):
+    """背景載入期間的修改與刪除以記憶體中的為準, 重複的批次不會加回已刪除的卡"""
+    monkeypatch.setattr(show, "quest", lambda msg, frame=None: True)
+    path = str(tmp_path / "cards.cdb")
+    create_database_file(path)
+    src = CDB.create(path)
+    src.add_cards([new_card(id) for id in range(1, 11)])
+    src.close()
+    cdb = CDB(path)
+    cdb.begin_load()
+    batches = list(card_db.iter_card_pages(path, batch_size=4))
+    assert [len(b) for b in batches] == [4, 4, 2]
+    cdb.add_batch(batches[0])
+    assert cdb.now_id == 1
+    cdb.del_id(3)
+    card = new_card(6)
+    card.name = "edited"
+    cdb.save_card(card)
+    for batch in batches:
+        cdb.add_batch(batch)
+    cdb.end_load()
+    assert cdb.id_index == [1, 2, 4, 5, 6, 7, 8, 9, 10]
+    assert cdb.get_name(6) == "edited"
+    cdb.close()
+
+
+def test_add_cards_commits_once(cdb, monkeypatch):
+    """一次貼上多張卡只寫入一次, 撤銷時一次移除"""
+    write_card_rows = card_db.write_card_rows
+    written = []
+
+    def record(conn, rows):
+        written.append(sorted(rows))
+        write_card_rows(conn, rows)
+
+    monkeypatch.setattr(card_db, "write_card_rows", record)
+    cards = [new_card(id) for id in range(100, 200)]
+    assert cdb.add_cards(cards) == list(range(100, 200))
+    assert written == [list(range(100, 200))]
+    assert list(cdb.select_id_lst) == list(range(100, 200))
+    assert cdb.now_id == 199
+    # 放入的是副本, 之後修改傳入的卡不影響 cdb
+    cards[0].name = "changed"
+    assert cdb.get_name(100) == "name100"
+    assert cdb.undo()
+    assert cdb.id_index == [10, 20, 30]
+    assert len(written) == 2
+
+
+def test_connection_reused_and_journal_restored(cdb):
+    """每個 cdb 只使用一條 WAL 連線, 關閉後檔案切回一般日誌模式"""
+    conn = cdb._get_conn()
+    cdb.save_card(new_card(40))
+    cdb.get_card(40)
+    assert cdb._get_conn() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert cdb.close() is None
+    assert cdb._conn is None
+    with sqlite3.connect(cdb.path) as other:
+        assert other.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    other.close()
+    assert not os.path.exists(cdb.path + "-wal")
+
+
+def test_undo_multi_delete_writes_file(cdb, monkeypatch):
+    """撤銷多張刪除一次恢復並寫入檔案, 恢復的卡成為選中的卡; 之後的新變更清空重做"""
+    monkeypatch.setattr(show, "quest", lambda msg, frame=None: True)
+    cdb.select_id_lst.reset_ids([10, 30])
+    cdb.del_select_card()
+    assert cdb.id_index == [20]
+    assert cdb.undo()
+    assert cdb.id_index == [10, 20, 30]
+    assert list(cdb.select_id_lst) == [10, 30]
+    with sqlite3.connect(cdb.path) as conn:
+        rows = conn.execute("SELECT id, name, str1 FROM texts ORDER BY id").fetchall()
+    conn.close()
+    assert rows == [(id, f"name{id}", f"hint{id}") for id in (10, 20, 30)]
+    cdb.save_card(new_card(40))
+    assert not cdb.redo()
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import pytest
+import scripts.basic_item.msg_item as show
+from scripts.global_set.card_db import CDB, Card, create_database_file
+from scripts.global_set.card_db_ro import ReadOnlyCDB
+
+
+@pytest.fixture
+def errors(monkeypatch) -> list[str]:
+    """以列表記錄 show.error, 不顯示對話框"""
+    msgs = []
+    monkeypatch.setattr(show, "error", lambda msg, frame=None: msgs.append(msg))
+    return msgs
+
+
+def new_card(id: int) -> Card:
+    card = Card(id)
+    card.name = f"name{id}"
+    card.desc = f"desc{id}"
+    return card
+
+
+@pytest.fixture
+def cdb_path(tmp_path) -> str:
+    path = str(tmp_path / "test.cdb")
+    create_database_file(path)
+    return path
+
+
+def test_open_with_pending_wal(cdb_path, errors):
+    """其他程式仍開啟 (wal 尚未寫回) 時也能看到最新的卡片"""
+    cdb = CDB.create(cdb_path)
+    cdb.add_cards([new_card(id) for id in range(1, 4)])
+    assert os.path.getsize(cdb_path + "-wal") > 0
+    ro_cdb = ReadOnlyCDB.create(cdb_path)
+    assert list(ro_cdb.id_index) == [1, 2, 3]
+    assert ro_cdb.get_card(2).desc == "desc2"
+    ro_cdb.close()
+    cdb.close()
+    assert errors == []
+
+
+def test_search_after_close(cdb_path, errors):
+    cdb = CDB.create(cdb_path)
+    cdb.add_cards([new_card(id) for id in range(1, 4)])
+    cdb.close()
+    ro_cdb = ReadOnlyCDB.create(cdb_path)
+    ro_cdb.search_text("name2")
+    ro_cdb.close()
+    ro_cdb.search_text("name3")
+    assert ro_cdb.show_id_lst == [3]
+    ro_cdb.close()
+    assert errors == []
+
+
+def test_search_without_text_index(cdb_path, monkeypatch, errors):
+    """無法建立文本索引時退回比對卡名"""
+    import scripts.global_set.card_db_ro as card_db_ro
+
+    cdb = CDB.create(cdb_path)
+    cdb.add_cards([new_card(id) for id in range(1, 4)])
+    cdb.close()
+
+    def fail(conn):
+        raise sqlite3.OperationalError("no such table: texts")
+
+    monkeypatch.setattr(card_db_ro, "SqlTextIndex", fail)
+    ro_cdb = ReadOnlyCDB.create(cdb_path)
+    ro_cdb.search_text("name2")
+    assert ro_cdb.show_id_lst == [2]
+    assert len(errors) == 1
+    ro_cdb.close()
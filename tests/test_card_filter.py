@@ -0,0 +1,113 @@
+import random
+import pytest
+from scripts.global_set.card_filter import AttrIndex
+
+# (id, 類型) : 造物, 通常 / 速攻 / 永续 / 装备 启迪, 通常 / 永续 / 反击 灾祸
+CARD_TYPES: dict[int, int] = {
+    1: 0x1,
+    2: 0x2,
+    3: 0x12,
+    4: 0x22,
+    5: 0x42,
+    6: 0x4,
+    7: 0x24,
+    8: 0x84,
+    9: 0x2,
+}
+CALL_SUB_MASK: int = 0x10 | 0x20 | 0x40  # 启迪卡所有子類型的位元
+
+
+@pytest.fixture
+def index() -> AttrIndex:
+    return AttrIndex((id, 0, 0, typ, 0, 0, 0, 0, 0) for id, typ in CARD_TYPES.items())
+
+
+def test_normal_sub_type_excludes_other_sub_types(index):
+    assert index.query(0x2, sub_mask=CALL_SUB_MASK) == [2, 9]
+
+
+def test_sub_type(index):
+    assert index.query(0x12, sub_mask=CALL_SUB_MASK) == [3]
+
+
+def test_any_sub_type(index):
+    assert index.query(0x2) == [2, 3, 4, 5, 9]
+
+
+def test_filter_dialog_normal_spell(index):
+    """在篩選視窗選擇 启迪卡 / 通常"""
+    from PyQt6.QtWidgets import QApplication
+    from scripts.data_edit.filter_item import FilterDialog
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    dialog = FilterDialog()
+    dialog.main_typ.setCurrentIndex(dialog.main_typ.findText("启迪卡"))
+    dialog.sub_typ.setCurrentIndex(dialog.sub_typ.findText("通常"))
+    args = dialog.get_filter()
+    assert index.query(args["type_mask"], sub_mask=args["sub_mask"]) == [2, 9]
+
+
+def data_row(id: int, setcode: int = 0, atk: int = 0, race: int = 0) -> tuple:
+    return (id, 0, setcode, 0x1, 0, atk, 0, race, 0)
+
+
+def test_setcode_lanes():
+    """setcode 的任一 16 位元字段相同即符合, 0 只符合沒有字段的卡"""
+    index = AttrIndex(
+        [
+            data_row(1, 0x12),
+            data_row(2, 0x34_0012),
+            data_row(3, 0x0012_0034_0000),
+            data_row(4, 0x5),
+            data_row(5, 0),
+        ]
+    )
+    assert index.query(setcode=0x12) == [1, 2, 3]
+    assert index.query(setcode=0x34) == [2, 3]
+    assert index.query(setcode=0x99) == []
+    assert index.query(setcode=0) == [5]
+
+
+def test_update_and_remove_keep_lanes():
+    """更新與移除後字段的 bitset 跟著改變, 空出的序號會被重用"""
+    index = AttrIndex([data_row(1, 0x12), data_row(2, 0x12_0034)])
+    index.update(data_row(1, 0x34))
+    assert index.query(setcode=0x12) == [2]
+    assert index.query(setcode=0x34) == [1, 2]
+    index.remove(2)
+    assert index.query(setcode=0x12) == []
+    index.update(data_row(9, 0x12))
+    assert index.query(setcode=0x12) == [9]
+    assert index.query() == [1, 9]
+    index.remove(100)  # 不存在的 id 直接忽略
+
+
+def test_query_matches_scan():
+    """組合條件的結果與逐張比對一致"""
+    rng = random.Random(8)
+    rows = [
+        data_row(
+            id,
+            rng.choice([0, 0x1, 0x2, 0x1_0002]),
+            rng.randrange(0, 5000, 500),
+            rng.choice([0, 0x1, 0x2, 0x3]),
+        )
+        for id in range(1, 300)
+    ]
+    index = AttrIndex(rows)
+    for _ in range(50):
+        setcode = rng.choice([None, 0, 0x1, 0x2])
+        atk = rng.choice([None, (1000, 3000)])
+        race = rng.choice([None, 0, 0x1])
+        expected = [
+            r[0]
+            for r in rows
+            if (
+                setcode is None
+                or (setcode and setcode in (r[2] & 0xFFFF, r[2] >> 16))
+                or (setcode == 0 and r[2] == 0)
+            )
+            and (atk is None or atk[0] <= r[5] <= atk[1])
+            and (race is None or (r[7] & race if race else not r[7]))
+        ]
+        assert index.query(atk_range=atk, setcode=setcode, race=race) == expected
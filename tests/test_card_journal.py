@@ -0,0 +1,55 @@
+import pytest
+from scripts.global_set.card_journal import CardJournal, make_delta, apply_delta
+
+ROW_A: tuple = (1, 0, 0, 0x2, 0, 100, 0, 0, 0, "name", "desc") + ("",) * 16
+ROW_B: tuple = (1, 0, 0, 0x12, 0, 200, 0, 0, 0, "name", "new desc") + ("",) * 16
+
+
+@pytest.mark.parametrize(
+    "before, after",
+    [(ROW_A, ROW_B), (None, ROW_A), (ROW_A, None)],
+)
+def test_delta_round_trip(before, after):
+    delta = make_delta(before, after)
+    assert apply_delta(delta, after, True) == before
+    assert apply_delta(delta, before, False) == after
+
+
+def test_modify_delta_keeps_changed_cols():
+    cols, old, new = make_delta(ROW_A, ROW_B)
+    assert cols == (3, 5, 10)
+    assert old == (0x2, 100, "desc")
+    assert new == (0x12, 200, "new desc")
+
+
+def test_no_delta():
+    assert make_delta(ROW_A, ROW_A) is None
+    assert make_delta(None, None) is None
+
+
+def test_undo_redo_order():
+    journal = CardJournal()
+    journal.record({1: None}, {1: ROW_A})
+    journal.record({1: ROW_A}, {1: ROW_B})
+    assert journal.undo_entry() == {1: make_delta(ROW_A, ROW_B)}
+    assert journal.undo_entry() == {1: (None, ROW_A)}
+    assert not journal.can_undo()
+    assert journal.redo_entry() == {1: (None, ROW_A)}
+    # 新的紀錄會清空重做紀錄
+    journal.record({2: None}, {2: ROW_A})
+    assert not journal.can_redo()
+
+
+def test_byte_limit_drops_oldest():
+    journal = CardJournal()
+    journal.record({1: None}, {1: ROW_A})
+    size = journal.memory_bytes()
+    journal.max_bytes = size * 3
+    for id in range(2, 10):
+        journal.record({id: None}, {id: ROW_A})
+    assert journal.memory_bytes() <= journal.max_bytes
+    # 只保留最新的紀錄
+    entries = []
+    while (entry := journal.undo_entry()) is not None:
+        entries.append(next(iter(entry)))
+    assert entries == [9, 8, 7]
@@ -0,0 +1,77 @@
+import pytest
+from PyQt6.QtCore import Qt
+from scripts.global_set.card_db import CDB, Card, create_database_file
+from scripts.data_edit.card_list_item import CardListModel, SELECT_BG
+
+
+@pytest.fixture
+def cdb(tmp_path):
+    path = str(tmp_path / "cards.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path)
+    cards = []
+    for id in (10, 20, 30):
+        card = Card(id)
+        card.name = f"name{id}"
+        cards.append(card)
+    cdb.add_cards(cards)
+    yield cdb
+    cdb.close()
+
+
+def test_model_reads_show_id_lst(cdb, qapp):
+    """模型直接讀取 show_id_lst, 篩選後 reset 即可"""
+    model = CardListModel()
+    model.set_cdb(cdb)
+    cdb.select_id_lst.reset_ids([20])
+    assert model.rowCount() == 3
+    assert model.data(model.index(1, 0)) == "20"
+    assert model.data(model.index(1, 1)) == "name20"
+    assert model.data(model.index(1, 0), Qt.ItemDataRole.BackgroundRole) == SELECT_BG
+    assert model.data(model.index(0, 0), Qt.ItemDataRole.BackgroundRole) is None
+    cdb.search_id("3")
+    model.reset()
+    assert model.rowCount() == 1
+    assert model.data(model.index(0, 1)) == "name30"
+
+
+def test_sync_rows_inserts_only_new_rows(cdb, qapp):
+    """背景載入增加卡片時只通知新增的行, 不重置 view"""
+    model = CardListModel()
+    model.set_cdb(cdb)
+    inserted, resets = [], []
+    model.rowsInserted.connect(
+        lambda parent, first, last: inserted.append((first, last))
+    )
+    model.modelReset.connect(lambda: resets.append(True))
+    cdb.add_batch([Card(40), Card(50)])
+    model.sync_rows()
+    assert inserted == [(3, 4)]
+    assert resets == []
+    assert model.rowCount() == 5
+
+
+def test_keyboard_move_and_shift_range(cdb, qapp, monkeypatch):
+    """上下鍵在篩選後的列表中移動, Shift 點擊選中從當前卡到點擊的卡"""
+    from PyQt6.QtWidgets import QApplication, QHBoxLayout, QWidget
+    from scripts.data_edit.card_list_item import CardListItem
+
+    parent = QWidget()
+    card_list = CardListItem(QHBoxLayout(parent))
+    card_list.set_data_source(cdb)
+    cdb.show_id_lst = [30, 10, 20]
+    cdb.now_id = 30
+    card_list._move_index(1)
+    assert cdb.now_id == 10
+    card_list._move_index(-1)
+    card_list._move_index(-1)  # 已在第一行, 不移動
+    assert cdb.now_id == 30
+    monkeypatch.setattr(
+        QApplication,
+        "keyboardModifiers",
+        staticmethod(lambda: Qt.KeyboardModifier.ShiftModifier),
+    )
+    card_list.on_row_clicked(2)
+    assert list(cdb.select_id_lst) == [30, 10, 20]
+    assert cdb.now_id == 20
+    card_list.prefetcher.wait()
@@ -0,0 +1,77 @@
+import os
+import time
+import pytest
+import scripts.data_edit.card_prefetch as card_prefetch
+from scripts.global_set.card_db import CDB, Card, create_database_file
+from scripts.data_edit.card_prefetch import CardPrefetcher
+
+
+class FakePicLoader:
+    """記錄預先載入的卡圖與優先度"""
+
+    def __init__(self):
+        self.calls = []
+
+    def prefetch(self, path: str, priority: int = 0, write_thumb: bool = True):
+        self.calls.append((int(os.path.basename(path)[1:-4]), priority))
+
+    def cancel_prefetch(self):
+        self.calls.clear()
+
+
+@pytest.fixture
+def cdb(tmp_path):
+    path = str(tmp_path / "cards.cdb")
+    create_database_file(path)
+    src = CDB.create(path)
+    cards = []
+    for id in range(1, 31):
+        card = Card(id)
+        card.name = f"name{id}"
+        card.desc = f"desc{id}"
+        cards.append(card)
+    src.add_cards(cards)
+    src.close()
+    cdb = CDB.create(path, lazy=True)
+    yield cdb
+    cdb.close()
+
+
+@pytest.fixture
+def loader(monkeypatch) -> FakePicLoader:
+    loader = FakePicLoader()
+    monkeypatch.setattr(card_prefetch, "get_pic_loader", lambda: loader)
+    return loader
+
+
+def test_schedule_order(cdb, loader, qapp):
+    """移動方向的卡優先, 再來是反方向與頁面中的卡, 越近的優先度越高"""
+    prefetcher = CardPrefetcher(near=3)
+    prefetcher.schedule(cdb, 10, -1, (8, 14))
+    ids = [cdb.show_id_lst[p] for p in (9, 8, 7, 11, 12, 13, 14)]
+    assert loader.calls == [(id, -i) for i, id in enumerate(ids)]
+    prefetcher.wait()
+
+
+def test_prefetch_texts(cdb, loader, qapp):
+    """背景讀取的文本在主執行緒放入 cdb, 之後 get_card 不需再讀取檔案"""
+    prefetcher = CardPrefetcher(near=2)
+    prefetcher.schedule(cdb, 0, 1, (0, 0))
+    prefetcher.pool.waitForDone()
+    deadline = time.monotonic() + 5
+    while not cdb.card_dict[3].text_loaded and time.monotonic() < deadline:
+        qapp.processEvents()
+    assert cdb.card_dict[2].text_loaded and cdb.card_dict[3].text_loaded
+    assert not cdb.card_dict[4].text_loaded
+    assert cdb.card_dict[3].desc == "desc3"
+
+
+def test_prefetched_texts_skip_edited(cdb):
+    """已在記憶體中修改的卡不會被檔案中的舊文本覆蓋"""
+    card = cdb.get_card(5).copy()
+    card.desc = "edited"
+    cdb.save_card(card)
+    cdb.card_dict[6].unload_text()
+    cdb.put_prefetched_texts({5: ("old",) + ("",) * 16, 6: ("desc6",) + ("",) * 16})
+    assert cdb.get_card(5).desc == "edited"
+    assert cdb.card_dict[6].text_loaded
@@ -0,0 +1,57 @@
+import sqlite3
+import pytest
+from scripts.global_set.app_set import QUERY_CHUNK_SIZE
+from scripts.global_set.card_db import CDB, Card, create_database_file
+from scripts.global_set.card_search import FtsTextIndex, SqlTextIndex, _has_fts5_trigram
+
+CARD_COUNT: int = QUERY_CHUNK_SIZE * 2 + 100  # 縮小搜索時需分多批查詢
+
+
+@pytest.fixture
+def cdb_path(tmp_path) -> str:
+    path = str(tmp_path / "test.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path)
+    cards = []
+    for id in range(1, CARD_COUNT + 1):
+        card = Card(id)
+        card.name = f"card{id}"
+        card.desc = "odd" if id % 2 else "even"
+        cards.append(card)
+    cdb.add_cards(cards)
+    cdb.close()
+    return path
+
+
+def check_refine(text_index):
+    """縮小搜索只保留上次結果中符合的 id, 並保留原本的順序"""
+    within = list(range(CARD_COUNT, 0, -1))
+    res = text_index.query("odd", within)
+    assert res == [id for id in within if id % 2]
+
+
+@pytest.mark.skipif(not _has_fts5_trigram(), reason="sqlite 不支援 fts5 trigram")
+def test_fts_refine(cdb_path):
+    text_index = FtsTextIndex(cdb_path)
+    check_refine(text_index)
+    text_index.close()
+
+
+def test_sql_refine(cdb_path):
+    conn = sqlite3.connect(cdb_path)
+    check_refine(SqlTextIndex(conn))
+    conn.close()
+
+
+def test_sql_pending_changes(cdb_path):
+    """尚未寫入檔案的變更與刪除合併到查詢結果"""
+    conn = sqlite3.connect(cdb_path)
+    text_index = SqlTextIndex(conn)
+    text_index.update(2, "card2", "odd", ())
+    text_index.update(CARD_COUNT + 1, "odd card", "", ())
+    text_index.remove(3)
+    res = text_index.query("odd")
+    assert res[0] == CARD_COUNT + 1  # 卡名命中優先
+    assert 2 in res and 3 not in res
+    assert text_index.query("odd", [4, 3, 2, 1]) == [2, 1]
+    conn.close()
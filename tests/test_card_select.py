@@ -0,0 +1,100 @@
+import random
+from bisect import bisect_left
+from scripts.global_set.card_select import CardSelection
+
+
+class IdList:
+    """模擬 CDB 的 show_id_lst (可原地修改或整個替換)"""
+
+    def __init__(self, ids: list[int]):
+        self.lst = ids
+
+    def pos(self, id: int) -> int:
+        return self.lst.index(id) if id in self.lst else -1
+
+    def selection(self) -> CardSelection:
+        return CardSelection(lambda: self.lst, self.pos)
+
+
+def test_ranges_merge_and_split():
+    show = IdList(list(range(0, 100, 10)))
+    sel = show.selection()
+    sel.add_range(2, 4)
+    sel.add_range(6, 7)
+    assert sel.ranges() == [(2, 4), (6, 7)]
+    sel.add(50)  # 位置 5, 與兩側相連
+    assert sel.ranges() == [(2, 7)]
+    assert len(sel) == 6
+    sel.discard(40)
+    assert sel.ranges() == [(2, 3), (5, 7)]
+    assert list(sel) == [20, 30, 50, 60, 70]
+    assert 40 not in sel and 50 in sel
+    assert list(sel.iter_pos()) == [2, 3, 5, 6, 7]
+
+
+def test_insert_and_remove_pos():
+    show = IdList([10, 20, 30, 40])
+    sel = show.selection()
+    sel.add_range(1, 2)
+    # 在選中區間中插入, 新的位置不會被選中
+    show.lst.insert(2, 25)
+    sel.insert_pos(2)
+    assert list(sel) == [20, 30]
+    assert sel.ranges() == [(1, 1), (3, 3)]
+    # 刪除使兩段區間相連
+    del show.lst[2]
+    sel.remove_pos(2)
+    assert sel.ranges() == [(1, 2)]
+    del show.lst[1]
+    sel.remove_pos(1)
+    assert list(sel) == [30] and len(sel) == 1
+
+
+def test_sync_after_list_replaced():
+    """show_id_lst 被替換時以 id 換算到新列表的位置, 不在新列表中的取消選中"""
+    show = IdList([10, 20, 30, 40, 50])
+    sel = show.selection()
+    sel.add_range(1, 3)
+    show.lst = [50, 40, 10]
+    assert list(sel) == [40]
+    assert sel.ranges() == [(1, 1)]
+    assert len(sel) == 1
+
+
+def test_matches_set_model():
+    """隨機操作的結果與以 set 儲存選中 id 的實作一致"""
+    rng = random.Random(12)
+    show = IdList(sorted(rng.sample(range(1000), 60)))
+    sel = show.selection()
+    expected: set[int] = set()
+    for _ in range(2000):
+        op = rng.randrange(5)
+        n = len(show.lst)
+        if op == 0 and n:
+            st = rng.randrange(n)
+            ed = min(n - 1, st + rng.randrange(8))
+            sel.add_range(st, ed)
+            expected.update(show.lst[st : ed + 1])
+        elif op == 1 and n:
+            id = rng.choice(show.lst)
+            sel.discard(id)
+            expected.discard(id)
+        elif op == 2:
+            id = rng.randrange(1000)
+            if id not in show.lst:
+                pos = bisect_left(show.lst, id)
+                show.lst.insert(pos, id)
+                sel.insert_pos(pos)
+        elif op == 3 and n:
+            pos = rng.randrange(n)
+            expected.discard(show.lst.pop(pos))
+            sel.remove_pos(pos)
+        elif op == 4 and rng.random() < 0.1:
+            show.lst = [id for id in show.lst if rng.random() < 0.8]
+            expected &= set(show.lst)
+        assert list(sel) == [id for id in show.lst if id in expected]
+        assert len(sel) == len(expected)
+    starts = [st for st, _ in sel.ranges()]
+    ends = [ed for _, ed in sel.ranges()]
+    # 區間不重疊也不相連
+    assert all(ends[i] + 1 < starts[i + 1] for i in range(len(starts) - 1))
@@ -0,0 +1,153 @@
+import time
+import sqlite3
+import pytest
+from PyQt6.QtCore import Qt
+import scripts.global_set.card_writer as card_writer
+import scripts.basic_item.msg_item as show
+from scripts.global_set.card_db import CDB, Card, create_database_file
+from scripts.global_set.card_writer import CdbWriter
+
+
+@pytest.fixture
+def errors(monkeypatch) -> list[str]:
+    """以列表記錄 show.error, 不顯示對話框"""
+    msgs = []
+    monkeypatch.setattr(show, "error", lambda msg, frame=None: msgs.append(msg))
+    return msgs
+
+
+@pytest.fixture
+def cdb_path(tmp_path) -> str:
+    path = str(tmp_path / "test.cdb")
+    create_database_file(path)
+    return path
+
+
+@pytest.fixture
+def unwritable(monkeypatch):
+    """模擬無法寫入的檔案, 呼叫回傳的函式後恢復"""
+    write_card_rows = card_writer.write_card_rows
+
+    def fail(conn, rows):
+        raise sqlite3.OperationalError("attempt to write a readonly database")
+
+    monkeypatch.setattr(card_writer, "write_card_rows", fail)
+    return lambda: monkeypatch.setattr(card_writer, "write_card_rows", write_card_rows)
+
+
+def new_card(id: int) -> Card:
+    card = Card(id)
+    card.name = f"name{id}"
+    card.desc = f"desc{id}"
+    return card
+
+
+def open_with_writer(path: str) -> tuple[CDB, CdbWriter]:
+    cdb = CDB.create(path)
+    writer = CdbWriter(path, 60000)
+    writer.start()
+    cdb.set_writer(writer)
+    return cdb, writer
+
+
+def saved_ids(path: str) -> list[int]:
+    with sqlite3.connect(path) as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM texts ORDER BY id")]
+
+
+def test_close_keeps_rows_when_write_fails(cdb_path, unwritable, errors):
+    """寫入失敗時 close 回傳錯誤並保留變更, 之後可再次關閉並寫入"""
+    cdb, writer = open_with_writer(cdb_path)
+    cdb.add_cards([new_card(id) for id in range(1, 4)])
+    assert cdb.close()
+    assert writer.isRunning()
+    assert sorted(writer.pending_rows()) == [1, 2, 3]
+    assert saved_ids(cdb_path) == []
+    unwritable()
+    assert cdb.close() is None
+    assert not writer.isRunning()
+    assert saved_ids(cdb_path) == [1, 2, 3]
+
+
+def test_close_discard(cdb_path, unwritable, errors):
+    cdb, writer = open_with_writer(cdb_path)
+    cdb.add_cards([new_card(1)])
+    assert cdb.close()
+    assert cdb.close(discard=True) is None
+    assert not writer.isRunning()
+    unwritable()
+    assert saved_ids(cdb_path) == []
+
+
+def test_close_without_writer_keeps_dirty(cdb_path, monkeypatch, errors):
+    """沒有 writer 時保存失敗, close 回傳錯誤且變更仍等待保存"""
+    import scripts.global_set.card_db as card_db
+
+    cdb = CDB.create(cdb_path)
+    write_card_rows = card_db.write_card_rows
+    monkeypatch.setattr(card_db, "write_card_rows", lambda conn, rows: 1 / 0)
+    cdb.add_cards([new_card(1)])
+    assert cdb.close()
+    monkeypatch.setattr(card_db, "write_card_rows", write_card_rows)
+    assert cdb.close() is None
+    assert saved_ids(cdb_path) == [1]
+
+
+def test_flush_coalesces_rows(cdb_path, monkeypatch):
+    """同一 id 的多次變更只寫入最後一次, 每次 flush 以一次 write_card_rows 寫入"""
+    write_card_rows = card_writer.write_card_rows
+    written = []
+
+    def record(conn, rows):
+        written.append(dict(rows))
+        write_card_rows(conn, rows)
+
+    monkeypatch.setattr(card_writer, "write_card_rows", record)
+    writer = CdbWriter(cdb_path, 60000)
+    for name in ("a", "b", "c"):
+        card = new_card(1)
+        card.name = name
+        writer.put_rows({1: (card.get_data_row(), card.get_text_row())})
+    writer.put_rows({2: (new_card(2).get_data_row(), new_card(2).get_text_row())})
+    writer.put_rows({2: None})
+    writer.start()
+    assert writer.flush() is None
+    assert writer.pending_rows() == {}
+    assert len(written) == 1
+    assert written[0][1][1][1] == "c"
+    assert written[0][2] is None
+    assert writer.flush() is None  # 沒有變更時不寫入
+    assert len(written) == 1
+    assert writer.stop() is None
+    assert saved_ids(cdb_path) == [1]
+
+
+def test_write_error_keeps_rows(cdb_path, unwritable):
+    """寫入失敗時變更留在佇列, 連續失敗只回報一次, 恢復後寫入"""
+    writer = CdbWriter(cdb_path, 60000)
+    failed = []
+    writer.save_failed.connect(failed.append, Qt.ConnectionType.DirectConnection)
+    writer.start()
+    writer.put_rows({1: (new_card(1).get_data_row(), new_card(1).get_text_row())})
+    assert writer.flush()
+    writer.put_rows({2: (new_card(2).get_data_row(), new_card(2).get_text_row())})
+    assert writer.flush()
+    assert sorted(writer.pending_rows()) == [1, 2]
+    assert len(failed) == 1
+    unwritable()
+    assert writer.flush() is None
+    assert writer.pending_rows() == {}
+    assert writer.stop() is None
+    assert saved_ids(cdb_path) == [1, 2]
+
+
+def test_interval_write(cdb_path):
+    """不需要 flush, 經過 interval 後自動寫入"""
+    writer = CdbWriter(cdb_path, 10)
+    writer.start()
+    writer.put_rows({1: (new_card(1).get_data_row(), new_card(1).get_text_row())})
+    deadline = time.monotonic() + 5
+    while writer.pending_rows() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saved_ids(cdb_path) == [1]
+    writer.stop()
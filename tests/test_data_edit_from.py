@@ -0,0 +1,50 @@
+import pytest
+from PyQt6.QtCore import QTimer
+from PyQt6.QtTest import QTest
+from scripts.global_set.app_set import TYPE_MONS
+from scripts.global_set.card_db import CDB, Card, create_database_file
+from scripts.data_edit.data_edit_from import DataEditFrom
+
+
+@pytest.fixture
+def form(tmp_path, qapp):
+    path = str(tmp_path / "cards.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path)
+    cards = []
+    for id in (10, 12, 20):
+        card = Card(id)
+        card.name = f"name{id}"
+        card.type = TYPE_MONS
+        cards.append(card)
+    cdb.add_cards(cards)
+    form = DataEditFrom()
+    form.set_cdb(cdb)
+    yield form
+    cdb.close()
+
+
+def test_editing_name_keeps_list(form):
+    """在編輯區輸入新的卡名與 id 不會篩選列表"""
+    QTest.keyClicks(form.card_text.name, "new")
+    QTest.keyClicks(form.card_data.code.id, "9")
+    assert not any(t.isActive() for t in form.findChildren(QTimer))
+    assert form.card_list.cdb.show_id_lst == [10, 12, 20]
+
+
+def test_search_box_live(form):
+    """搜索框輸入中只篩選列表, Enter 後切換到第一張符合的卡"""
+    cdb = form.card_list.cdb
+    cdb.now_id = 10
+    form.refresh_edit()
+    QTest.keyClicks(form.card_list.search_box, "1")
+    form.card_list.search_timer.timeout.emit()
+    assert cdb.show_id_lst == [10, 12]
+    form.card_list.search_box.setText("name20")
+    form.card_list.search_timer.timeout.emit()
+    assert cdb.show_id_lst == [20]
+    assert cdb.now_id == 10
+    assert form.card_text.name.text() == "name10"
+    QTest.keyClick(form.card_list.search_box, "\r")
+    assert cdb.now_id == 20
+    assert form.card_text.name.text() == "name20"
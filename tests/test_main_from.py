@@ -0,0 +1,33 @@
+import os
+import time
+import pytest
+from PyQt6.QtCore import QDataStream
+from PyQt6.QtNetwork import QLocalServer
+import main_from
+
+
+@pytest.fixture
+def server_name(monkeypatch) -> str:
+    name = f"efde_test_{os.getpid()}_{time.monotonic_ns()}"
+    monkeypatch.setattr(main_from, "APP_ID", name)
+    return name
+
+
+def test_no_running_instance(server_name):
+    assert not main_from.send_to_running("a.cdb")
+
+
+def test_send_absolute_path(server_name, qapp, tmp_path, monkeypatch):
+    """將路徑以絕對路徑交給已在執行的程式"""
+    server = QLocalServer()
+    assert server.listen(server_name)
+    monkeypatch.chdir(tmp_path)
+    assert main_from.send_to_running("a.cdb")
+    deadline = time.monotonic() + 5
+    while not server.hasPendingConnections() and time.monotonic() < deadline:
+        server.waitForNewConnection(50)
+    socket = server.nextPendingConnection()
+    assert socket is not None
+    socket.waitForReadyRead(1000)
+    assert QDataStream(socket).readQString() == str(tmp_path / "a.cdb")
+    server.close()
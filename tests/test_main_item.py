@@ -0,0 +1,22 @@
+import scripts.main_item as main_item
+from scripts.global_set.card_db import CDB, Card, create_database_file, iter_card_pages
+from scripts.main_item import CdbLoader
+
+
+def test_loader_reports_batches_and_progress(tmp_path, qapp, monkeypatch):
+    """背景載入逐批送出卡片與進度"""
+    monkeypatch.setattr(
+        main_item, "iter_card_pages", lambda path, lazy: iter_card_pages(path, lazy, 3)
+    )
+    path = str(tmp_path / "cards.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path)
+    cdb.add_cards([Card(id) for id in range(1, 8)])
+    cdb.close()
+    loader = CdbLoader(path, False)
+    batches, progress = [], []
+    loader.batch_ready.connect(lambda batch: batches.append([c.id for c in batch]))
+    loader.progress.connect(lambda done, total: progress.append((done, total)))
+    loader.run()  # 在目前的執行緒中執行, 信號直接調用
+    assert batches == [[1, 2, 3], [4, 5, 6], [7]]
+    assert progress == [(3, 7), (6, 7), (7, 7)]
@@ -0,0 +1,63 @@
+import re
+import pytest
+from scripts.global_set.card_db import CDB, Card, create_database_file
+from scripts.data_edit.pic_import import PicImportJob, plan_import
+
+
+@pytest.fixture
+def cdb(tmp_path):
+    path = str(tmp_path / "cards.cdb")
+    create_database_file(path)
+    cdb = CDB.create(path)
+    cdb.add_cards([Card(id) for id in (10, 20)])
+    yield cdb
+    cdb.close()
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "import"
+    folder.mkdir()
+    for name in (
+        "10.jpg",
+        "c20.png",
+        "x.jpg",
+        "30.jpg",
+        "c10.jpg",
+        "cover.jpg",
+        "note.txt",
+    ):
+        (folder / name).write_bytes(b"")
+    return str(folder)
+
+
+def test_plan_import(folder, cdb):
+    tasks, skipped = plan_import(folder, re.compile(r"(\d+)"), cdb, True, False)
+    assert [t[0][len(folder) + 1 :] for t in tasks] == ["10.jpg", "c20.png"]
+    assert tasks[0][1] == cdb.get_pic_path(10)
+    assert skipped["文件名不匹配"] == ["cover.jpg", "x.jpg"]
+    assert skipped["CDB 中不存在"] == ["30.jpg"]
+    assert skipped["ID 重复"] == ["c10.jpg"]
+
+
+def test_plan_import_optional_group(folder, cdb):
+    """可選的群組沒有匹配時視為文件名不匹配"""
+    tasks, skipped = plan_import(folder, re.compile(r"c(\d+)?"), cdb, False, False)
+    assert [t[0][len(folder) + 1 :] for t in tasks] == ["c10.jpg", "c20.png"]
+    assert skipped["文件名不匹配"] == ["10.jpg", "30.jpg", "cover.jpg", "x.jpg"]
+
+
+def test_job_scans_folder(folder, cdb, qapp):
+    """掃描在背景執行緒中進行, 無法讀取資料夾時記錄錯誤"""
+    job = PicImportJob(folder, re.compile(r"x(\d+)"), cdb, True, False, 1, 1, 1)
+    job.start()
+    job.wait()
+    assert job.error is None and job.tasks == []
+    assert len(job.skipped["文件名不匹配"]) == 6
+
+    job = PicImportJob(
+        folder + "/none", re.compile(r"(\d+)"), cdb, True, False, 1, 1, 1
+    )
+    job.start()
+    job.wait()
+    assert job.error is not None
@@ -0,0 +1,99 @@
+import os
+import time
+from PyQt6.QtGui import QImage, QColor
+from scripts.data_edit.pic_loader import (
+    THUMB_DIR,
+    PicLoader,
+    _pixmap_bytes,
+    pic_key,
+    thumb_path,
+    load_thumbnail,
+)
+
+
+def make_pic(path: str):
+    image = QImage(800, 1140, QImage.Format.Format_RGB32)
+    image.fill(QColor(40, 80, 160))
+    image.save(path, "JPG")
+
+
+def test_thumbnail_written(tmp_path):
+    path = str(tmp_path / "100.jpg")
+    make_pic(path)
+    assert not load_thumbnail(pic_key(path)).isNull()
+    assert len(os.listdir(tmp_path / THUMB_DIR)) == 1
+
+
+def test_thumbnail_not_written(tmp_path):
+    """唯讀開啟的 cdb 不在卡圖資料夾寫入縮圖"""
+    path = str(tmp_path / "100.jpg")
+    make_pic(path)
+    assert not load_thumbnail(pic_key(path), write=False).isNull()
+    assert not os.path.exists(tmp_path / THUMB_DIR)
+
+
+def wait_until(qapp, cond, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    return cond()
+
+
+def test_cache_evicts_least_recent(tmp_path, qapp):
+    """超出快取上限時移除最久未使用的卡圖"""
+    paths = [str(tmp_path / f"{i}.jpg") for i in range(3)]
+    for path in paths:
+        make_pic(path)
+    loader = PicLoader()
+    ready = []
+    loader.pic_ready.connect(ready.append)
+    assert loader.request(paths[0]) is None
+    assert wait_until(qapp, lambda: len(ready) == 1)
+    pixmap = loader.request(paths[0])
+    loader.max_bytes = _pixmap_bytes(pixmap) * 2
+    for path in paths[1:]:
+        loader.request(path)
+        assert wait_until(qapp, lambda: path in ready)
+    assert loader.request(paths[2]) is not None
+    assert loader.request(paths[1]) is not None
+    assert loader.request(paths[0]) is None  # 已被移除, 重新解碼
+    loader.wait()
+
+
+def test_bad_pic_not_retried(tmp_path, qapp):
+    path = str(tmp_path / "bad.jpg")
+    with open(path, "wb") as f:
+        f.write(b"not a jpg")
+    loader = PicLoader()
+    ready = []
+    loader.pic_ready.connect(ready.append)
+    assert loader.request(path) is None
+    assert wait_until(qapp, lambda: not loader._pending)
+    assert ready == []
+    assert loader.request(path) is None
+    assert not loader._pending  # 不再重新解碼
+    loader.wait()
+
+
+def test_thumbnail_reused_and_replaced(tmp_path):
+    """已有縮圖時不再讀取原圖, 替換卡圖後寫入新的縮圖並刪除舊的"""
+    path = str(tmp_path / "1.jpg")
+    other = str(tmp_path / "10.jpg")
+    make_pic(path)
+    make_pic(other)
+    key = pic_key(path)
+    load_thumbnail(key)
+    load_thumbnail(pic_key(other))
+    os.remove(path)
+    assert not load_thumbnail(key).isNull()  # 從縮圖讀取
+
+    make_pic(path)
+    os.utime(path, ns=(key[1] + 10**9, key[1] + 10**9))
+    new_key = pic_key(path)
+    assert thumb_path(new_key) != thumb_path(key)
+    load_thumbnail(new_key)
+    names = sorted(os.listdir(tmp_path / THUMB_DIR))
+    assert names == sorted(
+        os.path.basename(thumb_path(k)) for k in (new_key, pic_key(other))
+    )
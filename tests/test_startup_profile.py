@@ -0,0 +1,30 @@
+import json
+import scripts.global_set.startup_profile as profile
+
+
+def test_init_strips_flags(tmp_path, monkeypatch):
+    """init 取出計時參數, 不修改傳入的 argv, 所有等待的階段結束後寫入報告"""
+    monkeypatch.delenv(profile.PROFILE_ENV, raising=False)
+    monkeypatch.delenv(profile.PROFILE_EXIT_ENV, raising=False)
+    monkeypatch.setattr(profile, "_phases", {})
+    monkeypatch.setattr(profile, "_waiting", set())
+    monkeypatch.setattr(profile, "_written", False)
+    report = str(tmp_path / "startup.json")
+    argv = ["main_from.py", f"--profile-startup={report}", "a.cdb", "--profile-exit"]
+    assert profile.init(argv) == ["main_from.py", "a.cdb"]
+    assert len(argv) == 4
+    assert profile.enabled() and profile.exit_after()
+
+    profile.wait_for("first_paint")
+    profile.begin("imports")
+    profile.end("imports")
+    profile.begin("first_paint")
+    assert not (tmp_path / "startup.json").exists()
+    profile.end("first_paint")
+    with open(report, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["argv"] == ["a.cdb"]
+    assert [p["name"] for p in data["phases"]] == ["imports", "first_paint"]
+
+    profile.init(["main_from.py"])
+    assert not profile.enabled()